@@ -0,0 +1,63 @@
+"""
+Compares the cost of creating boto3 clients on every call with reusing them from the shared client registry,
+over a number of simulated warm Lambda invocations.
+
+Run from the root of the repository with `python -m benchmarks.client_construction`.
+"""
+
+import os
+import time
+from typing import Callable
+
+import boto3
+from src.autorecycle_common import aws_clients
+
+# Client creation resolves credentials, so give it some that don't need the network (IMDS, SSO etc.)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+INVOCATIONS = 20
+
+# The clients a single mongo recycle step asks for: AMI lookup, instance discovery, termination polling
+CALLS_PER_INVOCATION = [("ec2", "eu-west-2")] * 4 + [("autoscaling", "eu-west-2")]
+
+
+def invoke_without_registry() -> None:
+    for service_name, region_name in CALLS_PER_INVOCATION:
+        boto3.client(service_name, region_name=region_name)
+
+
+def invoke_with_registry() -> None:
+    for service_name, region_name in CALLS_PER_INVOCATION:
+        aws_clients.get_client(service_name, region_name)
+
+
+def time_invocations(invoke: Callable[[], None]) -> list[float]:
+    timings = []
+    for _ in range(INVOCATIONS):
+        start = time.perf_counter()
+        invoke()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    print(
+        f"{name:<18} first: {timings[0] * 1000:8.2f}ms  "
+        f"warm mean: {sum(timings[1:]) / len(timings[1:]) * 1000:8.2f}ms  "
+        f"total: {sum(timings) * 1000:8.2f}ms"
+    )
+
+
+def main() -> None:
+    # Load botocore's service models once up front, so neither run pays for the cold start of the process
+    invoke_without_registry()
+
+    print(f"{INVOCATIONS} invocations, {len(CALLS_PER_INVOCATION)} client requests per invocation")
+    report("boto3.client", time_invocations(invoke_without_registry))
+    aws_clients.clear()
+    report("client registry", time_invocations(invoke_with_registry))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares deciding on the next member to recycle by filtering the member list once per question, as the decision
+used to, with building the indexed view once, over synthetic replica sets of growing size.
+
+Run from the root of the repository with `python -m benchmarks.decision_engine`.
+"""
+
+import random
+import timeit
+
+from src.mongo_recycler.models.decision import Decision, done, recycle_secondary, step_down_and_recycle_primary
+from src.mongo_recycler.models.instances import Instance
+from src.mongo_recycler.process.decision import decide_on_action
+
+TARGET_AMI = "ami-new"
+REPLICA_SET_SIZES = [3, 7, 50, 500]
+REPETITIONS = 2000
+
+
+def synthetic_replica_set(size: int, seed: int = 0) -> list[Instance]:
+    rng = random.Random(seed)
+    states = ["PRIMARY"] + [rng.choice(["SECONDARY", "SECONDARY", "SECONDARY", "ARBITER"]) for _ in range(size - 1)]
+    return [
+        Instance(
+            instance_id=f"i-{index:08x}",
+            image_id=rng.choice([TARGET_AMI, "ami-old"]),
+            ip_address=f"10.0.{index // 256}.{index % 256}",
+            mongo_state=state,
+            replica_set_name="benchmark",
+            availability_zone=rng.choice(["eu-west-2a", "eu-west-2b", "eu-west-2c"]),
+            priority=rng.choice([0, 1, 1, 2]),
+            votes=rng.choice([0, 1, 1]) if state == "SECONDARY" else 1,
+            hidden=rng.random() < 0.1,
+            replication_lag_seconds=rng.uniform(0, 5),
+        )
+        for index, state in enumerate(states)
+    ]
+
+
+def decide_by_filtering(instances: list[Instance], target_ami: str) -> Decision:
+    candidates = [
+        instance
+        for instance in instances
+        if instance.image_id != target_ami and instance.mongo_state in {"PRIMARY", "SECONDARY", "ARBITER"}
+    ]
+    secondaries = [instance for instance in candidates if instance.mongo_state in {"SECONDARY", "ARBITER"}]
+    primaries = [instance for instance in candidates if instance.mongo_state == "PRIMARY"]
+
+    def recycle_cost(instance: Instance) -> tuple:
+        members_in_availability_zone = len(
+            [member for member in instances if member.availability_zone == instance.availability_zone]
+        )
+        return (
+            instance.mongo_state == "ARBITER",
+            instance.votes > 0,
+            not instance.hidden,
+            instance.priority,
+            instance.replication_lag_seconds,
+            -members_in_availability_zone,
+        )
+
+    if secondaries:
+        return recycle_secondary(min(secondaries, key=recycle_cost))
+    elif primaries:
+        return step_down_and_recycle_primary(primaries[0])
+    else:
+        return done()
+
+
+def main() -> None:
+    print(f"{REPETITIONS} decisions per replica set size")
+    for size in REPLICA_SET_SIZES:
+        instances = synthetic_replica_set(size)
+        assert decide_by_filtering(instances, TARGET_AMI) == decide_on_action(instances, TARGET_AMI)
+
+        filtering = timeit.timeit(lambda: decide_by_filtering(instances, TARGET_AMI), number=REPETITIONS)
+        indexed = timeit.timeit(lambda: decide_on_action(instances, TARGET_AMI), number=REPETITIONS)
+        print(
+            f"{size:>4} members  filtering: {filtering / REPETITIONS * 1e6:8.2f}us  "
+            f"indexed: {indexed / REPETITIONS * 1e6:8.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares finding each instance's last launch time by searching every scaling activity for every instance, as the
+monitor used to, with parsing the activities into an index once, for ASGs of growing size.
+
+Run from the root of the repository with `python -m benchmarks.scaling_activity_index`.
+"""
+
+import timeit
+from datetime import datetime, timedelta
+from typing import Any
+
+from src.monitor_autorecycle.main import _last_launch_times_by_instance
+
+ASG_SIZES = [2, 20, 200, 1000]
+# Each instance has been launched a few times over the life of the ASG
+LAUNCHES_PER_INSTANCE = 3
+REPETITIONS = 50
+
+
+def synthetic_activities(instance_ids: list[str]) -> list[dict]:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "Description": f"Launching a new EC2 instance: {instance_id}",
+            "StartTime": start + timedelta(minutes=launch * 60 + index % 60),
+        }
+        for launch in range(LAUNCHES_PER_INSTANCE)
+        for index, instance_id in enumerate(instance_ids)
+    ]
+
+
+def last_launch_times_by_searching(activities: list[dict], instance_ids: list[str]) -> list[Any]:
+    last_launch_times = []
+    for instance_id in instance_ids:
+        instance_activities = [activity for activity in activities if instance_id in activity["Description"]]
+        last_launch_times.append(sorted(activity["StartTime"] for activity in instance_activities)[-1])
+    return last_launch_times
+
+
+def last_launch_times_by_index(activities: list[dict], instance_ids: list[str]) -> list[Any]:
+    last_launch_times = _last_launch_times_by_instance(activities)
+    return [last_launch_times[instance_id] for instance_id in instance_ids]
+
+
+def main() -> None:
+    print(f"{REPETITIONS} checks per ASG size, {LAUNCHES_PER_INSTANCE} launches per instance")
+    for size in ASG_SIZES:
+        # Real instance ids have a fixed width, so no id is a prefix of another
+        instance_ids = [f"i-{index:017x}" for index in range(size)]
+        activities = synthetic_activities(instance_ids)
+        assert last_launch_times_by_searching(activities, instance_ids) == last_launch_times_by_index(
+            activities, instance_ids
+        )
+
+        searching = timeit.timeit(lambda: last_launch_times_by_searching(activities, instance_ids), number=REPETITIONS)
+        indexed = timeit.timeit(lambda: last_launch_times_by_index(activities, instance_ids), number=REPETITIONS)
+        print(
+            f"{size:>5} instances  searching: {searching / REPETITIONS * 1000:9.3f}ms  "
+            f"indexed: {indexed / REPETITIONS * 1000:9.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
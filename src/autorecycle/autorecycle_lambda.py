@@ -1,13 +1,27 @@
 import os
-from typing import Any
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Optional
 
-import boto3
 from botocore.exceptions import ClientError
+from src.autorecycle_common import aws_clients, queue_registry
+from src.autorecycle_common.queue_registry import UnknownQueue
 
 print("Loading function")
 
 SQS_URL = "https://sqs.eu-west-2.amazonaws.com"
 
+# The most entries SQS accepts in a single SendMessageBatch
+MAX_BATCH_ENTRIES = 10
+
+# Entries that failed through no fault of the request are sent again, up to this many times in all
+MAX_BATCH_ATTEMPTS = 3
+
+# Every component has its own queue, so a fleet wide recycle sends to many queues at once
+MAX_CONCURRENT_QUEUES = 10
+
 
 def output(component: str, success: bool, channel: str) -> Any:
     if success:
@@ -44,23 +58,38 @@ def output(component: str, success: bool, channel: str) -> Any:
     return data
 
 
-def send_to_sqs(component: str, account_id: str, channel: str) -> Any:
-    print("LOG: Sending component to be recycled metadata to SQS queue")
-    sqs = boto3.client("sqs")
+def queue_url(sqs: Any, component: str, account_id: str) -> str:
+    """
+    Looks the component's queue up in the cached listing of recycle queues, raising UnknownQueue if it has none.
+    """
+    try:
+        return queue_registry.find_url(sqs, "recycle-{}".format(component))
+    except ClientError as err:
+        # Not being able to list the queues shouldn't stop a recycle, the send will fail if the queue is missing
+        print("Unable to list the recycle queues, {}".format(err))
+        return SQS_URL + "/{}/recycle-{}".format(account_id, component)
 
-    sqs_queue = SQS_URL + "/{}/recycle-{}".format(account_id, component)
 
-    print(sqs_queue)
+def message_attributes(component: str, account_id: str) -> Any:
+    return {
+        "component": {"DataType": "String", "StringValue": component},
+        "account_id": {"DataType": "String", "StringValue": account_id},
+    }
+
+
+def send_to_sqs(component: str, account_id: str, channel: str) -> Any:
+    print("LOG: Sending component to be recycled metadata to SQS queue")
+    sqs = aws_clients.get_client("sqs")
 
     send_message = "Recycle {}".format(component)
 
     try:
+        sqs_queue = queue_url(sqs, component, account_id)
+        print(sqs_queue)
+
         response = sqs.send_message(
             QueueUrl=sqs_queue,
-            MessageAttributes={
-                "component": {"DataType": "String", "StringValue": component},
-                "account_id": {"DataType": "String", "StringValue": account_id},
-            },
+            MessageAttributes=message_attributes(component, account_id),
             MessageBody=(send_message),
         )
         print("response: {}".format(response))
@@ -72,6 +101,10 @@ def send_to_sqs(component: str, account_id: str, channel: str) -> Any:
             print("ERROR: Invalid return code for SQS send, {}".format(response))
             success = False
             return output(component, success, channel)
+    except UnknownQueue as err:
+        print("ERROR: {}".format(err))
+        success = False
+        return output(component, success, channel)
     except ClientError as err:
         print("Client Error {}".format(err))
         success = False
@@ -82,9 +115,101 @@ def send_to_sqs(component: str, account_id: str, channel: str) -> Any:
         return output(component, success, channel)
 
 
+def send_batch(sqs: Any, sqs_queue: str, entries: list[Any], sent_ids: Optional[set[str]] = None) -> set[str]:
+    """
+    Sends up to MAX_BATCH_ENTRIES messages to a queue, sending the entries SQS failed on its side again, and
+    returns the ids of the entries that were sent. Ids are added to sent_ids as each attempt confirms them, so
+    they aren't lost when a later attempt raises.
+    """
+    if sent_ids is None:
+        sent_ids = set()
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        if attempt > 0:
+            time.sleep(0.1 * 2**attempt)
+
+        response = sqs.send_message_batch(QueueUrl=sqs_queue, Entries=entries)
+        sent_ids.update(successful["Id"] for successful in response.get("Successful", []))
+
+        failed = response.get("Failed", [])
+        for failure in failed:
+            print("ERROR: Failed to send {} to {}, {}".format(failure["Id"], sqs_queue, failure))
+        retryable_ids = {failure["Id"] for failure in failed if not failure["SenderFault"]}
+        entries = [entry for entry in entries if entry["Id"] in retryable_ids]
+        if not entries:
+            break
+
+    return sent_ids
+
+
+def send_to_queue(sqs: Any, sqs_queue: str, entries: list[Any]) -> set[str]:
+    sent_ids: set[str] = set()
+    try:
+        for start in range(0, len(entries), MAX_BATCH_ENTRIES):
+            send_batch(sqs, sqs_queue, entries[start : start + MAX_BATCH_ENTRIES], sent_ids)
+    except ClientError as err:
+        print("Client Error sending to {}, {}".format(sqs_queue, err))
+    except Exception as ex:
+        print("General exception sending to {}, {}".format(sqs_queue, ex))
+    return sent_ids
+
+
+def send_batch_to_sqs(components: list[str], account_id: str, channel: str) -> list[Any]:
+    """
+    Sends a recycle message for each component with as few requests as possible, returning each component's
+    output in the order given.
+    """
+    print("LOG: Sending {} components to be recycled to their SQS queues".format(len(components)))
+    sqs = aws_clients.get_client("sqs")
+
+    # Entry ids only have to be unique within a batch, the component's position also tells us which one it was
+    entries_by_queue = defaultdict(list)
+    for index, component in enumerate(components):
+        try:
+            sqs_queue = queue_url(sqs, component, account_id)
+        except UnknownQueue as err:
+            print("ERROR: {}".format(err))
+            continue
+        entries_by_queue[sqs_queue].append(
+            {
+                "Id": str(index),
+                "MessageBody": "Recycle {}".format(component),
+                "MessageAttributes": message_attributes(component, account_id),
+            }
+        )
+
+    sent_ids: set[str] = set()
+    if entries_by_queue:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_QUEUES, len(entries_by_queue))) as executor:
+            futures = [
+                executor.submit(send_to_queue, sqs, sqs_queue, entries)
+                for sqs_queue, entries in entries_by_queue.items()
+            ]
+            for future in futures:
+                sent_ids |= future.result()
+
+    return [output(component, str(index) in sent_ids, channel) for index, component in enumerate(components)]
+
+
 def lambda_handler(event: Any, context: Any) -> Any:
+    # The monitor only needs scaling activities from after the recycle was queued
+    recycle_started_at = datetime.now(timezone.utc).isoformat()
+
+    # A fleet wide recycle sends every component in one invocation
+    if "components" in event:
+        results = send_batch_to_sqs(event["components"], event["account_id"], event["success_channel"])
+        for result in results:
+            result["recycle_started_at"] = recycle_started_at
+        return {"results": results}
+
     component = event["component"]
     account_id = event["account_id"]
     channel = event["success_channel"]
 
-    return send_to_sqs(component, account_id, channel)
+    result = send_to_sqs(component, account_id, channel)
+    result["recycle_started_at"] = recycle_started_at
+
+    # Pass the ASG resolved when the recycle was triggered on to the monitor, so it can look it up by name
+    if "auto_scaling_group_name" in event:
+        result["auto_scaling_group_name"] = event["auto_scaling_group_name"]
+
+    return result
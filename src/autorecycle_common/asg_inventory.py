@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from mypy_boto3_autoscaling.type_defs import AutoScalingGroupTypeDef
+
+logger = logging.getLogger(__name__)
+
+# The listing is only used to work out which ASGs to look at, their details are always re-read before being
+# returned, so it can safely be kept for the length of a recycle
+DEFAULT_TTL_SECONDS = 1800
+
+# DescribeAutoScalingGroups accepts at most 100 names per request
+MAX_NAMES_PER_REQUEST = 100
+
+component_matcher = re.compile(r"^(?P<component>.+)-asg-[a-z\d]+$")
+az_suffix_matcher = re.compile("_[abc]$")
+
+_inventories: Dict[Any, Tuple[float, AsgInventory]] = {}
+
+
+class AsgInventory:
+    """
+    An index over a listing of every ASG in a region, by name prefix, component and Name tag.
+    """
+
+    def __init__(self, auto_scaling_groups: List[AutoScalingGroupTypeDef]) -> None:
+        self._groups: Dict[str, AutoScalingGroupTypeDef] = {}
+        for asg in auto_scaling_groups:
+            self._groups.setdefault(asg["AutoScalingGroupName"], asg)
+
+        self._positions = {name: position for position, name in enumerate(self._groups)}
+        self._sorted_names = sorted(self._groups)
+        self._by_component: Dict[str, List[str]] = {}
+        self._by_name_tag: Dict[str, List[str]] = {}
+
+        for name, asg in self._groups.items():
+            match = component_matcher.match(name)
+            if match:
+                self._by_component.setdefault(match["component"], []).append(name)
+            for tag in asg.get("Tags", []):
+                if tag["Key"] == "Name":
+                    self._by_name_tag.setdefault(tag["Value"], []).append(name)
+
+    def groups(self, names: List[str]) -> List[AutoScalingGroupTypeDef]:
+        return [self._groups[name] for name in names]
+
+    def names_with_prefix(self, prefix: str) -> List[str]:
+        names = []
+        for name in self._sorted_names[bisect.bisect_left(self._sorted_names, prefix) :]:
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return self._in_listing_order(names)
+
+    def names_for_component(self, component_name_maybe_with_az_suffix: str) -> List[str]:
+        # A component with an _a/_b/_c suffix has one ASG per AZ, and matches all of them
+        component_name, number_of_subs_made = az_suffix_matcher.subn("", component_name_maybe_with_az_suffix)
+        if number_of_subs_made == 1:
+            components = [component_name + suffix for suffix in ["_a", "_b", "_c"]]
+        else:
+            components = [component_name]
+
+        return self._in_listing_order([name for c in components for name in self._by_component.get(c, [])])
+
+    def names_with_name_tag(self, value: str) -> List[str]:
+        return list(self._by_name_tag.get(value, []))
+
+    def _in_listing_order(self, names: List[str]) -> List[str]:
+        return sorted(names, key=self._positions.__getitem__)
+
+
+def find_by_prefix(client: Any, prefix: str) -> List[AutoScalingGroupTypeDef]:
+    return _find(client, lambda inventory: inventory.names_with_prefix(prefix))
+
+
+def find_by_component(client: Any, component_name_maybe_with_az_suffix: str) -> List[AutoScalingGroupTypeDef]:
+    return _find(client, lambda inventory: inventory.names_for_component(component_name_maybe_with_az_suffix))
+
+
+def find_by_name_tag(client: Any, value: str) -> List[AutoScalingGroupTypeDef]:
+    return _find(client, lambda inventory: inventory.names_with_name_tag(value))
+
+
+def invalidate() -> None:
+    _inventories.clear()
+
+
+def list_auto_scaling_groups(client: Any) -> List[AutoScalingGroupTypeDef]:
+    auto_scaling_groups: List[AutoScalingGroupTypeDef] = []
+    for page in client.get_paginator("describe_auto_scaling_groups").paginate(PaginationConfig={"PageSize": 100}):
+        auto_scaling_groups += page["AutoScalingGroups"]
+    return auto_scaling_groups
+
+
+def describe_auto_scaling_groups(client: Any, names: List[str]) -> List[AutoScalingGroupTypeDef]:
+    found: Dict[str, AutoScalingGroupTypeDef] = {}
+    for start in range(0, len(names), MAX_NAMES_PER_REQUEST):
+        response = client.describe_auto_scaling_groups(
+            AutoScalingGroupNames=names[start : start + MAX_NAMES_PER_REQUEST],
+            MaxRecords=MAX_NAMES_PER_REQUEST,
+        )
+        for asg in response["AutoScalingGroups"]:
+            found[asg["AutoScalingGroupName"]] = asg
+    return [found[name] for name in names if name in found]
+
+
+def _find(
+    client: Any, select: Callable[[AsgInventory], List[str]], ttl_seconds: int = DEFAULT_TTL_SECONDS
+) -> List[AutoScalingGroupTypeDef]:
+    region = client.meta.region_name
+    cached = _inventories.get(region)
+
+    if cached and time.monotonic() - cached[0] < ttl_seconds:
+        names = select(cached[1])
+        if names:
+            auto_scaling_groups = describe_auto_scaling_groups(client, names)
+            if len(auto_scaling_groups) == len(names):
+                return auto_scaling_groups
+        # Either an ASG we knew about has gone or we know of none that match, which may be because it is new
+        logger.info("The cached ASG inventory is out of date, listing all ASGs again")
+
+    inventory = AsgInventory(list_auto_scaling_groups(client))
+    _inventories[region] = (time.monotonic(), inventory)
+    return inventory.groups(select(inventory))
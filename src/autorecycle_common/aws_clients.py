@@ -0,0 +1,35 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+# Clients and resources live for as long as the Lambda execution environment, so warm invocations skip credential
+# resolution and endpoint loading. Configs are compared by identity, so callers should share a module level Config.
+_clients: Dict[Tuple[str, Optional[str], Optional[Config]], Any] = {}
+_resources: Dict[Tuple[str, Optional[str], Optional[Config]], Any] = {}
+
+# Clients are thread safe once created, but creating them from the default session is not
+_lock = threading.Lock()
+
+
+def get_client(service_name: str, region_name: Optional[str] = None, config: Optional[Config] = None) -> Any:
+    key = (service_name, region_name, config)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = boto3.client(service_name, region_name=region_name, config=config)
+        return _clients[key]
+
+
+def get_resource(service_name: str, region_name: Optional[str] = None, config: Optional[Config] = None) -> Any:
+    key = (service_name, region_name, config)
+    with _lock:
+        if key not in _resources:
+            _resources[key] = boto3.resource(service_name, region_name=region_name, config=config)
+        return _resources[key]
+
+
+def clear() -> None:
+    with _lock:
+        _clients.clear()
+        _resources.clear()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# However soon a recycle looks like finishing, polling more often than this only costs invocations
+MIN_POLL_SECONDS = 30
+
+
+def activity_kind(activity: Any) -> str:
+    # Descriptions start with what the activity does, e.g. "Launching a new EC2 instance: i-..."
+    return str(activity.get("Description", "")).split(" ", 1)[0]
+
+
+def learn_durations(durations: Dict[str, float], activities: List[Any]) -> Dict[str, float]:
+    """
+    Updates how long each kind of scaling activity takes with the most recent successful one of each kind.
+    Activities are expected newest first, as DescribeScalingActivities lists them.
+    """
+    learnt = dict(durations)
+    seen_kinds = set()
+    for activity in activities:
+        kind = activity_kind(activity)
+        if kind in seen_kinds or "EndTime" not in activity or activity.get("StatusCode") != "Successful":
+            continue
+        learnt[kind] = (activity["EndTime"] - activity["StartTime"]).total_seconds()
+        seen_kinds.add(kind)
+    return learnt
+
+
+def remaining_seconds(activity: Any, durations: Dict[str, float]) -> Optional[float]:
+    elapsed_seconds: float = (datetime.now(activity["StartTime"].tzinfo) - activity["StartTime"]).total_seconds()
+    kind = activity_kind(activity)
+    if kind in durations:
+        return durations[kind] - elapsed_seconds
+
+    # Without a previous activity to go by, assume the rest takes as long as the progress so far did
+    progress: float = activity.get("Progress", 0)
+    if 0 < progress < 100:
+        return elapsed_seconds * (100 - progress) / progress
+    return None
+
+
+def clamp(seconds: float, max_seconds: int, min_seconds: int = MIN_POLL_SECONDS) -> int:
+    return int(min(max(seconds, min_seconds), max_seconds))
+
+
+def estimate_next_poll_seconds(
+    activities: List[Any],
+    durations: Dict[str, float],
+    default_seconds: int,
+    max_seconds: int,
+    min_seconds: int = MIN_POLL_SECONDS,
+) -> int:
+    """
+    Estimates when the scaling activities still in progress will have finished, falling back to default_seconds
+    when there is nothing to go by.
+    """
+    in_progress = [activity for activity in activities if activity.get("Progress") != 100]
+    if not in_progress:
+        # Only health checks are left to wait for, or the next activity is about to start
+        return min_seconds
+
+    estimates = [remaining_seconds(activity, durations) for activity in in_progress]
+    if any(estimate is None for estimate in estimates):
+        return clamp(default_seconds, max_seconds, min_seconds)
+    return clamp(max(estimate for estimate in estimates if estimate is not None), max_seconds, min_seconds)
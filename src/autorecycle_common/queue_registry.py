@@ -0,0 +1,54 @@
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Recycle queues are created with their component, so the listing changes far less often than it is read
+DEFAULT_TTL_SECONDS = 1800
+
+# A queue we don't know of may have been created since the listing, but only list again this often, so a run of
+# unknown components fails fast rather than listing every queue each time
+RELIST_AFTER_SECONDS = 60
+
+QUEUE_NAME_PREFIX = "recycle-"
+
+_registries: Dict[Any, Tuple[float, Dict[str, str]]] = {}
+
+
+class UnknownQueue(Exception):
+    pass
+
+
+def list_queue_urls(client: Any) -> Dict[str, str]:
+    queue_urls = {}
+    paginator = client.get_paginator("list_queues")
+    for page in paginator.paginate(QueueNamePrefix=QUEUE_NAME_PREFIX, PaginationConfig={"PageSize": 1000}):
+        for queue_url in page.get("QueueUrls", []):
+            queue_urls[queue_url.rsplit("/", 1)[-1]] = queue_url
+    return queue_urls
+
+
+def find_url(client: Any, queue_name: str, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> str:
+    region = client.meta.region_name
+    cached = _registries.get(region)
+
+    if cached:
+        age_seconds = time.monotonic() - cached[0]
+        if age_seconds < ttl_seconds and (queue_name in cached[1] or age_seconds < RELIST_AFTER_SECONDS):
+            return _url_or_raise(cached[1], queue_name)
+        logger.info("The cached queue registry is out of date, listing the recycle queues again")
+
+    queue_urls = list_queue_urls(client)
+    _registries[region] = (time.monotonic(), queue_urls)
+    return _url_or_raise(queue_urls, queue_name)
+
+
+def invalidate() -> None:
+    _registries.clear()
+
+
+def _url_or_raise(queue_urls: Dict[str, str], queue_name: str) -> str:
+    if queue_name not in queue_urls:
+        raise UnknownQueue("No queue named {}".format(queue_name))
+    return queue_urls[queue_name]
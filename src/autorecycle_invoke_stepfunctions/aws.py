@@ -1,12 +1,11 @@
 import logging
 from typing import Any, List, Union
 
-import boto3
 import botocore.exceptions
+from src.autorecycle_common import asg_inventory, aws_clients
 
 logger = logging.getLogger(__name__)
 
-sf_client = None
 sf_exceptions = botocore.exceptions
 
 autorecycle_tag_names = dict(
@@ -22,28 +21,21 @@ autorecycle_tag_names = dict(
 
 
 def get_stepfunctions_client() -> Any:
-    global sf_client
-    if sf_client is None:
-        sf_client = boto3.client("stepfunctions", "eu-west-2")
-    return sf_client
+    return aws_clients.get_client("stepfunctions", "eu-west-2")
 
 
 def get_asg(component: Any) -> Any:
-    client: Any = boto3.client("autoscaling", "eu-west-2")
-    paginator: Any = client.get_paginator("describe_auto_scaling_groups")
-    page_iterator: Any = paginator.paginate(PaginationConfig={"PageSize": 100})
+    client: Any = aws_clients.get_client("autoscaling", "eu-west-2")
 
-    filtered_asgs: Any = page_iterator.search(
-        "AutoScalingGroups[] | [?contains(Tags[?Key==`{}`].Value, `{}`)]".format("Name", component)
-    )
+    filtered_asgs: Any = asg_inventory.find_by_name_tag(client, component)
 
     logger.info(f"Found ASGs with tag Name: {component} = {filtered_asgs}")
 
-    return next(filtered_asgs)
+    return next(iter(filtered_asgs))
 
 
 def get_autorecycling_tags(asg_name: str) -> dict[Any, Any]:
-    autoscaling_client: Any = boto3.client("autoscaling", "eu-west-2")
+    autoscaling_client: Any = aws_clients.get_client("autoscaling", "eu-west-2")
     logger.info("asg_name, {}".format(asg_name))
     autorecycling_tags_filters: list[dict[str, Union[str, list[str]]]] = [
         dict(Name="auto-scaling-group", Values=[asg_name]),
@@ -13,10 +13,20 @@ if TYPE_CHECKING:
         InstanceTypeDef,
     )
 
+from src.autorecycle_common import next_poll
 from src.autorecycle_scale_asg.lambda_types import Event
 from src.autorecycle_scale_asg.logger import logger
 
 
+# The step function waits as long as the last poll asks before polling again. Waits are never shorter than the fixed
+# one it used to make, as a recycle is only allowed so many polls.
+DEFAULT_POLL_SECONDS = 60
+MAX_POLL_SECONDS = 300
+
+# The scaling activity each action starts, by the first word of its description
+ACTIVITY_KINDS = {"out": "Launching", "in": "Terminating"}
+
+
 @dataclass
 class NextAsgAction:
     asg_name: str
@@ -90,13 +100,27 @@ def get_next_asg_action(
     return None
 
 
+def estimate_next_poll_seconds(activities: List[ActivityTypeDef], activity_seconds: Dict[str, float]) -> int:
+    return next_poll.estimate_next_poll_seconds(
+        activities, activity_seconds, DEFAULT_POLL_SECONDS, MAX_POLL_SECONDS, DEFAULT_POLL_SECONDS
+    )
+
+
+def expected_poll_seconds(next_step: NextAsgAction, activity_seconds: Dict[str, float]) -> int:
+    # The activity the policy starts should take about as long as the last one of its kind did
+    expected_seconds = activity_seconds.get(ACTIVITY_KINDS[next_step.action], DEFAULT_POLL_SECONDS)
+    return next_poll.clamp(expected_seconds, MAX_POLL_SECONDS, DEFAULT_POLL_SECONDS)
+
+
 def create_output_params(event: Event) -> Event:
     return Event(
+        activity_seconds=event.activity_seconds,
         channels=event.channels,
         component=event.component,
         counter=event.counter + 1 if event.counter else 1,
         emoji=":robot_face:",
         monitoring_slack_channel=event.monitoring_slack_channel,
+        next_poll_seconds=DEFAULT_POLL_SECONDS,
         notify_pager_duty=event.notify_pager_duty,
         status=True,
         success_channel=event.success_channel,
@@ -2,9 +2,8 @@ from __future__ import annotations
 
 import datetime
 import re
-from typing import TYPE_CHECKING, List
-
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 if TYPE_CHECKING:
     from mypy_boto3_autoscaling import AutoScalingClient
@@ -14,30 +13,22 @@ if TYPE_CHECKING:
         EmptyResponseMetadataTypeDef,
     )
 
+from src.autorecycle_common import asg_inventory, aws_clients
 from src.autorecycle_scale_asg.logger import logger
 
+# Components have at most one ASG per AZ, so this is enough to look them all up at once
+MAX_CONCURRENT_ACTIVITY_REQUESTS = 3
+
 
 def describe_asg(
     component_name_maybe_with_az_suffix: str,
 ) -> List[AutoScalingGroupTypeDef]:
-    asg_client: AutoScalingClient = boto3.client("autoscaling", "eu-west-2")
-
-    auto_scaling_groups: List[AutoScalingGroupTypeDef] = []
-    for page in asg_client.get_paginator("describe_auto_scaling_groups").paginate(PaginationConfig={"PageSize": 100}):
-        auto_scaling_groups += page["AutoScalingGroups"]
-
-    component_name, number_of_subs_made = re.subn("_[abc]$", "", component_name_maybe_with_az_suffix)
-    extension_re = ""
-    if number_of_subs_made == 1:
-        extension_re = "(?:_[abc])"
+    asg_client: AutoScalingClient = aws_clients.get_client("autoscaling", "eu-west-2")
 
-    matching_asgs: List[AutoScalingGroupTypeDef] = []
-    matcher = re.compile(rf"(^{component_name}){extension_re}-asg-[a-z\d]+$")
-    for asg in auto_scaling_groups:
-        if matcher.match(asg["AutoScalingGroupName"]):
-            matching_asgs.append(asg)
+    matching_asgs = asg_inventory.find_by_component(asg_client, component_name_maybe_with_az_suffix)
 
     if not matching_asgs:
+        component_name = re.sub("_[abc]$", "", component_name_maybe_with_az_suffix)
         msg = rf"Could not find ASGs matching: `^{component_name}(_[abc])?-asg-[a-z\d]+$`."
         logger.info(msg)
         raise Exception(msg)
@@ -47,7 +38,7 @@ def describe_asg(
 
 def execute_scaling_policy(asg_name: str, policy_name: str) -> EmptyResponseMetadataTypeDef:
     try:
-        asg_client: AutoScalingClient = boto3.client("autoscaling", "eu-west-2")
+        asg_client: AutoScalingClient = aws_clients.get_client("autoscaling", "eu-west-2")
         logger.info("Executing scaling policy: " + policy_name + " on this ASG: " + asg_name)
 
         response = asg_client.execute_policy(AutoScalingGroupName=asg_name, PolicyName=policy_name)
@@ -57,8 +48,19 @@ def execute_scaling_policy(asg_name: str, policy_name: str) -> EmptyResponseMeta
         raise e
 
 
-def describe_scaling_activities(asg_name: str) -> ActivityTypeDef:
-    asg_client: AutoScalingClient = boto3.client("autoscaling", "eu-west-2")
+def describe_latest_scaling_activities(asg_names: List[str]) -> Dict[str, ActivityTypeDef]:
+    # boto3 clients are thread safe, so one is shared by all the lookups. Results are keyed in the order given.
+    asg_client: AutoScalingClient = aws_clients.get_client("autoscaling", "eu-west-2")
+    max_workers = max(1, min(MAX_CONCURRENT_ACTIVITY_REQUESTS, len(asg_names)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        activities = executor.map(lambda asg_name: describe_scaling_activities(asg_name, asg_client), asg_names)
+        return dict(zip(asg_names, activities))
+
+
+def describe_scaling_activities(asg_name: str, asg_client: Optional[AutoScalingClient] = None) -> ActivityTypeDef:
+    if asg_client is None:
+        asg_client = aws_clients.get_client("autoscaling", "eu-west-2")
     logger.info("Checking latest scaling activity on this ASG: " + asg_name)
 
     response = asg_client.describe_scaling_activities(AutoScalingGroupName=asg_name, MaxRecords=1)
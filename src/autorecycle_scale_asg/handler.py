@@ -2,6 +2,7 @@
 import os
 from typing import List, Dict, Any
 
+from src.autorecycle_common import next_poll
 from src.autorecycle_scale_asg import autorecycle, autoscaling
 from src.autorecycle_scale_asg.lambda_types import Event
 from src.autorecycle_scale_asg.logger import logger
@@ -33,6 +34,7 @@ def handle_event(lambda_event: Event) -> Event:
                 text=f"Autorecycling of {event.component} appears to be taking too long :scream: please investigate.",
             ),
             monitoring_slack_channel=event.monitoring_slack_channel,
+            next_poll_seconds=autorecycle.DEFAULT_POLL_SECONDS,
             pager_duty_description=f"Autorecycling of {event.component} appears to be taking too long. Please investigate.",
             pager_duty_event_type="trigger",
             success_channel=event.success_channel,
@@ -60,17 +62,18 @@ def scale_asg(event: Event) -> Event:
 
     try:
         asgs = autoscaling.describe_asg(event.component)
-        asg_activity_details = {}
-
-        for asg in asgs:
-            asg_name = asg["AutoScalingGroupName"]
-            asg_activity_details[asg_name] = autoscaling.describe_scaling_activities(asg_name)
+        asg_activity_details = autoscaling.describe_latest_scaling_activities(
+            [asg["AutoScalingGroupName"] for asg in asgs]
+        )
 
-        overall_progress = autorecycle.get_overall_progress(list(asg_activity_details.values()))
-        overall_statuscode = autorecycle.get_overall_statuscode(list(asg_activity_details.values()))
+        activities = list(asg_activity_details.values())
+        overall_progress = autorecycle.get_overall_progress(activities)
+        overall_statuscode = autorecycle.get_overall_statuscode(activities)
+        output.activity_seconds = next_poll.learn_durations(event.activity_seconds or {}, activities)
 
         if not overall_progress:
             logger.debug("Scaling activity is in progress...")
+            output.next_poll_seconds = autorecycle.estimate_next_poll_seconds(activities, output.activity_seconds)
             output.message_content = Event.MessageContent(
                 color="good",
                 fields=message_content_fields,
@@ -97,6 +100,7 @@ def scale_asg(event: Event) -> Event:
             logger.info(f"Initiating scale {next_step.action} policy")
             scale_policy = f"recycle-scale-{next_step.action}"
             autoscaling.execute_scaling_policy(next_step.asg_name, scale_policy)
+            output.next_poll_seconds = autorecycle.expected_poll_seconds(next_step, output.activity_seconds)
             if output.counter == 1:
                 output.message_content = Event.MessageContent(
                     color="good",
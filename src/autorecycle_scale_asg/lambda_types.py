@@ -11,6 +11,8 @@ class Event(BaseModel):
         fields: Optional[List[Dict[str, Any]]] = None
         text: Optional[str] = None
 
+    # How long the latest successful scaling activity of each kind took, carried between polls
+    activity_seconds: Optional[Dict[str, float]] = None
     channels: Optional[Union[List[str], str]] = None  # The Slack notifications Lambda converts this to a list
     component: str 
     counter: Optional[int] = None
@@ -20,6 +22,7 @@ class Event(BaseModel):
     monitoring_slack_channel: str = "team-infra-alerts"
     pager_duty_description: Optional[str] = None
     pager_duty_event_type: Optional[str] = None
+    next_poll_seconds: Optional[int] = None
     notify_pager_duty: Optional[bool] = None
     recycle_success: Optional[bool] = None
     status: Optional[Union[bool, str]] = None 
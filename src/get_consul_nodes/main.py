@@ -6,7 +6,7 @@ import tempfile
 import urllib.request
 from typing import Any, Optional
 
-import boto3
+from src.autorecycle_common import aws_clients
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +35,7 @@ class CaCertificate:
 
         try:
             logger.info(f"Retrieving CA certificate from parameter: {self.cert_parameter_arn}")
-            ssm = boto3.client("ssm", region_name="eu-west-2")
+            ssm = aws_clients.get_client("ssm", region_name="eu-west-2")
             response = ssm.get_parameter(Name=self.cert_parameter_arn, WithDecryption=True)
             cert_content = response["Parameter"]["Value"]
 
@@ -76,7 +76,7 @@ def get_ssl_context() -> ssl.SSLContext:
 def lambda_handler(event: Any, context: Any) -> Any:
     consul_host = get_consul_host(event)
 
-    ec2 = boto3.client("ec2")
+    ec2 = aws_clients.get_client("ec2")
 
     ssl_context = get_ssl_context()
 
@@ -1,10 +1,12 @@
 import logging
+import os
 import re
-from typing import Any, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generator, Optional
 
-import boto3
 from botocore.exceptions import ClientError
-from src.mongo_recycler.utils.poll import poll
+from src.autorecycle_common import aws_clients
+from src.mongo_recycler.utils.poll import Exponential, poll
 
 
 class NoENIFound(Exception):
@@ -23,6 +25,16 @@ class TooManyReservationsFound(Exception):
     pass
 
 
+# Terminations usually finish within a minute, this matches the longest the fixed ten second poll would wait
+TERMINATION_DEADLINE_SECONDS = 500
+
+
+def surge_replacement_enabled() -> bool:
+    # The replacement can't join the replica set before the instance it replaces has released its persistent ENI,
+    # so surging only goes as far as asking the ASG to launch the replacement at the same time as terminating
+    return os.environ.get("MONGO_SURGE_REPLACEMENT", "false") == "true"
+
+
 def create_instance_name_filters(component: str) -> Any:
     instances = [re.sub(r"_[abc]$", "", component) + az for az in ["_a", "_b", "_c"]]
     return [{"Name": "tag:Name", "Values": instances}]
@@ -46,9 +58,30 @@ def describe_mongodb_instances(reservations: Any) -> Generator:
                     "InstanceId": instance["InstanceId"],
                     "ImageId": instance["ImageId"],
                     "IpAddress": describe_ip_address_from_instance(instance),
+                    "AvailabilityZone": instance.get("Placement", {}).get("AvailabilityZone"),
                 }
 
 
+def describe_latest_launch_template_versions(client: Any, launch_template_ids: set[str]) -> list[Any]:
+    # Each template is described by its id, as without one $Latest pages through every launch template in the
+    # account. The lookups are independent, so are made at the same time.
+    if not launch_template_ids:
+        return []
+
+    def describe_latest_launch_template_version(launch_template_id: str) -> list[Any]:
+        response = client.describe_launch_template_versions(LaunchTemplateId=launch_template_id, Versions=["$Latest"])
+        return list(response["LaunchTemplateVersions"])
+
+    with ThreadPoolExecutor(max_workers=len(launch_template_ids)) as executor:
+        return [
+            launch_template_version
+            for launch_template_versions in executor.map(
+                describe_latest_launch_template_version, sorted(launch_template_ids)
+            )
+            for launch_template_version in launch_template_versions
+        ]
+
+
 def instance_state(instance_descriptions: Any) -> Any:
     reservations = instance_descriptions["Reservations"]
     if len(reservations) == 0:
@@ -74,38 +107,60 @@ class AWS:
     def __init__(self, component: str) -> None:
         self.component = component
         self.region_name = "eu-west-2"
+        # The instances only change when one is terminated and replaced, so are discovered once until then
+        self._mongo_db_instances: Optional[list[Any]] = None
 
-    def get_launch_template_image_ids(self) -> list[str]:
-        client = boto3.client("ec2", region_name="eu-west-2")
+    def get_launch_template_image_ids(self, known_image_ids: Optional[dict[str, Any]] = None) -> list[str]:
+        """
+        known_image_ids maps launch template ids to the version and image id an earlier step resolved, and is
+        updated with any versions that had to be looked up.
+        """
+        known_image_ids = {} if known_image_ids is None else known_image_ids
+        client = aws_clients.get_client("ec2", region_name="eu-west-2")
 
         launch_templates = client.describe_launch_templates(
             Filters=[{"Name": "launch-template-name", "Values": [f"{self.component}*"]}]
-        )
+        )["LaunchTemplates"]
 
-        launch_templates_versions = [
-            client.describe_launch_template_versions(
-                LaunchTemplateId=launch_template["LaunchTemplateId"],
-                Versions=[str(launch_template["LatestVersionNumber"])],
-            )["LaunchTemplateVersions"][0]
-            for launch_template in launch_templates["LaunchTemplates"]
-        ]
+        stale_launch_template_ids = {
+            launch_template["LaunchTemplateId"]
+            for launch_template in launch_templates
+            if known_image_ids.get(launch_template["LaunchTemplateId"], {}).get("version")
+            != launch_template["LatestVersionNumber"]
+        }
+
+        for launch_template_version in describe_latest_launch_template_versions(client, stale_launch_template_ids):
+            known_image_ids[launch_template_version["LaunchTemplateId"]] = {
+                "version": launch_template_version["VersionNumber"],
+                "image_id": launch_template_version["LaunchTemplateData"]["ImageId"],
+            }
 
         return [
-            launch_template_version["LaunchTemplateData"]["ImageId"]
-            for launch_template_version in launch_templates_versions
+            known_image_ids[launch_template["LaunchTemplateId"]]["image_id"] for launch_template in launch_templates
         ]
 
     def get_instance_state(self, instance_id: str) -> Any:
-        client = boto3.client("ec2", region_name=self.region_name)
+        client = aws_clients.get_client("ec2", region_name=self.region_name)
         return instance_state(client.describe_instances(InstanceIds=[instance_id]))
 
-    def get_mongo_db_instances(self) -> Generator:
-        client = boto3.client("ec2", region_name=self.region_name)
-        reservations = client.describe_instances(Filters=create_instance_name_filters(self.component))
-        return describe_mongodb_instances(reservations)
+    def get_mongo_db_instances(self) -> list[Any]:
+        if self._mongo_db_instances is None:
+            client = aws_clients.get_client("ec2", region_name=self.region_name)
+            reservations = client.describe_instances(Filters=create_instance_name_filters(self.component))
+            self._mongo_db_instances = list(describe_mongodb_instances(reservations))
+        return list(self._mongo_db_instances)
+
+    def invalidate_mongo_db_instances(self) -> None:
+        self._mongo_db_instances = None
+
+    def restore_mongo_db_instances(self, instances: list[Any]) -> None:
+        self._mongo_db_instances = list(instances)
 
-    def recycle_instance(self, instance: Any) -> None:
-        resource = boto3.resource("ec2", region_name=self.region_name)
+    def terminate_instance(self, instance: Any) -> None:
+        if surge_replacement_enabled() and self.terminate_instance_in_auto_scaling_group(instance):
+            return
+
+        resource = aws_clients.get_resource("ec2", region_name=self.region_name)
 
         try:
             instances = list(resource.instances.filter(InstanceIds=[instance.instance_id]).all())
@@ -115,12 +170,35 @@ class AWS:
         if len(instances) > 1:
             raise TooManyInstancesFound
 
-        instance = instances[0]
+        self.invalidate_mongo_db_instances()
+        instances[0].terminate()
 
-        instance.terminate()
+    def terminate_instance_in_auto_scaling_group(self, instance: Any) -> bool:
+        """
+        Terminates the instance through its ASG without reducing the desired capacity, so the ASG launches the
+        replacement straight away rather than after its next health check notices the instance has gone. Returns
+        False when the instance isn't in an ASG.
+        """
+        client = aws_clients.get_client("autoscaling", region_name=self.region_name)
+        try:
+            client.terminate_instance_in_auto_scaling_group(
+                InstanceId=instance.instance_id, ShouldDecrementDesiredCapacity=False
+            )
+        except ClientError as e:
+            logging.info("Could not terminate {} through its ASG: {}".format(instance.instance_id, e))
+            return False
+
+        self.invalidate_mongo_db_instances()
+        return True
 
+    def wait_until_terminated(self, instance_id: str, deadline_seconds: float = TERMINATION_DEADLINE_SECONDS) -> None:
         def is_terminated() -> None:
-            assert_terminated(self.get_instance_state(instance.instance_id))
-
-        logging.info("waiting for instance {} to terminate".format(instance.instance_id))
-        poll(is_terminated, sleep_for_seconds=10)
+            assert_terminated(self.get_instance_state(instance_id))
+
+        logging.info("waiting for instance {} to terminate".format(instance_id))
+        poll(
+            is_terminated,
+            max_iters=None,
+            schedule=Exponential(initial_seconds=2, max_seconds=15),
+            deadline_seconds=deadline_seconds,
+        )
@@ -1,10 +1,18 @@
+import copy
 import logging
 import re
+import threading
 from collections import namedtuple
-from typing import Any
+from typing import Any, Dict, Optional
 
 import pymongo
-from pymongo.errors import AutoReconnect
+from pymongo.errors import AutoReconnect, PyMongoError
+from src.mongo_recycler.models.topology import (
+    ChainingState,
+    MemberSettings,
+    config_version,
+    member_settings_from_config,
+)
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger(__name__)
@@ -18,6 +26,10 @@ class MongoRequestFailed(Exception):
     pass
 
 
+class MongoConnectorClosed(Exception):
+    pass
+
+
 NodeDetails = namedtuple("NodeDetails", ["node_state", "replica_set_name"])
 
 
@@ -50,6 +62,13 @@ def node_details(instance_status: Any) -> NodeDetails:
 class Mongo:
     def __init__(self, component: str) -> None:
         self.cluster_name = re.sub(r"_mongo(?:_[abc])?$", "", component)
+        self._clients: Dict[str, pymongo.MongoClient] = {}
+        self._clients_lock = threading.Lock()
+        self._closed = False
+        self.chaining_state: Optional[ChainingState] = None
+        self._observed_config_version: Optional[int] = None
+        self.member_settings: Optional[MemberSettings] = None
+        self._config: Optional[Any] = None
 
     @retry(wait=wait_exponential(min=0.1, max=1), stop=stop_after_attempt(10), reraise=True)
     def _connect(self, connection_string: str) -> pymongo.MongoClient:
@@ -67,13 +86,82 @@ class Mongo:
 
         return connection_object
 
-    def replica_set_status(self, connection_string: str) -> Any:
+    def _client(self, connection_string: str) -> pymongo.MongoClient:
+        # Connecting means a TLS handshake and AWS authentication, so keep one client per connection string for
+        # the life of this object and only check it is still usable before handing it out again
+        client = self._clients.get(connection_string)
+        if client is not None:
+            try:
+                client.admin.command("ping")
+                return client
+            except PyMongoError as e:
+                logger.info(f"Cached connection to [{connection_string}] is unusable, reconnecting: {e}")
+                with self._clients_lock:
+                    self._clients.pop(connection_string, None)
+                client.close()
+
+        if self._closed:
+            raise MongoConnectorClosed(f"Not connecting to [{connection_string}], the connector has been closed")
+
         client = self._connect(connection_string)
-        return client.admin.command("replSetGetStatus")
+        with self._clients_lock:
+            if not self._closed:
+                self._clients[connection_string] = client
+                return client
+        # A worker abandoned by a timed out status collection finished connecting after close, nobody will use it
+        client.close()
+        raise MongoConnectorClosed(f"Connected to [{connection_string}] after the connector was closed")
+
+    def close(self) -> None:
+        # Nodes are queried from worker threads, so one may still be connecting while we close
+        with self._clients_lock:
+            self._closed = True
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+    def replica_set_status(self, connection_string: str) -> Any:
+        client = self._client(connection_string)
+        replica_set_status = client.admin.command("replSetGetStatus")
+        self._observed_config_version = config_version(replica_set_status)
+        return replica_set_status
+
+    def _config_is_current(self) -> bool:
+        return self._config is not None and self._config["version"] == self._observed_config_version
+
+    def _replica_set_config(self, client: pymongo.MongoClient) -> Any:
+        # The config only changes with its version, so one read serves every caller until a newer version is seen
+        if not self._config_is_current():
+            self._remember_config(client.admin.command("replSetGetConfig")["config"])
+        return copy.deepcopy(self._config)
+
+    def _remember_config(self, config: Any) -> None:
+        self._config = copy.deepcopy(config)
+        self.member_settings = member_settings_from_config(config)
+
+    def replica_set_member_settings(self, connection_string: str) -> dict[str, Any]:
+        if self.member_settings is None or self.member_settings.config_version != self._observed_config_version:
+            self._replica_set_config(self._client(connection_string))
+        return dict(self.member_settings.members) if self.member_settings else {}
+
+    def _chaining_state_is_current(self, client: pymongo.MongoClient) -> bool:
+        if self.chaining_state is None:
+            return False
+        # Any reconfig changes the config version, so a matching version means chaining hasn't changed either.
+        # The version seen by the last replica set status saves a round trip, otherwise hello reports it.
+        current_config_version = self._observed_config_version
+        if current_config_version is None:
+            current_config_version = client.admin.command("hello").get("setVersion")
+        return bool(current_config_version == self.chaining_state.config_version)
 
     def set_chaining(self, connection_string: str, new_chaining_status: bool) -> Any:
-        client = self._connect(connection_string)
-        config = client.admin.command("replSetGetConfig")["config"]
+        client = self._client(connection_string)
+        if self.chaining_state is not None and self.chaining_state.chaining_allowed == new_chaining_status:
+            if self._chaining_state_is_current(client):
+                logger.info(f"Chaining status is known to be set to {new_chaining_status}")
+                return None
+
+        config = self._replica_set_config(client)
         current_chaining_status = config["settings"]["chainingAllowed"]
         if current_chaining_status == new_chaining_status:
             logger.info(f"Chaining status is already set to {new_chaining_status}")
@@ -82,17 +170,20 @@ class Mongo:
             config["settings"]["chainingAllowed"] = new_chaining_status
             config["version"] += 1
             client.admin.command({"replSetReconfig": config})
+            self._observed_config_version = config["version"]
+            self._remember_config(config)
+        self.chaining_state = ChainingState(new_chaining_status, config["version"])
         return config
 
     def get_node_details(self, ip_address: str) -> Any:
-        client = self._connect(ip_address)
+        client = self._client(ip_address)
         instance_status = client.admin.command("replSetGetStatus")
         details = node_details(instance_status)
 
         return details
 
     def step_down(self, ip_address: str) -> None:
-        client = self._connect(ip_address)
+        client = self._client(ip_address)
         try:
             client.admin.command("replSetStepDown", 100)
         except AutoReconnect:
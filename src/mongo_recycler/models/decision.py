@@ -7,6 +7,7 @@ Decision = namedtuple("Decision", ["action", "instance"])
 STEP_DOWN_AND_RECYCLE_PRIMARY = "STEP_DOWN_AND_RECYCLE_PRIMARY"
 RECYCLE_SECONDARY = "RECYCLE_SECONDARY"
 DONE = "DONE"
+RESUME = "RESUME"
 
 
 def done() -> Decision:
@@ -1,10 +1,56 @@
-from collections import namedtuple
+from collections import Counter, defaultdict, namedtuple
 
+# The member settings and replication lag default to an ordinary voting secondary that has caught up, which is
+# all that can be assumed when a node was asked for its own state
 Instance = namedtuple(
     "Instance",
-    ["instance_id", "image_id", "ip_address", "mongo_state", "replica_set_name"],
+    [
+        "instance_id",
+        "image_id",
+        "ip_address",
+        "mongo_state",
+        "replica_set_name",
+        "availability_zone",
+        "priority",
+        "votes",
+        "hidden",
+        "replication_lag_seconds",
+        "secondary_delay_seconds",
+    ],
+    defaults=[None, 1, 1, False, 0.0, 0.0],
 )
 
 
-def find_instances(instances: list[Instance], mongo_state: str) -> list[Instance]:
-    return [i for i in instances if i.mongo_state == mongo_state]
+class InstanceIndex:
+    """
+    The members of a replica set not yet on the target AMI indexed by state, along with how many members each
+    availability zone holds. Built in a single pass, so a decision doesn't filter the whole member list again for
+    each question it asks.
+    """
+
+    def __init__(self, instances: list[Instance], target_ami: str) -> None:
+        self.out_of_date_by_state: dict[str, list[Instance]] = defaultdict(list)
+        self.members_per_availability_zone: Counter = Counter()
+        for instance in instances:
+            if instance.image_id != target_ami:
+                self.out_of_date_by_state[instance.mongo_state].append(instance)
+            self.members_per_availability_zone[instance.availability_zone] += 1
+
+    def out_of_date(self, mongo_state: str) -> list[Instance]:
+        return self.out_of_date_by_state.get(mongo_state, [])
+
+    def recycle_cost(self, instance: Instance) -> tuple:
+        """
+        Orders members from the cheapest to recycle: members that can't vote or be seen by clients first, then
+        those least likely to be elected, then the ones that have the least replication to catch up on. Of the
+        rest, members in the most crowded availability zone go first, as losing them least affects the spread.
+        Out of date arbiters, which hold no data, come after every secondary and ahead of the primary.
+        """
+        return (
+            instance.mongo_state == "ARBITER",
+            instance.votes > 0,
+            not instance.hidden,
+            instance.priority,
+            instance.replication_lag_seconds,
+            -self.members_per_availability_zone[instance.availability_zone],
+        )
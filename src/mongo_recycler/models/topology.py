@@ -0,0 +1,89 @@
+from collections import namedtuple
+from typing import Any, Optional
+
+# What a step learnt about the cluster, carried in the event so the next step can skip rediscovering it
+Topology = namedtuple(
+    "Topology",
+    [
+        "target_ami",
+        "launch_template_images",
+        "instances",
+        "replica_set_name",
+        "chaining_allowed",
+        "config_version",
+        "member_settings",
+    ],
+    defaults=[None],
+)
+
+# Whether chaining is allowed, as of the given replica set config version
+ChainingState = namedtuple("ChainingState", ["chaining_allowed", "config_version"])
+
+# The priority, votes and hidden flag of each member by IP address, as of the given replica set config version
+MemberSettings = namedtuple("MemberSettings", ["members", "config_version"])
+
+
+def to_event(topology: Topology) -> Any:
+    return topology._asdict()
+
+
+def from_event(event_topology: Any) -> Optional[Topology]:
+    try:
+        topology = Topology(**event_topology)
+    except TypeError:
+        return None
+
+    if not isinstance(topology.launch_template_images, dict):
+        topology = topology._replace(launch_template_images={})
+    if not instances_are_reusable(topology):
+        topology = topology._replace(instances=None)
+    return topology
+
+
+def instances_are_reusable(topology: Topology) -> bool:
+    # The instances are only trusted alongside the replica set config they were discovered with
+    return (
+        isinstance(topology.instances, list)
+        and len(topology.instances) > 0
+        and all(
+            isinstance(instance, dict) and {"InstanceId", "ImageId", "IpAddress"} <= instance.keys()
+            for instance in topology.instances
+        )
+        and isinstance(topology.replica_set_name, str)
+        and isinstance(topology.config_version, int)
+    )
+
+
+def chaining_state(topology: Topology) -> Optional[ChainingState]:
+    if isinstance(topology.chaining_allowed, bool) and isinstance(topology.config_version, int):
+        return ChainingState(topology.chaining_allowed, topology.config_version)
+    return None
+
+
+def member_settings(topology: Topology) -> Optional[MemberSettings]:
+    if isinstance(topology.member_settings, dict) and isinstance(topology.config_version, int):
+        return MemberSettings(topology.member_settings, topology.config_version)
+    return None
+
+
+def member_settings_from_config(config: Any) -> MemberSettings:
+    return MemberSettings(
+        {
+            member["host"].rsplit(":", 1)[0]: {
+                "priority": member.get("priority", 1),
+                "votes": member.get("votes", 1),
+                "hidden": member.get("hidden", False),
+                # Renamed from slaveDelay in MongoDB 5.0
+                "secondary_delay_seconds": float(member.get("secondaryDelaySecs", member.get("slaveDelay", 0))),
+            }
+            for member in config["members"]
+        },
+        config["version"],
+    )
+
+
+def config_version(replica_set_status: Any) -> Optional[int]:
+    return next(
+        (member.get("configVersion") for member in replica_set_status.get("members", []) if member.get("self")),
+        None,
+    )
@@ -10,7 +10,7 @@ from src.mongo_recycler.models.decision import (
     recycle_secondary,
     step_down_and_recycle_primary,
 )
-from src.mongo_recycler.models.instances import Instance, find_instances
+from src.mongo_recycler.models.instances import Instance, InstanceIndex
 
 
 def choose_color(instance: Instance, target_ami: str) -> Any:
@@ -42,24 +42,17 @@ def instance_to_string(instance: Instance) -> str:
     return "{instance_id} | {mongo_state} | {ip_address} | {image_id}".format(**instance._asdict())
 
 
-candidate_states = {"PRIMARY", "SECONDARY"}
-
-
-def find_candidates(instances: list[Instance], target_ami: str) -> list[Instance]:
-    return [
-        instance
-        for instance in instances
-        if instance.image_id != target_ami and instance.mongo_state in candidate_states
-    ]
+candidate_states = {"PRIMARY", "SECONDARY", "ARBITER"}
 
 
 def decide_on_action(replica_set_status: list[Instance], target_ami: str) -> Decision:
-    candidates = find_candidates(replica_set_status, target_ami)
-    secondaries = find_instances(candidates, mongo_state="SECONDARY")
-    primaries = find_instances(candidates, mongo_state="PRIMARY")
+    index = InstanceIndex(replica_set_status, target_ami)
+    # An arbiter holds no data, so it is recycled the same way as a secondary
+    secondaries = index.out_of_date("SECONDARY") + index.out_of_date("ARBITER")
+    primaries = index.out_of_date("PRIMARY")
 
     if len(secondaries) != 0:
-        return recycle_secondary(secondaries[0])
+        return recycle_secondary(min(secondaries, key=index.recycle_cost))
     elif len(primaries) != 0:
         return step_down_and_recycle_primary(primaries[0])
     else:
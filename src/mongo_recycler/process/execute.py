@@ -1,14 +1,63 @@
 import logging
+import time
+from typing import Any, Callable, Optional
 
-from src.mongo_recycler.connectors.aws import AWS
+from src.mongo_recycler.connectors.aws import AWS, TERMINATION_DEADLINE_SECONDS
 from src.mongo_recycler.connectors.mongo import Mongo
 from src.mongo_recycler.models.decision import DONE, STEP_DOWN_AND_RECYCLE_PRIMARY, Decision
-from src.mongo_recycler.process.replica_set_health import ReplicaSetHealth
+from src.mongo_recycler.models.instances import Instance
+from src.mongo_recycler.process.replica_set_health import HEALTHY_DEADLINE_SECONDS, ReplicaSetHealth
+from src.mongo_recycler.utils.budget import LambdaBudget
 
 logger = logging.getLogger(__name__)
 
+# The waits of a recycle which a later invocation can pick up from
+STEPPED_DOWN = "STEPPED_DOWN"
+TERMINATING = "TERMINATING"
+TERMINATED = "TERMINATED"
 
-def execute_action(decision: Decision, aws: AWS, mongo: Mongo, cluster_health: ReplicaSetHealth) -> None:
+
+class OutOfTime(Exception):
+    def __init__(self, decision: Decision, phase: str, deadline_at: float) -> None:
+        super().__init__("Ran out of time waiting for {} of {}".format(phase, decision.instance.instance_id))
+        self.decision = decision
+        self.phase = phase
+        self.deadline_at = deadline_at
+
+    def checkpoint(self) -> Any:
+        return {
+            "action": self.decision.action,
+            "instance": self.decision.instance._asdict(),
+            "phase": self.phase,
+            "deadline_at": self.deadline_at,
+        }
+
+
+def wait_within_budget(
+    wait: Callable[[float], None],
+    deadline_at: float,
+    budget: Optional[LambdaBudget],
+    decision: Decision,
+    phase: str,
+) -> None:
+    # Deadlines are wall clock times, as they carry over to the invocation that resumes the wait
+    deadline_seconds = max(deadline_at - time.time(), 0)
+    available_seconds = budget.available_seconds() if budget else None
+
+    if available_seconds is None or available_seconds >= deadline_seconds:
+        wait(deadline_seconds)
+        return
+
+    try:
+        wait(available_seconds)
+    except Exception as e:
+        logger.info("Stopped waiting for {} with: {}".format(phase, e))
+        raise OutOfTime(decision, phase, deadline_at)
+
+
+def execute_action(
+    decision: Decision, aws: AWS, mongo: Mongo, cluster_health: ReplicaSetHealth, budget: Optional[LambdaBudget] = None
+) -> None:
     instances = aws.get_mongo_db_instances()
     connection_string = ",".join(i["IpAddress"] for i in instances)
     if decision.action == DONE:
@@ -22,10 +71,58 @@ def execute_action(decision: Decision, aws: AWS, mongo: Mongo, cluster_health: R
         mongo.step_down(decision.instance.ip_address)
 
         logger.info("WAITING FOR STEP DOWN")
-        cluster_health.wait_until_cluster_healthy()
+        wait_within_budget(
+            cluster_health.wait_until_cluster_healthy,
+            time.time() + HEALTHY_DEADLINE_SECONDS,
+            budget,
+            decision,
+            STEPPED_DOWN,
+        )
+
+    recycle(decision, aws, cluster_health, budget)
 
+
+def recycle(decision: Decision, aws: AWS, cluster_health: ReplicaSetHealth, budget: Optional[LambdaBudget]) -> None:
     logger.info("RECYCLING INSTANCE")
-    aws.recycle_instance(decision.instance)
+    aws.terminate_instance(decision.instance)
+    wait_until_terminated(decision, aws, time.time() + TERMINATION_DEADLINE_SECONDS, budget)
+    wait_until_recovered(decision, cluster_health, time.time() + HEALTHY_DEADLINE_SECONDS, budget)
+
+
+def wait_until_terminated(decision: Decision, aws: AWS, deadline_at: float, budget: Optional[LambdaBudget]) -> None:
+    def wait(deadline_seconds: float) -> None:
+        aws.wait_until_terminated(decision.instance.instance_id, deadline_seconds)
+
+    wait_within_budget(wait, deadline_at, budget, decision, TERMINATING)
+
 
+def wait_until_recovered(
+    decision: Decision, cluster_health: ReplicaSetHealth, deadline_at: float, budget: Optional[LambdaBudget]
+) -> None:
     logger.info("WAIT FOR CLUSTER TO BECOME HEALTHY AGAIN")
-    cluster_health.wait_until_cluster_healthy()
+    wait_within_budget(cluster_health.wait_until_cluster_healthy, deadline_at, budget, decision, TERMINATED)
+
+
+def resume_action(
+    checkpoint: Any, aws: AWS, cluster_health: ReplicaSetHealth, budget: Optional[LambdaBudget] = None
+) -> Decision:
+    """
+    Finishes the waits of a recycle a previous invocation ran out of time for, without repeating what it had done.
+    """
+    decision = Decision(checkpoint["action"], Instance(**checkpoint["instance"]))
+    phase = checkpoint["phase"]
+    deadline_at = checkpoint["deadline_at"]
+    logger.info("RESUMING {} OF {} FROM {}".format(decision.action, decision.instance.instance_id, phase))
+
+    if phase == STEPPED_DOWN:
+        wait_within_budget(cluster_health.wait_until_cluster_healthy, deadline_at, budget, decision, STEPPED_DOWN)
+        recycle(decision, aws, cluster_health, budget)
+    elif phase == TERMINATING:
+        wait_until_terminated(decision, aws, deadline_at, budget)
+        wait_until_recovered(decision, cluster_health, time.time() + HEALTHY_DEADLINE_SECONDS, budget)
+    elif phase == TERMINATED:
+        wait_until_recovered(decision, cluster_health, deadline_at, budget)
+    else:
+        raise ValueError("Unknown checkpoint phase {}".format(phase))
+
+    return decision
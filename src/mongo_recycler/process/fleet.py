@@ -0,0 +1,70 @@
+import logging
+import re
+from typing import Any
+
+from src.mongo_recycler.utils.logger import json_logger_config
+
+logger = logging.getLogger(__name__)
+
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+
+def replica_set_of(component: str) -> str:
+    return re.sub(r"_[abc]$", "", component)
+
+
+def plan(components: list[str]) -> list[str]:
+    """
+    Picks one component per replica set, keeping the order they were given in. Components of the same replica set
+    recycle the same instances, so running them concurrently would break the one node at a time rule.
+    """
+    planned: dict[str, str] = {}
+    for component in components:
+        replica_set = replica_set_of(component)
+        if replica_set in planned:
+            logger.info(f"Skipping {component}, its replica set is recycled by {planned[replica_set]}")
+        else:
+            planned[replica_set] = component
+    return list(planned.values())
+
+
+def summarise(results: list[Any]) -> Any:
+    failed = [result["component"] for result in results if result.get("execution", {}).get("status") != SUCCEEDED]
+    return {
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "failed_components": failed,
+    }
+
+
+def report_summary(summary: Any) -> str:
+    report = f"Recycled {summary['succeeded']} of {summary['total']} mongo replica sets."
+    if summary["failed_components"]:
+        report += " Failed: {}".format(", ".join(summary["failed_components"]))
+    return report
+
+
+def lambda_handler(event: Any, context: Any) -> Any:
+    """
+    Plans a fleet recycle from the event's components, or summarises it once the state machine has added the
+    results of recycling each replica set.
+    """
+    json_logger_config(event, context)
+
+    if "results" in event:
+        summary = summarise(event["results"])
+        logger.info(report_summary(summary))
+        return {
+            "summary": summary,
+            "status": "fail" if summary["failed"] else "success",
+            "message_content": {
+                "color": "danger" if summary["failed"] else "good",
+                "text": report_summary(summary),
+            },
+        }
+
+    components = plan(event["components"])
+    logger.info(f"Recycling {len(components)} mongo replica sets: {', '.join(components)}")
+    return {"replica_sets": [{"component": component, "strategy": "mongo"} for component in components]}
@@ -1,17 +1,120 @@
-from typing import Generator
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Optional
 
 from src.mongo_recycler.connectors.aws import AWS
 from src.mongo_recycler.connectors.mongo import Mongo
 from src.mongo_recycler.models.instances import Instance
+from src.mongo_recycler.models.topology import Topology, config_version
+from src.mongo_recycler.process.replica_set_health import replication_lag_seconds, secondary_delays
 
+logger = logging.getLogger(__name__)
 
-def fetch_replica_set_status(aws: AWS, mongo: Mongo) -> Generator:
-    for instance in aws.get_mongo_db_instances():
-        node_details = mongo.get_node_details(instance["IpAddress"])
-        yield Instance(
-            instance_id=instance["InstanceId"],
-            image_id=instance["ImageId"],
-            ip_address=instance["IpAddress"],
-            mongo_state=node_details.node_state,
-            replica_set_name=node_details.replica_set_name,
+# Connecting to a node retries with backoff, so an unreachable node could otherwise hold up the whole step
+NODE_STATUS_DEADLINE_SECONDS = 60
+
+
+class NodeStatusTimeout(Exception):
+    pass
+
+
+def fetch_replica_set_status_from_seed_list(
+    aws: AWS,
+    mongo: Mongo,
+    deadline_seconds: float = NODE_STATUS_DEADLINE_SECONDS,
+    topology: Optional[Topology] = None,
+) -> list[Instance]:
+    """
+    Reads every member's state from a single replSetGetStatus through the seed list, only asking each node
+    directly when the replica set's view of its members doesn't line up with the EC2 instances.
+
+    Instances restored from a previous step's topology are discovered again if the replica set or its config
+    version have changed since.
+    """
+    instances = list(aws.get_mongo_db_instances())
+    if not instances:
+        return []
+
+    seed_list = ",".join(instance["IpAddress"] for instance in instances)
+    replica_set_status = mongo.replica_set_status(seed_list)
+
+    if topology is not None and (replica_set_status["set"], config_version(replica_set_status)) != (
+        topology.replica_set_name,
+        topology.config_version,
+    ):
+        logger.info("The replica set has changed since the previous step, discovering the instances again")
+        aws.invalidate_mongo_db_instances()
+        instances = list(aws.get_mongo_db_instances())
+
+    replica_set_instances = instances_from_replica_set_status(
+        instances, replica_set_status, mongo.replica_set_member_settings(seed_list)
+    )
+    if replica_set_instances is not None:
+        return replica_set_instances
+
+    logger.info("The replica set status does not account for every instance, asking each node for its state")
+    aws.invalidate_mongo_db_instances()
+    return fetch_status_from_each_node(list(aws.get_mongo_db_instances()), mongo, deadline_seconds)
+
+
+def instances_from_replica_set_status(
+    instances: list[Any], replica_set_status: Any, member_settings: Optional[dict[str, Any]] = None
+) -> Optional[list[Instance]]:
+    member_settings = member_settings or {}
+    members_by_ip_address = {member["name"].rsplit(":", 1)[0]: member for member in replica_set_status["members"]}
+    if members_by_ip_address.keys() != {instance["IpAddress"] for instance in instances}:
+        return None
+
+    lag_seconds = replication_lag_seconds(replica_set_status["members"], secondary_delays(member_settings))
+    replica_set_instances = []
+    for instance in instances:
+        member = members_by_ip_address.get(instance["IpAddress"])
+        # The state of a member the replica set can't reach is only its last known state
+        if member is None or member.get("health") != 1:
+            return None
+
+        replica_set_instances.append(
+            Instance(
+                instance_id=instance["InstanceId"],
+                image_id=instance["ImageId"],
+                ip_address=instance["IpAddress"],
+                mongo_state=member["stateStr"],
+                replica_set_name=replica_set_status["set"],
+                availability_zone=instance.get("AvailabilityZone"),
+                replication_lag_seconds=lag_seconds.get(member["name"], 0.0),
+                **member_settings.get(instance["IpAddress"], {}),
+            )
         )
+
+    return replica_set_instances
+
+
+def fetch_status_from_each_node(instances: list[Any], mongo: Mongo, deadline_seconds: float) -> list[Instance]:
+    if not instances:
+        return []
+
+    # Every node is asked at the same time, so the deadline applies to each node individually
+    executor = ThreadPoolExecutor(max_workers=len(instances))
+    try:
+        futures = [executor.submit(mongo.get_node_details, instance["IpAddress"]) for instance in instances]
+        _, not_done = wait(futures, timeout=deadline_seconds)
+
+        if not_done:
+            slow_nodes = [instance["IpAddress"] for instance, future in zip(instances, futures) if future in not_done]
+            raise NodeStatusTimeout(
+                "No status from {} within {} seconds".format(", ".join(slow_nodes), deadline_seconds)
+            )
+
+        return [
+            Instance(
+                instance_id=instance["InstanceId"],
+                image_id=instance["ImageId"],
+                ip_address=instance["IpAddress"],
+                mongo_state=node_details.node_state,
+                replica_set_name=node_details.replica_set_name,
+                availability_zone=instance.get("AvailabilityZone"),
+            )
+            for instance, node_details in zip(instances, (future.result() for future in futures))
+        ]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
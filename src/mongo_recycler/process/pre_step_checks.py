@@ -1,3 +1,5 @@
+from typing import Any, Optional
+
 from src.mongo_recycler.connectors.aws import AWS
 from src.mongo_recycler.models.instances import Instance
 
@@ -14,8 +16,10 @@ class MongoReplicaSetMismatch(Exception):
     pass
 
 
-def get_ami_and_check_all_amis_match(component: str, aws: AWS) -> str:
-    return assert_amis_match_and_get_ami(component, aws.get_launch_template_image_ids())
+def get_ami_and_check_all_amis_match(
+    component: str, aws: AWS, known_image_ids: Optional[dict[str, Any]] = None
+) -> str:
+    return assert_amis_match_and_get_ami(component, aws.get_launch_template_image_ids(known_image_ids))
 
 
 def assert_amis_match_and_get_ami(component: str, launch_template_image_ids: list[str]) -> str:
@@ -1,8 +1,12 @@
-from typing import Any
+import logging
+import os
+from typing import Any, Optional
 
 from src.mongo_recycler.connectors.aws import AWS
 from src.mongo_recycler.connectors.mongo import Mongo
-from src.mongo_recycler.utils.poll import poll
+from src.mongo_recycler.utils.poll import Exponential, PollAttempt, poll
+
+logger = logging.getLogger(__name__)
 
 
 class NodeNotHealthy(Exception):
@@ -17,6 +21,16 @@ class SecondaryNotHealthy(Exception):
     pass
 
 
+class ReplicationLagging(Exception):
+    pass
+
+
+# Matches the longest the fixed ten second poll would wait
+HEALTHY_DEADLINE_SECONDS = 600
+
+# Moving on while a secondary is still catching up risks slow elections and rollbacks under write load
+DEFAULT_MAX_REPLICATION_LAG_SECONDS = 30
+
 healthy_states = {"PRIMARY", "SECONDARY", "ARBITER"}
 
 
@@ -39,6 +53,55 @@ def assert_all_nodes_healthy(replica_set_members: list[Any]) -> None:
                     )
 
 
+def secondary_delays(member_settings: Optional[dict[str, Any]]) -> dict[str, float]:
+    return {
+        ip_address: float(settings.get("secondary_delay_seconds", 0.0))
+        for ip_address, settings in (member_settings or {}).items()
+    }
+
+
+def replication_lag_seconds(
+    replica_set_members: list[Any], secondary_delays: Optional[dict[str, float]] = None
+) -> dict[str, float]:
+    """
+    How far each secondary is behind the primary, beyond the delay it is configured to keep. secondary_delays is
+    keyed by member IP address.
+    """
+    secondary_delays = secondary_delays or {}
+    primary = next((member for member in replica_set_members if member["stateStr"] == "PRIMARY"), None)
+    if primary is None or "optimeDate" not in primary:
+        return {}
+
+    return {
+        member["name"]: (primary["optimeDate"] - member["optimeDate"]).total_seconds()
+        - secondary_delays.get(member["name"].rsplit(":", 1)[0], 0.0)
+        for member in replica_set_members
+        if member["stateStr"] == "SECONDARY" and "optimeDate" in member
+    }
+
+
+def assert_replication_lag_within(
+    replica_set_members: list[Any], max_lag_seconds: float, secondary_delays: Optional[dict[str, float]] = None
+) -> None:
+    for name, lag_seconds in replication_lag_seconds(replica_set_members, secondary_delays).items():
+        if lag_seconds > max_lag_seconds:
+            raise ReplicationLagging(
+                "{name} is {lag:.0f}s behind the primary, more than {max:.0f}s".format(
+                    name=name, lag=lag_seconds, max=max_lag_seconds
+                )
+            )
+
+
+def max_replication_lag_seconds_from_environment() -> Optional[float]:
+    max_lag_seconds = os.environ.get("MONGO_MAX_REPLICATION_LAG_SECONDS", str(DEFAULT_MAX_REPLICATION_LAG_SECONDS))
+    # A negative threshold turns the replication lag check off
+    return None if float(max_lag_seconds) < 0 else float(max_lag_seconds)
+
+
+def member_ip_addresses(replica_set_status: Any) -> set[str]:
+    return {member["name"].rsplit(":", 1)[0] for member in replica_set_status["members"]}
+
+
 def assert_replica_set_healthy(replica_set_status: Any) -> None:
     replica_set_members = replica_set_status["members"]
     assert_all_nodes_healthy(replica_set_members)
@@ -46,16 +109,72 @@ def assert_replica_set_healthy(replica_set_status: Any) -> None:
 
 
 class ReplicaSetHealth:
-    def __init__(self, aws: AWS, mongo: Mongo) -> None:
+    def __init__(self, aws: AWS, mongo: Mongo, max_replication_lag_seconds: Optional[float] = None) -> None:
         self.aws = aws
         self.mongo = mongo
+        self.max_replication_lag_seconds = (
+            max_replication_lag_seconds_from_environment()
+            if max_replication_lag_seconds is None
+            else max_replication_lag_seconds
+        )
+        self.last_replica_set_status: Optional[Any] = None
+        self.secondary_delays: dict[str, float] = {}
 
     def assert_healthy(self) -> None:
         instances = self.aws.get_mongo_db_instances()
         host = ",".join(i["IpAddress"] for i in instances)
-        replica_set_status = self.mongo.replica_set_status(host)
+        try:
+            replica_set_status = self.mongo.replica_set_status(host)
+        except Exception:
+            self.aws.invalidate_mongo_db_instances()
+            raise
+
+        self.last_replica_set_status = replica_set_status
+        if member_ip_addresses(replica_set_status) != {i["IpAddress"] for i in instances}:
+            logger.info("Replica set members don't match the running instances, discovering them again")
+            self.aws.invalidate_mongo_db_instances()
+
         print(replica_set_status)
         assert_replica_set_healthy(replica_set_status)
-
-    def wait_until_cluster_healthy(self) -> None:
-        poll(self.assert_healthy, sleep_for_seconds=10, max_iters=60)
+        if self.max_replication_lag_seconds is not None:
+            self.assert_replication_lag_within(host, replica_set_status["members"], self.max_replication_lag_seconds)
+
+    def assert_replication_lag_within(self, host: str, replica_set_members: list[Any], max_lag_seconds: float) -> None:
+        # A delayed member is always behind by its delay, which is only read from the config once a member looks
+        # to be lagging. The config is cached by its version, so this is rarely more than one read.
+        lag_seconds = replication_lag_seconds(replica_set_members, self.secondary_delays)
+        if any(lag > max_lag_seconds for lag in lag_seconds.values()):
+            self.secondary_delays = secondary_delays(self.mongo.replica_set_member_settings(host))
+        assert_replication_lag_within(replica_set_members, max_lag_seconds, self.secondary_delays)
+
+    def wait_until_cluster_healthy(self, deadline_seconds: float = HEALTHY_DEADLINE_SECONDS) -> None:
+        attempts: list[PollAttempt] = []
+        try:
+            poll(
+                self.assert_healthy,
+                max_iters=None,
+                schedule=Exponential(initial_seconds=5, max_seconds=20),
+                deadline_seconds=deadline_seconds,
+                on_attempt=attempts.append,
+            )
+        finally:
+            self.log_health_timings(attempts)
+
+    def log_health_timings(self, attempts: list[PollAttempt]) -> None:
+        if not attempts:
+            return
+        lagging_attempts = [attempt for attempt in attempts if isinstance(attempt.error, ReplicationLagging)]
+        lag = (
+            replication_lag_seconds(self.last_replica_set_status["members"], self.secondary_delays)
+            if self.last_replica_set_status
+            else {}
+        )
+        logger.info(
+            "Health checked {} times over {:.1f}s ({:.1f}s querying), {} waiting on replication lag, lag: {}".format(
+                len(attempts),
+                attempts[-1].elapsed_seconds,
+                sum(attempt.latency_seconds for attempt in attempts),
+                len(lagging_attempts),
+                {name: round(lag_seconds, 1) for name, lag_seconds in lag.items()},
+            )
+        )
@@ -1,45 +1,103 @@
 import logging
 import time
-from typing import Any
+from typing import Any, Optional
 
-import boto3
 import src.mongo_recycler.models.decision
+import src.mongo_recycler.models.topology as topology
 import src.mongo_recycler.process.decision as decision
 import src.mongo_recycler.process.execute as execute
 import src.mongo_recycler.process.instances
 import src.mongo_recycler.process.pre_step_checks as pre_step_checks
 import src.mongo_recycler.process.replica_set_health as replica_set_health
+from src.autorecycle_common import aws_clients
 from src.mongo_recycler.connectors.aws import AWS
 from src.mongo_recycler.connectors.mongo import Mongo
-from src.mongo_recycler.models.decision import Decision
+from src.mongo_recycler.models.decision import RESUME, Decision
+from src.mongo_recycler.models.topology import Topology
+from src.mongo_recycler.utils.budget import LambdaBudget
 from src.mongo_recycler.utils.logger import json_logger_config
 
 logger = logging.getLogger(__name__)
 
 
-def step(component: str) -> Decision:
+def step(
+    component: str, budget: Optional[LambdaBudget] = None, topology_state: Optional[dict[str, Any]] = None
+) -> Decision:
+    """
+    topology_state is the cluster's topology as the previous step left it, and is updated in place for the next.
+    """
+    previous_topology = topology.from_event(topology_state) if topology_state else None
+    restored_topology = previous_topology if previous_topology and previous_topology.instances is not None else None
+
     aws = AWS(component)
     mongo = Mongo(component)
     cluster_health = replica_set_health.ReplicaSetHealth(aws, mongo)
 
-    target_ami = pre_step_checks.get_ami_and_check_all_amis_match(component, aws)
+    try:
+        known_image_ids = previous_topology.launch_template_images if previous_topology else {}
+        target_ami = pre_step_checks.get_ami_and_check_all_amis_match(component, aws, known_image_ids)
+
+        if restored_topology:
+            aws.restore_mongo_db_instances(restored_topology.instances)
+        if previous_topology:
+            mongo.chaining_state = topology.chaining_state(previous_topology)
+            mongo.member_settings = topology.member_settings(previous_topology)
+        replica_set_status = src.mongo_recycler.process.instances.fetch_replica_set_status_from_seed_list(
+            aws, mongo, topology=restored_topology
+        )
 
-    replica_set_status = list(src.mongo_recycler.process.instances.fetch_replica_set_status(aws, mongo))
+        pre_step_checks.assert_all_nodes_in_same_replica_set(replica_set_status)
 
-    pre_step_checks.assert_all_nodes_in_same_replica_set(replica_set_status)
+        logger.info(decision.report_cluster_status(replica_set_status, target_ami))
+        outcome = decision.decide_on_action(replica_set_status, target_ami)
 
-    logger.info(decision.report_cluster_status(replica_set_status, target_ami))
-    outcome = decision.decide_on_action(replica_set_status, target_ami)
+        logger.info(decision.report_outcome(outcome))
+        execute.execute_action(outcome, aws, mongo, cluster_health, budget)
 
-    logger.info(decision.report_outcome(outcome))
-    execute.execute_action(outcome, aws, mongo, cluster_health)
+        if topology_state is not None:
+            # Only the instances seen by the final health check are known to be current
+            last_replica_set_status = cluster_health.last_replica_set_status
+            current_config_version = (
+                topology.config_version(last_replica_set_status) if last_replica_set_status else None
+            )
+            current_topology = Topology(
+                target_ami=target_ami,
+                launch_template_images=known_image_ids,
+                instances=aws.get_mongo_db_instances() if last_replica_set_status else None,
+                replica_set_name=replica_set_status[0].replica_set_name,
+                chaining_allowed=(
+                    mongo.chaining_state.chaining_allowed
+                    if mongo.chaining_state and mongo.chaining_state.config_version == current_config_version
+                    else None
+                ),
+                config_version=current_config_version,
+                member_settings=(
+                    mongo.member_settings.members
+                    if mongo.member_settings and mongo.member_settings.config_version == current_config_version
+                    else None
+                ),
+            )
+            topology_state.update(topology.to_event(current_topology))
+    finally:
+        mongo.close()
 
     return outcome
 
 
+def resume(component: str, checkpoint: Any, budget: Optional[LambdaBudget] = None) -> Decision:
+    aws = AWS(component)
+    mongo = Mongo(component)
+    cluster_health = replica_set_health.ReplicaSetHealth(aws, mongo)
+
+    try:
+        return execute.resume_action(checkpoint, aws, cluster_health, budget)
+    finally:
+        mongo.close()
+
+
 def record_recycle_starting(component: str) -> None:
     logger.info(f"Recording recycle start for: {component}")
-    dynamodb = boto3.resource("dynamodb", region_name="eu-west-2")
+    dynamodb = aws_clients.get_resource("dynamodb", region_name="eu-west-2")
     table = dynamodb.Table("mongo_recycle_in_progress")
     timeInFifteenMins = int(time.time()) + 900
     try:
@@ -69,10 +127,27 @@ def lambda_handler(event: Any, context: Any) -> Any:
     json_logger_config(event, context)
     component = event["component"]
 
-    if is_first_run(event):
+    # A checkpoint means a previous invocation ran out of time part way through recycling an instance
+    checkpoint = event.pop("checkpoint", None)
+    budget = LambdaBudget(context)
+
+    if is_first_run(event) and checkpoint is None:
         record_recycle_starting(component)
 
-    step_result = step(component)
+    try:
+        if checkpoint:
+            step_result = resume(component, checkpoint, budget)
+        else:
+            step_result = step(component, budget, event.setdefault("topology", {}))
+    except execute.OutOfTime as e:
+        logger.info(str(e))
+        # The instance being recycled is gone, so the instances the topology knew about are out of date
+        if "topology" in event:
+            event["topology"]["instances"] = None
+        event["checkpoint"] = e.checkpoint()
+        event["decision"] = {"action": RESUME, "instance": e.decision.instance}
+        return event
+
     event["decision"] = {"action": step_result.action, "instance": step_result.instance}
 
     if step_result.action == decision.DONE:
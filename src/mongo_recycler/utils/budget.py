@@ -0,0 +1,19 @@
+from typing import Any, Optional
+
+# Leaves enough time to checkpoint and return the event before the Lambda is stopped
+RESERVE_SECONDS = 60
+
+
+class LambdaBudget:
+    def __init__(self, context: Any, reserve_seconds: float = RESERVE_SECONDS) -> None:
+        self.context = context
+        self.reserve_seconds = reserve_seconds
+
+    def available_seconds(self) -> Optional[float]:
+        """
+        The time left for waiting in this invocation, or None when not running in Lambda.
+        """
+        get_remaining_time_in_millis = getattr(self.context, "get_remaining_time_in_millis", None)
+        if get_remaining_time_in_millis is None:
+            return None
+        return max(float(get_remaining_time_in_millis()) / 1000 - self.reserve_seconds, 0.0)
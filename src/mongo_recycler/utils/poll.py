@@ -1,10 +1,56 @@
 import itertools
 import logging
+import random
 import time
-from typing import Any, Optional
+from collections import namedtuple
+from typing import Any, Callable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
+PollAttempt = namedtuple("PollAttempt", ["attempt", "latency_seconds", "elapsed_seconds", "error"])
+
+
+class Fixed:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def sleeps(self) -> Iterator[float]:
+        return itertools.repeat(self.seconds)
+
+
+class Exponential:
+    """
+    Doubles the interval after every attempt up to max_seconds. With jitter, each sleep is drawn from the upper
+    half of the interval so concurrent waiters don't poll in lockstep.
+    """
+
+    def __init__(self, initial_seconds: float, max_seconds: float, jitter: bool = True) -> None:
+        self.initial_seconds = initial_seconds
+        self.max_seconds = max_seconds
+        self.jitter = jitter
+
+    def sleeps(self) -> Iterator[float]:
+        seconds = self.initial_seconds
+        while True:
+            yield random.uniform(seconds / 2, seconds) if self.jitter else seconds
+            seconds = min(seconds * 2, self.max_seconds)
+
+
+class DecorrelatedJitter:
+    """
+    Draws each sleep between base_seconds and three times the previous sleep, capped at max_seconds.
+    """
+
+    def __init__(self, base_seconds: float, max_seconds: float) -> None:
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+
+    def sleeps(self) -> Iterator[float]:
+        seconds = self.base_seconds
+        while True:
+            seconds = min(self.max_seconds, random.uniform(self.base_seconds, seconds * 3))
+            yield seconds
+
 
 def fails_with(fn: Any) -> Any:
     try:
@@ -14,18 +60,44 @@ def fails_with(fn: Any) -> Any:
         return e
 
 
-def poll(fn: Any, max_iters: int = 50, sleep_for_seconds: Optional[int] = None) -> Any:
+def poll(
+    fn: Any,
+    max_iters: Optional[int] = 50,
+    sleep_for_seconds: Optional[int] = None,
+    schedule: Optional[Any] = None,
+    deadline_seconds: Optional[float] = None,
+    on_attempt: Optional[Callable[[PollAttempt], None]] = None,
+) -> Any:
+    """
+    Calls fn until it stops raising, and re-raises its last error after max_iters attempts or once deadline_seconds
+    have passed, whichever comes first. The schedule decides how long to sleep between attempts, defaulting to a
+    fixed sleep_for_seconds. on_attempt is given the timing of every attempt.
+    """
+    sleeps = (schedule or Fixed(sleep_for_seconds or 0)).sleeps()
+    started_at = time.monotonic()
+
     for i in itertools.count(start=1):
+        attempt_started_at = time.monotonic()
         error = fails_with(fn)
+        now = time.monotonic()
+
+        attempt = PollAttempt(i, now - attempt_started_at, now - started_at, error)
+        if on_attempt:
+            on_attempt(attempt)
+
         if error is None:
-            logger.info("Polling Succeeded")
+            logger.info("Polling Succeeded after %d attempts in %.1fs", i, attempt.elapsed_seconds)
             return
         else:
-            logger.info("poll failed {} with: {}".format(i, error))
+            logger.info("poll failed %d in %.2fs with: %s", i, attempt.latency_seconds, error)
 
-        if i >= max_iters:
-            logger.warning("Giving up polling after {}".format(max_iters))
+        remaining_seconds = None if deadline_seconds is None else deadline_seconds - attempt.elapsed_seconds
+        if (max_iters is not None and i >= max_iters) or (remaining_seconds is not None and remaining_seconds <= 0):
+            logger.warning("Giving up polling after %d attempts in %.1fs", i, attempt.elapsed_seconds)
             raise error
 
-        if sleep_for_seconds:
-            time.sleep(sleep_for_seconds)
+        sleep_for = next(sleeps)
+        if remaining_seconds is not None:
+            sleep_for = min(sleep_for, remaining_seconds)
+        if sleep_for:
+            time.sleep(sleep_for)
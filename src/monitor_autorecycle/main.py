@@ -1,17 +1,43 @@
 #!/usr/bin/env python
-import itertools
 import logging
-from datetime import timedelta
-from typing import Any, Dict, List
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 import aws_lambda_logging
-import boto3
 from botocore.config import Config
+from src.autorecycle_common import asg_inventory, aws_clients, next_poll
 
 config = Config(retries={"max_attempts": 60, "mode": "standard"})
 logger = logging.getLogger("monitor_autorecycle")
 logger.setLevel(logging.INFO)
 
+# How close together the instances must have launched for the recycle to count as done, unless the event or the
+# ASG's tag says otherwise
+DEFAULT_LAUNCH_WINDOW_MINUTES = 2
+LAUNCH_WINDOW_TAG = "autorecycle_launch_window_minutes"
+
+# DescribeScalingActivities returns at most 100 activities per request, newest first
+SCALING_ACTIVITIES_PAGE_SIZE = 100
+
+# Scaling activities in any other state are still in progress
+FINISHED_STATUS_CODES = {"Successful", "Failed", "Cancelled"}
+
+# Allows for the clocks of the lambda that queued the recycle and of the ASG not quite agreeing
+RECYCLE_START_SLACK = timedelta(minutes=1)
+
+# The step function waits as long as the monitor asks before polling again. The longest wait is the fixed one it used
+# to make, and is what is asked for with nothing in progress to go by.
+MAX_POLL_SECONDS = 360
+DEFAULT_POLL_SECONDS = MAX_POLL_SECONDS
+
+# How long a recycle may take before giving up on it, i.e. the polls it used to be allowed at the longest wait
+MAX_POLLS = 20
+MAX_RECYCLE_DURATION = timedelta(seconds=MAX_POLLS * MAX_POLL_SECONDS)
+
+instance_id_matcher = re.compile(r"\bi-[0-9a-f]+\b")
+
 
 class ScaledDownASGException(Exception):
     pass
@@ -33,22 +59,68 @@ def lambda_handler(event: Any, context: Any) -> Any:
     return result
 
 
-def check(component: str) -> bool:
-    asg = _describe_asg(component)
-    scaling_activities = _describe_scaling_activities(asg["AutoScalingGroupName"])
+def check(
+    component: str,
+    asg_name: Optional[str] = None,
+    launch_window_minutes: Optional[Any] = None,
+    recycle_started_at: Optional[datetime] = None,
+    monitor_state: Optional[Dict] = None,
+) -> bool:
+    """
+    monitor_state is what the previous poll learnt of the ASG's launches, and is updated in place for the next poll,
+    which then only lists the scaling activities since, along with any that were still in progress. It also holds
+    how long the ASG's scaling activities took, from which next_poll_seconds estimates when the activities in
+    progress will be done.
+    """
+    asg = _describe_asg(component, asg_name)
+    resolved_asg_name: str = asg["AutoScalingGroupName"]
+    if monitor_state is None:
+        monitor_state = {}
+
+    known_launch_times, watermark, in_progress_since = _restore_monitor_state(monitor_state, resolved_asg_name)
+    since = watermark - RECYCLE_START_SLACK if watermark else recycle_started_at
+    if since and in_progress_since:
+        since = min(since, in_progress_since)
+    # Until a poll has learnt how long the ASG's activities take, the ones before the recycle listed along the way
+    # are the best guide
+    earlier_activities: List[Dict] = []
+    scaling_activities = _describe_scaling_activities(
+        resolved_asg_name, since, None if "activity_seconds" in monitor_state else earlier_activities
+    )
     launching_activities = _get_launching_activities(scaling_activities)
 
-    if not launching_activities:
-        logger.warning(f"No 'launching' scaling activities found on the asg: {asg['AutoScalingGroupName']}")
+    last_launch_times = _merge_launch_times(known_launch_times, _last_launch_times_by_instance(launching_activities))
+    # Only the launches of the ASG's instances are worth carrying. An instance launched since the ASG was described
+    # has its launch listed again by the next poll, as that goes back a little before the watermark.
+    instance_ids = {instance["InstanceId"] for instance in asg["Instances"]}
+    activity_times = [activity["StartTime"] for activity in scaling_activities] + ([watermark] if watermark else [])
+    monitor_state.update(
+        _monitor_state(
+            resolved_asg_name,
+            {instance_id: t for instance_id, t in last_launch_times.items() if instance_id in instance_ids},
+            max(activity_times, default=None),
+            _in_progress_since(scaling_activities),
+        )
+    )
+    activity_seconds = next_poll.learn_durations(
+        _restore_activity_seconds(monitor_state), scaling_activities + earlier_activities
+    )
+    monitor_state["activity_seconds"] = activity_seconds
+    monitor_state["next_poll_seconds"] = next_poll.estimate_next_poll_seconds(
+        scaling_activities, activity_seconds, DEFAULT_POLL_SECONDS, MAX_POLL_SECONDS
+    )
+
+    if not last_launch_times:
+        logger.warning(f"No 'launching' scaling activities found on the asg: {resolved_asg_name}")
         return False
 
-    return check_instances(asg, launching_activities)
+    return check_instances(asg, last_launch_times, _launch_window_minutes(asg, launch_window_minutes))
 
 
-def check_instances(asg: Dict, launching_activities: List[dict]) -> bool:
+def check_instances(
+    asg: Dict, last_launch_times: Dict[str, Any], launch_window_minutes: float = DEFAULT_LAUNCH_WINDOW_MINUTES
+) -> bool:
     # If all instances in the ASG are healthy, InService and launched at the same time, then recycling is done
-    last_launching_activity_times = []
-
     for instance in asg["Instances"]:
         instance_id = instance["InstanceId"]
         health_status = instance["HealthStatus"]
@@ -62,7 +134,11 @@ def check_instances(asg: Dict, launching_activities: List[dict]) -> bool:
             logger.info(f"auto-recycling is not complete because {instance_id} is not in a healthy state")
             return False
 
-        last_activity_time = _last_instance_activity_time(launching_activities, instance_id)
+    last_launching_activity_times = []
+
+    for instance in asg["Instances"]:
+        instance_id = instance["InstanceId"]
+        last_activity_time = last_launch_times.get(instance_id)
         if last_activity_time is None:
             logger.info(
                 f"auto-recycling is not complete because last_activity_time could not be determined for {instance_id}"
@@ -71,22 +147,39 @@ def check_instances(asg: Dict, launching_activities: List[dict]) -> bool:
 
         last_launching_activity_times.append(last_activity_time)
 
-    if not _compare_start_times(last_launching_activity_times, 2):
+    if not _compare_start_times(last_launching_activity_times, launch_window_minutes):
         logger.info(
-            "auto-recycling is not complete because the instances were not launched within 2 minutes of each other"
+            "auto-recycling is not complete because the instances were not launched within "
+            f"{launch_window_minutes} minutes of each other"
         )
         return False
 
     return True
 
 
-def _compare_start_times(last_launching_activity_times: List[Any], delta: int) -> bool:
-    for a, b in itertools.combinations(last_launching_activity_times, 2):
-        diff = timedelta(minutes=delta)
-        if a - b > diff or b - a > diff:
-            return False
-    else:
+def _compare_start_times(last_launching_activity_times: List[Any], delta: float) -> bool:
+    # Every pair of launches is within the window exactly when the earliest and the latest are
+    if not last_launching_activity_times:
         return True
+    return bool(max(last_launching_activity_times) - min(last_launching_activity_times) <= timedelta(minutes=delta))
+
+
+def _launch_window_minutes(asg: Dict, launch_window_minutes: Optional[Any]) -> float:
+    if launch_window_minutes is None:
+        launch_window_minutes = next(
+            (tag["Value"] for tag in asg.get("Tags", []) if tag["Key"] == LAUNCH_WINDOW_TAG), None
+        )
+    if launch_window_minutes is None:
+        return DEFAULT_LAUNCH_WINDOW_MINUTES
+
+    try:
+        minutes = float(launch_window_minutes)
+    except (TypeError, ValueError):
+        minutes = math.nan
+    if not (math.isfinite(minutes) and minutes >= 0):
+        logger.warning(f"Ignoring the launch window of {launch_window_minutes!r} minutes, it isn't a valid duration")
+        return DEFAULT_LAUNCH_WINDOW_MINUTES
+    return minutes
 
 
 def _monitor_autorecycle(event: Any) -> Any:
@@ -99,7 +192,7 @@ def _monitor_autorecycle(event: Any) -> Any:
 
     output["counter"] += 1
 
-    if output["counter"] > 20:
+    if _taking_too_long(output):
         output["message_content"]["color"] = "danger"
         output["message_content"]["text"] = "Autorecycling appears to be taking too long :scream: please investigate."
         output["channels"] = event["channels"]
@@ -107,13 +200,21 @@ def _monitor_autorecycle(event: Any) -> Any:
         output["recycle_success"] = False
         return output
 
+    output["next_poll_seconds"] = DEFAULT_POLL_SECONDS
     try:
-        if check(event["component"]):
+        if check(
+            event["component"],
+            event.get("auto_scaling_group_name"),
+            event.get("launch_window_minutes"),
+            _recycle_started_at(event),
+            output.setdefault("monitor_state", {}),
+        ):
             logger.info("All Instances in the ASG are Healthy and InService")
             output["message_content"]["text"] = "Autorecycling has successfully completed"
             output["recycle_success"] = True
         else:
             output["recycle_success"] = False
+        output["next_poll_seconds"] = output["monitor_state"].pop("next_poll_seconds", DEFAULT_POLL_SECONDS)
     except ScaledDownASGException:
         output["message_content"]["text"] = "The ASG is scaled down to 0 instances, auto-recycling is not required"
         output["recycle_success"] = True
@@ -121,17 +222,12 @@ def _monitor_autorecycle(event: Any) -> Any:
     return output
 
 
-def _describe_asg(component: str) -> Any:
-    asg_client = boto3.client("autoscaling", "eu-west-2", config=config)
-
-    auto_scaling_groups = []
-    for page in asg_client.get_paginator("describe_auto_scaling_groups").paginate(PaginationConfig={"PageSize": 100}):
-        auto_scaling_groups += page["AutoScalingGroups"]
-    groups = {"AutoScalingGroups": auto_scaling_groups}
+def _describe_asg(component: str, asg_name: Optional[str] = None) -> Any:
+    asg_client = aws_clients.get_client("autoscaling", "eu-west-2", config=config)
 
     logger.info("Finding a matching ASG for: {}".format(component))
 
-    lookup = [asg for asg in groups["AutoScalingGroups"] if asg["AutoScalingGroupName"].startswith(f"{component}-asg")]
+    lookup = _find_asgs(asg_client, component, asg_name)
 
     if lookup:
         logger.info("Found an ASG called: {}".format(lookup[0]["AutoScalingGroupName"]))
@@ -151,21 +247,147 @@ def _describe_asg(component: str) -> Any:
     raise Exception("No ASG found for {}".format(component))
 
 
-def _describe_scaling_activities(asg_name: str) -> Any:
-    asg_client = boto3.client("autoscaling", "eu-west-2", config=config)
-    response = asg_client.describe_scaling_activities(
-        AutoScalingGroupName=asg_name,
-        MaxRecords=20,
+def _find_asgs(asg_client: Any, component: str, asg_name: Optional[str]) -> List[Dict]:
+    # Try the cheap lookups first: the ASG name carried in the event, then a server side filter on the Name tag.
+    # Only when both miss (e.g. the ASG was replaced mid-recycle) do we fall back to listing every ASG in the region.
+    if asg_name:
+        response = asg_client.describe_auto_scaling_groups(AutoScalingGroupNames=[asg_name])
+        lookup = _matching_asgs(response["AutoScalingGroups"], component)
+        if lookup:
+            return lookup
+        logger.debug(f"The ASG {asg_name} from the event does not match {component}, searching by tag")
+
+    response = asg_client.describe_auto_scaling_groups(Filters=[{"Name": "tag:Name", "Values": [component]}])
+    lookup = _matching_asgs(response["AutoScalingGroups"], component)
+    if lookup:
+        return lookup
+    logger.debug(f"No ASG tagged with Name {component}, searching all ASGs")
+
+    return asg_inventory.find_by_prefix(asg_client, f"{component}-asg")
+
+
+def _matching_asgs(auto_scaling_groups: List[Dict], component: str) -> List[Dict]:
+    return [asg for asg in auto_scaling_groups if asg["AutoScalingGroupName"].startswith(f"{component}-asg")]
+
+
+def _describe_scaling_activities(
+    asg_name: str, since: Optional[datetime] = None, earlier_activities: Optional[List[Dict]] = None
+) -> Any:
+    """
+    Lists the scaling activities newer than since, a page at a time and only as far back as needed. Without a
+    time to go back to, only the latest page is listed. The older activities on the last page listed are added to
+    earlier_activities when given, as they come at no extra cost.
+    """
+    asg_client = aws_clients.get_client("autoscaling", "eu-west-2", config=config)
+
+    activities: List[Dict] = []
+    pagination: Dict[str, str] = {}
+    while True:
+        response = asg_client.describe_scaling_activities(
+            AutoScalingGroupName=asg_name, MaxRecords=SCALING_ACTIVITIES_PAGE_SIZE, **pagination
+        )
+        for index, activity in enumerate(response["Activities"]):
+            if since is not None and activity["StartTime"] < since:
+                if earlier_activities is not None:
+                    earlier_activities.extend(response["Activities"][index:])
+                return activities
+            activities.append(activity)
+
+        if since is None or "NextToken" not in response:
+            return activities
+        pagination = {"NextToken": response["NextToken"]}
+
+
+def _merge_launch_times(known_launch_times: Dict[str, Any], new_launch_times: Dict[str, Any]) -> Dict[str, Any]:
+    last_launch_times = dict(known_launch_times)
+    for instance_id, start_time in new_launch_times.items():
+        if instance_id not in last_launch_times or start_time > last_launch_times[instance_id]:
+            last_launch_times[instance_id] = start_time
+    return last_launch_times
+
+
+def _in_progress_since(scaling_activities: List[Dict]) -> Optional[datetime]:
+    return min(
+        (
+            activity["StartTime"]
+            for activity in scaling_activities
+            if activity.get("StatusCode") not in FINISHED_STATUS_CODES
+        ),
+        default=None,
     )
-    return response["Activities"]
+
+
+def _monitor_state(
+    asg_name: str,
+    last_launch_times: Dict[str, Any],
+    watermark: Optional[datetime],
+    in_progress_since: Optional[datetime] = None,
+) -> Dict:
+    return {
+        "auto_scaling_group_name": asg_name,
+        "watermark": watermark.isoformat() if watermark else None,
+        "in_progress_since": in_progress_since.isoformat() if in_progress_since else None,
+        "launch_times": {instance_id: start_time.isoformat() for instance_id, start_time in last_launch_times.items()},
+    }
+
+
+def _restore_monitor_state(
+    monitor_state: Dict, asg_name: str
+) -> Tuple[Dict[str, Any], Optional[datetime], Optional[datetime]]:
+    # What was learnt of another ASG, e.g. one replaced mid-recycle, says nothing about this one
+    if monitor_state.get("auto_scaling_group_name") != asg_name or not monitor_state.get("watermark"):
+        return {}, None, None
+    try:
+        in_progress_since = monitor_state.get("in_progress_since")
+        return (
+            {
+                instance_id: datetime.fromisoformat(start_time)
+                for instance_id, start_time in monitor_state["launch_times"].items()
+            },
+            datetime.fromisoformat(monitor_state["watermark"]),
+            datetime.fromisoformat(in_progress_since) if in_progress_since else None,
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        logger.warning("Ignoring the monitor state from the previous poll, it can't be read")
+        return {}, None, None
+
+
+def _restore_activity_seconds(monitor_state: Dict) -> Dict[str, float]:
+    try:
+        return {kind: float(seconds) for kind, seconds in monitor_state.get("activity_seconds", {}).items()}
+    except (AttributeError, TypeError, ValueError):
+        logger.warning("Ignoring the scaling activity durations from the previous poll, they can't be read")
+        return {}
+
+
+def _taking_too_long(output: Any) -> bool:
+    # Polls are as frequent as the recycle's progress suggests, so only their count says nothing of how long it has
+    # taken. It's all there is to go by for a recycle queued before its start time was recorded.
+    recycle_started_at = _recycle_started_at(output)
+    if recycle_started_at is None:
+        return bool(output["counter"] > MAX_POLLS)
+    return datetime.now(recycle_started_at.tzinfo) - recycle_started_at > MAX_RECYCLE_DURATION
+
+
+def _recycle_started_at(event: Any) -> Optional[datetime]:
+    if "recycle_started_at" not in event:
+        return None
+    try:
+        return datetime.fromisoformat(event["recycle_started_at"]) - RECYCLE_START_SLACK
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring the recycle start time {event['recycle_started_at']!r}, it isn't a valid time")
+        return None
 
 
 def _get_launching_activities(scaling_activities: Any) -> List[Dict]:
     return [activity for activity in scaling_activities if "Launching" in activity["Description"]]
 
 
-def _last_instance_activity_time(scaling_activities: List[Dict], instance_id: str) -> Any:
-    instance_activities = [activity for activity in scaling_activities if instance_id in activity["Description"]]
-
-    if instance_activities:
-        return sorted([activity["StartTime"] for activity in instance_activities])[-1]
+def _last_launch_times_by_instance(scaling_activities: List[Dict]) -> Dict[str, Any]:
+    # Parse the instance ids out of each activity once, rather than searching every activity for every instance
+    last_launch_times: Dict[str, Any] = {}
+    for activity in scaling_activities:
+        for instance_id in instance_id_matcher.findall(activity["Description"]):
+            if instance_id not in last_launch_times or activity["StartTime"] > last_launch_times[instance_id]:
+                last_launch_times[instance_id] = activity["StartTime"]
+    return last_launch_times
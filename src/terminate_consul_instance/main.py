@@ -1,11 +1,11 @@
 import os
 from typing import Any
 
-import boto3
+from src.autorecycle_common import aws_clients
 
 
 def lambda_handler(event: Any, context: Any) -> Any:
-    ec2 = boto3.client("ec2")
+    ec2 = aws_clients.get_client("ec2")
     environment = os.environ.get("environment")
     if environment == "integration":
         print("Lambda Event Payload:")
@@ -35,6 +35,17 @@ data "aws_iam_policy_document" "aws_autorecycle_autorecycle_lambda_policy" {
     resources = ["arn:aws:sqs:eu-west-2:${data.aws_caller_identity.current.account_id}:recycle-*"]
   }
 
+  statement {
+    effect = "Allow"
+
+    # Resolves the recycle queues up front, ListQueues can't be limited to particular queues
+    actions = [
+      "sqs:ListQueues",
+    ]
+
+    resources = ["*"]
+  }
+
 }
 
 resource "aws_iam_role_policy" "aws_autorecycle_autorecycle_lambda" {
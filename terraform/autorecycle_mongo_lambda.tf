@@ -8,6 +8,9 @@ module "autorecycle_mongo_lambda" {
     ENVIRONMENT = var.environment
     VAULT_URL   = "https://vault.${var.environment}.mdtp:8200"
     CA_CERT     = "src/mongo_recycler/mdtp.pem"
+
+    MONGO_MAX_REPLICATION_LAG_SECONDS = var.mongo_max_replication_lag_seconds
+    MONGO_SURGE_REPLACEMENT           = var.mongo_surge_replacement ? "true" : "false"
   }
   enable_error_alarm                      = true
   error_alarm_runbook                     = local.lambda_error_runbook_url
@@ -66,6 +69,25 @@ data "aws_iam_policy_document" "autorecycle_mongo_lambda_policy" {
 
 
 
+  statement {
+    effect = "Allow"
+
+    actions = [
+      "autoscaling:TerminateInstanceInAutoScalingGroup",
+    ]
+
+    resources = ["*"] #tfsec:ignore:aws-iam-no-policy-wildcards
+
+    condition {
+      test     = "StringLike"
+      variable = "autoscaling:ResourceTag/Name"
+
+      values = [
+        "*_mongo*",
+      ]
+    }
+  }
+
   statement {
     effect = "Allow"
 
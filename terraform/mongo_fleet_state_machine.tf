@@ -0,0 +1,190 @@
+module "autorecycle_mongo_fleet_lambda" {
+  source = "git::ssh://git@github.com/hmrc/infrastructure-pipeline-lambda-build//terraform/modules/aws-lambda-container?depth=1"
+
+  account_engineering_boundary = var.account_engineering_boundary
+  environment                  = var.environment
+  environment_variables = {
+    ENVIRONMENT = var.environment
+  }
+  enable_error_alarm                      = true
+  error_alarm_runbook                     = local.lambda_error_runbook_url
+  error_alarm_actions                     = [data.aws_sns_topic.pagerduty_connector_noncritical.arn]
+  function_name                           = "aws-autorecycle-mongo-fleet-lambda"
+  image_command                           = ["mongo_recycler.process.fleet.lambda_handler"]
+  image_uri                               = "419929493928.dkr.ecr.eu-west-2.amazonaws.com/aws-autorecycle:${var.image_tag}"
+  lambda_git_repo                         = local.lambda_git_repo
+  log_subscription_filter_destination_arn = var.log_subscription_filter_destination_arn
+  memory_size                             = 128
+  timeout                                 = 60
+}
+
+resource "aws_lambda_function_event_invoke_config" "autorecycle_mongo_fleet_lambda" {
+  function_name                = module.autorecycle_mongo_fleet_lambda.lambda_name
+  maximum_event_age_in_seconds = 300
+  maximum_retry_attempts       = 0
+}
+
+# Recycles several mongo replica sets at once by running the autorecycle state machine for each of them. Each
+# replica set is still recycled one node at a time, MaxConcurrency only bounds how many sets are in progress.
+resource "aws_sfn_state_machine" "mongo_fleet_recycle" {
+  name     = "autorecycle_mongo_fleet"
+  role_arn = aws_iam_role.step_machine.arn
+
+  definition = <<EOF
+{
+  "StartAt": "Plan replica sets",
+  "States": {
+    "Plan replica sets": {
+      "Comment": "Picks one component per replica set from $.components",
+      "Type": "Task",
+      "Resource": "${module.autorecycle_mongo_fleet_lambda.lambda_alias_arn}",
+      "ResultPath": "$.plan",
+      "TimeoutSeconds": 60,
+      "Retry": [ {
+         "ErrorEquals": [ "Lambda.ServiceException", "Lambda.SdkClientException" ],
+         "IntervalSeconds": 1,
+         "MaxAttempts": 8,
+         "BackoffRate": 2
+      } ],
+      "Next": "Recycle replica sets"
+    },
+    "Recycle replica sets": {
+      "Type": "Map",
+      "ItemsPath": "$.plan.replica_sets",
+      "MaxConcurrency": ${var.mongo_fleet_max_concurrency},
+      "ResultPath": "$.results",
+      "Iterator": {
+        "StartAt": "Recycle replica set",
+        "States": {
+          "Recycle replica set": {
+            "Comment": "Runs the mongo strategy of the autorecycle state machine to completion",
+            "Type": "Task",
+            "Resource": "arn:aws:states:::states:startExecution.sync:2",
+            "Parameters": {
+              "StateMachineArn": "${aws_sfn_state_machine.auto_recycle.arn}",
+              "Input": {
+                "component.$": "$.component",
+                "strategy.$": "$.strategy",
+                "AWS_STEP_FUNCTIONS_STARTED_BY_EXECUTION_ID.$": "$$.Execution.Id"
+              }
+            },
+            "ResultSelector": {
+              "status.$": "$.Status"
+            },
+            "ResultPath": "$.execution",
+            "Catch": [ {
+              "ErrorEquals": [ "States.ALL" ],
+              "ResultPath": "$.error-info",
+              "Next": "Replica set failed"
+            } ],
+            "End": true
+          },
+          "Replica set failed": {
+            "Comment": "Records the failure so the other replica sets carry on",
+            "Type": "Pass",
+            "Result": {
+              "status": "FAILED"
+            },
+            "ResultPath": "$.execution",
+            "End": true
+          }
+        }
+      },
+      "Next": "Summarise fleet recycle"
+    },
+    "Summarise fleet recycle": {
+      "Type": "Task",
+      "Resource": "${module.autorecycle_mongo_fleet_lambda.lambda_alias_arn}",
+      "Parameters": {
+        "results.$": "$.results"
+      },
+      "ResultPath": "$.summary",
+      "TimeoutSeconds": 60,
+      "Retry": [ {
+         "ErrorEquals": [ "Lambda.ServiceException", "Lambda.SdkClientException" ],
+         "IntervalSeconds": 1,
+         "MaxAttempts": 8,
+         "BackoffRate": 2
+      } ],
+      "Next": "Slack message - fleet summary"
+    },
+    "Slack message - fleet summary": {
+      "Comment": "Send message in slack",
+      "Type": "Task",
+      "Resource": "${var.slack_notifications_lambda}",
+      "Parameters": {
+        "username": "AutoRecycling",
+        "channels": [
+          "${var.slack_channel}"
+        ],
+        "text": "Mongo fleet recycle",
+        "message_content.$": "$.summary.message_content",
+        "emoji": ":robot_face:"
+      },
+      "ResultPath": null,
+      "TimeoutSeconds": 300,
+      "HeartbeatSeconds": 60,
+      "Catch": [ {
+        "ErrorEquals": [ "States.ALL" ],
+        "Next": "Fleet status",
+        "ResultPath": "$.error-info"
+      } ],
+      "Next": "Fleet status"
+    },
+    "Fleet status": {
+      "Type": "Choice",
+      "Choices": [
+        {
+          "Variable": "$.summary.status",
+          "StringEquals": "fail",
+          "Next": "Fleet recycle failed"
+        }
+      ],
+      "Default": "Fleet recycle succeeded"
+    },
+    "Fleet recycle failed": {
+      "Type": "Fail",
+      "Cause": "At least one replica set failed to recycle",
+      "Error": "Fail"
+    },
+    "Fleet recycle succeeded": {
+      "Type": "Succeed"
+    }
+  }
+}
+EOF
+}
+
+data "aws_iam_policy_document" "allow_step_function_to_run_autorecycle" {
+  statement {
+    actions = [
+      "states:StartExecution",
+    ]
+    effect    = "Allow"
+    resources = [aws_sfn_state_machine.auto_recycle.arn]
+  }
+
+  statement {
+    actions = [
+      "states:DescribeExecution",
+      "states:StopExecution",
+    ]
+    effect    = "Allow"
+    resources = ["arn:aws:states:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:execution:${aws_sfn_state_machine.auto_recycle.name}:*"]
+  }
+
+  statement {
+    actions = [
+      "events:PutTargets",
+      "events:PutRule",
+      "events:DescribeRule",
+    ]
+    effect    = "Allow"
+    resources = ["arn:aws:events:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:rule/StepFunctionsGetEventsForStepFunctionsExecutionRule"]
+  }
+}
+
+resource "aws_iam_role_policy" "allow_step_function_to_run_autorecycle" {
+  policy = data.aws_iam_policy_document.allow_step_function_to_run_autorecycle.json
+  role   = aws_iam_role.step_machine.name
+}
@@ -57,7 +57,7 @@ resource "aws_sfn_state_machine" "auto_recycle" {
           "Next": "Slack message - single instance ASG"
         }
       ],
-      "Default": "Wait for single instance ASG autorecycle"
+      "Default": "Wait for next single instance ASG poll"
     },
     "Slack message - single instance ASG": {
       "Comment": "Send message in slack",
@@ -78,6 +78,12 @@ resource "aws_sfn_state_machine" "auto_recycle" {
       "Seconds": 60,
       "Next": "Is Autorecycling single instance ASG Done?"
     },
+    "Wait for next single instance ASG poll": {
+      "Comment": "Waits for as long as the last poll expects the scaling activity to take",
+      "Type": "Wait",
+      "SecondsPath": "$.next_poll_seconds",
+      "Next": "Is Autorecycling single instance ASG Done?"
+    },
     "Is Autorecycling single instance ASG Done?": {
       "Comment": "Evaluates if all instances are recycled",
       "Type": "Choice",
@@ -135,9 +141,9 @@ resource "aws_sfn_state_machine" "auto_recycle" {
       } ]
     },
     "Wait for autorecycle": {
-      "Comment": "Waits for recycle to happen",
+      "Comment": "Waits for as long as the monitor expects the scaling activities in progress to take",
       "Type": "Wait",
-      "Seconds": 360,
+      "SecondsPath": "$.next_poll_seconds",
       "Next": "Monitor autorecycling"
     },
     "Wait for commencement": {
@@ -185,8 +191,10 @@ resource "aws_sfn_state_machine" "auto_recycle" {
           "Next": "Slack Message - end"
         },
         {
-          "Variable": "$.counter",
-          "NumericGreaterThan": 20,
+          "And": [
+            { "Variable": "$.status", "IsPresent": true },
+            { "Variable": "$.status", "StringEquals": "fail" }
+          ],
           "Next": "Slack Message - end"
         }
       ],
@@ -257,6 +265,11 @@ resource "aws_sfn_state_machine" "auto_recycle" {
           "StringEquals": "RECYCLE_SECONDARY",
           "Next": "Wait for Mongo autorecycle"
         },
+        {
+          "Variable": "$.decision.action",
+          "StringEquals": "RESUME",
+          "Next": "Wait for Mongo autorecycle"
+        },
         {
           "Variable": "$.decision.action",
           "StringEquals": "DONE",
@@ -703,7 +716,8 @@ data "aws_iam_policy_document" "allow_step_function_to_invoke_lambdas" {
       module.autorecycle_lambda.lambda_alias_arn,
       var.autorecycle_mongo_lambda_vpc_id != null ? module.autorecycle_mongo_lambda[0].lambda_alias_arn : null,
       module.monitor_autorecycle_lambda.lambda_alias_arn,
-      module.autorecycle_scale_asg_lambda.lambda_alias_arn
+      module.autorecycle_scale_asg_lambda.lambda_alias_arn,
+      module.autorecycle_mongo_fleet_lambda.lambda_alias_arn
     ])
   }
 }
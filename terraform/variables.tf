@@ -96,3 +96,21 @@ variable "consul_acl_token_parameter_arn" {
   type        = string
   default     = ""
 }
+
+variable "mongo_fleet_max_concurrency" {
+  description = "How many mongo replica sets the fleet recycle state machine recycles at the same time"
+  type        = number
+  default     = 3
+}
+
+variable "mongo_surge_replacement" {
+  description = "Terminate mongo instances through their ASG so the replacement is launched straight away"
+  type        = bool
+  default     = false
+}
+
+variable "mongo_max_replication_lag_seconds" {
+  description = "How far behind the primary a mongo secondary can be for the replica set to count as healthy, -1 to not check"
+  type        = number
+  default     = 30
+}
@@ -0,0 +1,11 @@
+import pytest
+from src.autorecycle_common import asg_inventory, aws_clients, queue_registry
+
+
+@pytest.fixture(autouse=True)
+def reset_warm_invocation_caches():
+    # Module level caches outlive a Lambda invocation by design, so make sure they don't outlive a test
+    asg_inventory.invalidate()
+    aws_clients.clear()
+    queue_registry.invalidate()
+    yield
@@ -12,6 +12,14 @@ boto3_session = boto3.Session(aws_access_key_id="abcd", aws_secret_access_key="d
 lambda_client: LambdaClient = boto3_session.client("lambda", endpoint_url=f"http://lambda:8080")
 
 
-def test_lambda_returns_200():
-    result = lambda_client.invoke(FunctionName="function", Payload=json.dumps({}))
+def test_lambda_runs_without_a_function_error():
+    # A recycle that has already been polled too often is reported on without calling AWS, so the handler runs to
+    # completion and any failure to import the lambda's modules shows up as a FunctionError
+    event = {"component": "integration-test", "counter": 20, "channels": "team-infra-alerts"}
+
+    result = lambda_client.invoke(FunctionName="function", Payload=json.dumps(event))
+
+    payload = json.loads(result["Payload"].read())
     assert result["StatusCode"] == 200
+    assert "FunctionError" not in result, payload
+    assert payload["recycle_success"] is False
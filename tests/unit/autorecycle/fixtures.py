@@ -0,0 +1,4 @@
+def with_recycle_queues(mock_client, *queue_names):
+    mock_client.return_value.get_paginator.return_value.paginate.return_value = [
+        {"QueueUrls": ["https://sqs.eu-west-2.amazonaws.com/617311445223/{}".format(name) for name in queue_names]}
+    ]
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import Mock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_sqs
+from src.autorecycle import autorecycle_lambda
+from src.autorecycle.autorecycle_lambda import lambda_handler, send_batch, send_batch_to_sqs, send_to_queue
+from tests.unit.autorecycle.fixtures import with_recycle_queues
+
+
+class TestSendBatchToSqs(unittest.TestCase):
+    def setUp(self):
+        self.account_id = "123456789012"
+        self.channel = "foo"
+
+    @mock_sqs
+    def test_each_component_is_sent_to_its_own_queue(self):
+        sqs = boto3.resource("sqs", region_name="eu-west-2")
+        queues = {component: sqs.create_queue(QueueName=f"recycle-{component}") for component in ["a", "b"]}
+
+        results = send_batch_to_sqs(["a", "b", "a"], self.account_id, self.channel)
+
+        self.assertEqual([result["component"] for result in results], ["a", "b", "a"])
+        self.assertEqual([result["status"] for result in results], ["success"] * 3)
+        self.assertEqual(len(queues["a"].receive_messages(MaxNumberOfMessages=10)), 2)
+        self.assertEqual(queues["b"].receive_messages(MessageAttributeNames=["All"])[0].body, "Recycle b")
+
+    @mock_sqs
+    def test_components_without_a_queue_fail_on_their_own(self):
+        boto3.resource("sqs", region_name="eu-west-2").create_queue(QueueName="recycle-a")
+
+        results = send_batch_to_sqs(["a", "missing"], self.account_id, self.channel)
+
+        self.assertEqual([result["status"] for result in results], ["success", "failure"])
+        self.assertEqual(results[1]["channels"], "team-infra-alerts")
+
+    @patch("boto3.client")
+    def test_queues_with_more_than_a_batch_of_components_are_sent_in_several_batches(self, mock_client):
+        with_recycle_queues(mock_client, "recycle-a")
+        mock_client.return_value.send_message_batch.side_effect = lambda QueueUrl, Entries: {
+            "Successful": [{"Id": entry["Id"]} for entry in Entries]
+        }
+
+        results = send_batch_to_sqs(["a"] * 12, self.account_id, self.channel)
+
+        self.assertEqual(
+            [len(call.kwargs["Entries"]) for call in mock_client.return_value.send_message_batch.call_args_list],
+            [10, 2],
+        )
+        self.assertEqual({result["status"] for result in results}, {"success"})
+
+    @patch("src.autorecycle.autorecycle_lambda.send_batch_to_sqs")
+    def test_lambda_handler_sends_a_list_of_components_as_a_batch(self, mock_send_batch_to_sqs):
+        mock_send_batch_to_sqs.return_value = [{"status": "success"}]
+        event = {"components": ["a"], "account_id": self.account_id, "success_channel": self.channel}
+
+        result = lambda_handler(event, None)
+
+        self.assertEqual(result["results"][0]["status"], "success")
+        self.assertIn("recycle_started_at", result["results"][0])
+        mock_send_batch_to_sqs.assert_called_with(["a"], self.account_id, self.channel)
+
+
+@patch("time.sleep")
+class TestSendBatch(unittest.TestCase):
+    def entries(self, *ids):
+        return [{"Id": entry_id, "MessageBody": "Recycle a"} for entry_id in ids]
+
+    def test_entries_failed_by_sqs_are_sent_again(self, _):
+        sqs = Mock()
+        sqs.send_message_batch.side_effect = [
+            {"Successful": [{"Id": "0"}], "Failed": [{"Id": "1", "SenderFault": False, "Code": "InternalError"}]},
+            {"Successful": [{"Id": "1"}]},
+        ]
+
+        self.assertEqual(send_batch(sqs, "queue", self.entries("0", "1")), {"0", "1"})
+        self.assertEqual(sqs.send_message_batch.call_args.kwargs["Entries"], self.entries("1"))
+
+    def test_entries_failed_by_the_request_are_not_sent_again(self, _):
+        sqs = Mock()
+        sqs.send_message_batch.return_value = {
+            "Successful": [{"Id": "0"}],
+            "Failed": [{"Id": "1", "SenderFault": True, "Code": "InvalidParameterValue"}],
+        }
+
+        self.assertEqual(send_batch(sqs, "queue", self.entries("0", "1")), {"0"})
+        sqs.send_message_batch.assert_called_once()
+
+    def test_gives_up_on_entries_after_the_last_attempt(self, _):
+        sqs = Mock()
+        sqs.send_message_batch.return_value = {"Failed": [{"Id": "0", "SenderFault": False, "Code": "InternalError"}]}
+
+        self.assertEqual(send_batch(sqs, "queue", self.entries("0")), set())
+        self.assertEqual(sqs.send_message_batch.call_count, autorecycle_lambda.MAX_BATCH_ATTEMPTS)
+
+    def test_entries_sent_before_a_retry_raises_are_still_reported_as_sent(self, _):
+        sqs = Mock()
+        sqs.send_message_batch.side_effect = [
+            {"Successful": [{"Id": "0"}], "Failed": [{"Id": "1", "SenderFault": False, "Code": "InternalError"}]},
+            ClientError({"Error": {"Code": "ServiceUnavailable"}}, "SendMessageBatch"),
+        ]
+
+        self.assertEqual(send_to_queue(sqs, "queue", self.entries("0", "1")), {"0"})
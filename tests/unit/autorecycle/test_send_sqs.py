@@ -1,10 +1,12 @@
 import unittest
+from datetime import datetime, timezone
 
 import boto3
 from botocore.exceptions import ClientError
 from unittest.mock import patch
 from moto import mock_sqs
-from src.autorecycle.autorecycle_lambda import send_to_sqs
+from src.autorecycle.autorecycle_lambda import lambda_handler, send_to_sqs
+from tests.unit.autorecycle.fixtures import with_recycle_queues
 
 
 class TestAutoRecycle(unittest.TestCase):
@@ -48,8 +50,8 @@ class TestAutoRecycle(unittest.TestCase):
         message = send_to_sqs(self.component, self.account_id, self.channel)
         self.assertEqual(message, expected_result)
 
-    @patch("src.autorecycle.autorecycle_lambda.boto3")
-    def test_send_sqs_message_sqs_error(self, mock_boto3):
+    @patch("boto3.client")
+    def test_send_sqs_message_sqs_error(self, mock_client):
         """
         When the client makes a bad request it should result in a failure message
         """
@@ -59,12 +61,13 @@ class TestAutoRecycle(unittest.TestCase):
             color="danger",
             status="failure",
         )
-        mock_boto3.client.return_value.send_message.side_effect = ClientError({}, {})
+        with_recycle_queues(mock_client, "recycle-test")
+        mock_client.return_value.send_message.side_effect = ClientError({}, {})
         message = send_to_sqs(self.component, self.account_id, self.channel)
         self.assertEqual(message, expected_result)
 
-    @patch("src.autorecycle.autorecycle_lambda.boto3")
-    def test_send_sqs_message_sqs_bad_response(self, mock_boto3):
+    @patch("boto3.client")
+    def test_send_sqs_message_sqs_bad_response(self, mock_client):
         """
         When the response from SQS is missing the MessageId it should result in a failure message
         """
@@ -74,12 +77,13 @@ class TestAutoRecycle(unittest.TestCase):
             color="danger",
             status="failure",
         )
-        mock_boto3.client.return_value.send_message.return_value = {}
+        with_recycle_queues(mock_client, "recycle-test")
+        mock_client.return_value.send_message.return_value = {}
         message = send_to_sqs(self.component, self.account_id, self.channel)
         self.assertEqual(message, expected_result)
 
-    @patch("src.autorecycle.autorecycle_lambda.boto3")
-    def test_send_sqs_message_sqs_unknown_exception(self, mock_boto3):
+    @patch("boto3.client")
+    def test_send_sqs_message_sqs_unknown_exception(self, mock_client):
         """
         When an unknown exception occurs a failure message should be sent
         """
@@ -89,6 +93,54 @@ class TestAutoRecycle(unittest.TestCase):
             color="danger",
             status="failure",
         )
-        mock_boto3.client.return_value.send_message.side_effect = Exception("test exception")
+        with_recycle_queues(mock_client, "recycle-test")
+        mock_client.return_value.send_message.side_effect = Exception("test exception")
         message = send_to_sqs(self.component, self.account_id, self.channel)
         self.assertEqual(message, expected_result)
+
+    @patch("src.autorecycle.autorecycle_lambda.send_to_sqs")
+    def test_lambda_handler_passes_the_asg_name_on_to_the_monitor(self, mock_send_to_sqs):
+        mock_send_to_sqs.return_value = {"status": "success"}
+        event = {
+            "component": self.component,
+            "account_id": self.account_id,
+            "success_channel": self.channel,
+            "auto_scaling_group_name": "test-asg-123",
+        }
+        result = lambda_handler(event, None)
+        mock_send_to_sqs.assert_called_with(self.component, self.account_id, self.channel)
+        self.assertEqual(result["auto_scaling_group_name"], "test-asg-123")
+
+    @patch("src.autorecycle.autorecycle_lambda.send_to_sqs")
+    def test_lambda_handler_tells_the_monitor_when_the_recycle_started(self, mock_send_to_sqs):
+        mock_send_to_sqs.return_value = {"status": "success"}
+        event = {"component": self.component, "account_id": self.account_id, "success_channel": self.channel}
+
+        before = datetime.now(timezone.utc)
+        result = lambda_handler(event, None)
+
+        self.assertLessEqual(before, datetime.fromisoformat(result["recycle_started_at"]))
+
+    @patch("boto3.client")
+    def test_send_sqs_message_fails_fast_for_a_component_without_a_queue(self, mock_client):
+        with_recycle_queues(mock_client, "recycle-other")
+
+        message = send_to_sqs(self.component, self.account_id, self.channel)
+
+        self.assertEqual(message["status"], "failure")
+        mock_client.return_value.send_message.assert_not_called()
+
+    @patch("boto3.client")
+    def test_send_sqs_message_falls_back_to_the_queue_url_when_queues_cannot_be_listed(self, mock_client):
+        mock_client.return_value.get_paginator.return_value.paginate.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied"}}, "ListQueues"
+        )
+        mock_client.return_value.send_message.return_value = {"MessageId": "1"}
+
+        message = send_to_sqs(self.component, self.account_id, self.channel)
+
+        self.assertEqual(message["status"], "success")
+        self.assertEqual(
+            mock_client.return_value.send_message.call_args.kwargs["QueueUrl"],
+            "https://sqs.eu-west-2.amazonaws.com/617311445223/recycle-test",
+        )
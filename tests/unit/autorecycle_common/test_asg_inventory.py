@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+
+from src.autorecycle_common import asg_inventory
+from src.autorecycle_common.asg_inventory import AsgInventory
+from tests.unit.monitor_autorecycle.fixtures import CountingAutoScalingClient, synthetic_asgs
+
+
+def asg(name, name_tag=None):
+    return {
+        "AutoScalingGroupName": name,
+        "Instances": [],
+        "Tags": [{"Key": "Name", "Value": name_tag}] if name_tag else [],
+    }
+
+
+class TestAsgInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = AsgInventory(
+            [
+                asg("sensu_proxy-asg-123", "sensu_proxy"),
+                asg("sensu-asg-00340a9d51ccc10d09cc6a6197", "sensu"),
+                asg("tel-sensu-proxy"),
+                asg("test_component_b-asg-20181112132421997300000010", "test_component_b"),
+                asg("test_component_a-asg-20181112132421997300000010", "test_component_a"),
+                asg("test_component-asg-20181112132421997300000010", "test_component"),
+                asg("sensu-asg-00340a9d51ccc10d09cc6a6197", "duplicate"),
+            ]
+        )
+
+    def test_names_with_prefix(self):
+        self.assertEqual(self.inventory.names_with_prefix("sensu-asg"), ["sensu-asg-00340a9d51ccc10d09cc6a6197"])
+        self.assertEqual(
+            self.inventory.names_with_prefix("sensu"),
+            ["sensu_proxy-asg-123", "sensu-asg-00340a9d51ccc10d09cc6a6197"],
+        )
+        self.assertEqual(self.inventory.names_with_prefix("zzz"), [])
+
+    def test_names_for_component_without_az_suffix(self):
+        self.assertEqual(
+            self.inventory.names_for_component("test_component"),
+            ["test_component-asg-20181112132421997300000010"],
+        )
+
+    def test_names_for_component_with_az_suffix_matches_every_az_in_listing_order(self):
+        self.assertEqual(
+            self.inventory.names_for_component("test_component_a"),
+            [
+                "test_component_b-asg-20181112132421997300000010",
+                "test_component_a-asg-20181112132421997300000010",
+            ],
+        )
+
+    def test_names_with_name_tag(self):
+        self.assertEqual(self.inventory.names_with_name_tag("sensu"), ["sensu-asg-00340a9d51ccc10d09cc6a6197"])
+        self.assertEqual(self.inventory.names_with_name_tag("duplicate"), [])
+        self.assertEqual(self.inventory.names_with_name_tag("unknown"), [])
+
+
+class TestFind(unittest.TestCase):
+    def setUp(self):
+        self.groups = synthetic_asgs(1000)
+        self.client = CountingAutoScalingClient(self.groups)
+
+    def test_first_lookup_lists_every_asg(self):
+        result = asg_inventory.find_by_component(self.client, "component_42")
+
+        self.assertEqual([group["AutoScalingGroupName"] for group in result], ["component_42-asg-000042"])
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 10)
+
+    def test_warm_lookup_only_describes_the_matching_asgs(self):
+        asg_inventory.find_by_component(self.client, "component_42")
+        self.client.calls.clear()
+        self.groups[42]["Instances"] = [{"InstanceId": "i-1"}]
+
+        result = asg_inventory.find_by_name_tag(self.client, "component_42")
+
+        self.assertEqual(result[0]["Instances"], [{"InstanceId": "i-1"}])
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1)
+
+    def test_warm_lookup_lists_again_when_a_known_asg_has_gone(self):
+        asg_inventory.find_by_prefix(self.client, "component_42-asg")
+        self.client.calls.clear()
+        self.groups[42] = {**self.groups[42], "AutoScalingGroupName": "component_42-asg-replaced"}
+
+        result = asg_inventory.find_by_prefix(self.client, "component_42-asg")
+
+        self.assertEqual([group["AutoScalingGroupName"] for group in result], ["component_42-asg-replaced"])
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1 + 10)
+
+    def test_warm_lookup_lists_again_when_nothing_matches(self):
+        asg_inventory.find_by_prefix(self.client, "component_42-asg")
+        self.client.calls.clear()
+
+        self.assertEqual(asg_inventory.find_by_prefix(self.client, "new_component-asg"), [])
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 10)
+
+    def test_lookup_lists_again_once_the_inventory_expires(self):
+        with patch("time.monotonic", return_value=0):
+            asg_inventory.find_by_prefix(self.client, "component_42-asg")
+        self.client.calls.clear()
+
+        with patch("time.monotonic", return_value=asg_inventory.DEFAULT_TTL_SECONDS + 1):
+            asg_inventory.find_by_prefix(self.client, "component_42-asg")
+
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 10)
@@ -0,0 +1,56 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from botocore.config import Config
+from src.autorecycle_common import aws_clients
+
+
+class TestGetClient(unittest.TestCase):
+    @patch("boto3.client")
+    def test_clients_are_reused(self, mock_client):
+        first = aws_clients.get_client("ec2", "eu-west-2")
+        second = aws_clients.get_client("ec2", "eu-west-2")
+
+        self.assertIs(first, second)
+        mock_client.assert_called_once_with("ec2", region_name="eu-west-2", config=None)
+
+    @patch("boto3.client")
+    def test_clients_are_keyed_by_service_region_and_config(self, mock_client):
+        config = Config(retries={"max_attempts": 60, "mode": "standard"})
+
+        aws_clients.get_client("ec2", "eu-west-2")
+        aws_clients.get_client("ec2", "eu-west-1")
+        aws_clients.get_client("autoscaling", "eu-west-2")
+        aws_clients.get_client("autoscaling", "eu-west-2", config)
+        aws_clients.get_client("autoscaling", "eu-west-2", config)
+
+        self.assertEqual(mock_client.call_count, 4)
+
+    @patch("boto3.client")
+    def test_clear_forgets_clients(self, mock_client):
+        aws_clients.get_client("sqs")
+        aws_clients.clear()
+        aws_clients.get_client("sqs")
+
+        self.assertEqual(mock_client.call_count, 2)
+
+    @patch("boto3.client")
+    def test_a_client_is_only_created_once_when_requested_concurrently(self, mock_client):
+        threads = [threading.Thread(target=aws_clients.get_client, args=("autoscaling", "eu-west-2")) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_client.assert_called_once()
+
+
+class TestGetResource(unittest.TestCase):
+    @patch("boto3.resource")
+    def test_resources_are_reused(self, mock_resource):
+        first = aws_clients.get_resource("dynamodb", region_name="eu-west-2")
+        second = aws_clients.get_resource("dynamodb", region_name="eu-west-2")
+
+        self.assertIs(first, second)
+        mock_resource.assert_called_once_with("dynamodb", region_name="eu-west-2", config=None)
@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from src.autorecycle_common import next_poll
+from src.autorecycle_common.next_poll import MIN_POLL_SECONDS
+
+
+def activity(kind, started_seconds_ago, progress=100, took_seconds=None, status_code="Successful"):
+    start_time = datetime.now(timezone.utc) - timedelta(seconds=started_seconds_ago)
+    activity = {
+        "Description": f"{kind} a new EC2 instance: i-abc",
+        "Progress": progress,
+        "StartTime": start_time,
+        "StatusCode": status_code,
+    }
+    if took_seconds is not None:
+        activity["EndTime"] = start_time + timedelta(seconds=took_seconds)
+    return activity
+
+
+class LearnDurations(unittest.TestCase):
+    def test_the_latest_successful_activity_of_each_kind_is_learnt(self):
+        activities = [
+            activity("Launching", 100, progress=30, status_code="InProgress"),
+            activity("Terminating", 200, took_seconds=90),
+            activity("Launching", 400, took_seconds=240),
+            activity("Launching", 900, took_seconds=600),
+        ]
+
+        self.assertEqual(
+            next_poll.learn_durations({}, activities), {"Launching": 240.0, "Terminating": 90.0}
+        )
+
+    def test_failed_activities_are_not_learnt_from(self):
+        activities = [activity("Launching", 400, took_seconds=5, status_code="Failed")]
+
+        self.assertEqual(next_poll.learn_durations({"Launching": 240.0}, activities), {"Launching": 240.0})
+
+    def test_the_durations_passed_in_are_left_alone(self):
+        durations = {"Launching": 600.0}
+
+        next_poll.learn_durations(durations, [activity("Launching", 400, took_seconds=240)])
+
+        self.assertEqual(durations, {"Launching": 600.0})
+
+
+class EstimateNextPollSeconds(unittest.TestCase):
+    def estimate(self, activities, durations=None):
+        return next_poll.estimate_next_poll_seconds(activities, durations or {}, 360, 360)
+
+    def test_polls_again_soon_with_nothing_in_progress(self):
+        self.assertEqual(self.estimate([activity("Launching", 400, took_seconds=240)]), MIN_POLL_SECONDS)
+
+    def test_waits_for_what_is_left_of_the_last_activity_of_the_same_kind(self):
+        estimate = self.estimate([activity("Launching", 60, progress=30)], {"Launching": 240.0})
+
+        self.assertAlmostEqual(estimate, 180, delta=2)
+
+    def test_waits_for_the_slowest_activity_in_progress(self):
+        activities = [activity("Terminating", 10, progress=30), activity("Launching", 60, progress=30)]
+
+        estimate = self.estimate(activities, {"Launching": 240.0, "Terminating": 60.0})
+
+        self.assertAlmostEqual(estimate, 180, delta=2)
+
+    def test_extrapolates_from_the_progress_without_a_previous_activity(self):
+        self.assertAlmostEqual(self.estimate([activity("Launching", 60, progress=50)]), 60, delta=2)
+
+    def test_falls_back_to_the_default_with_nothing_to_go_by(self):
+        self.assertEqual(self.estimate([activity("Launching", 60, progress=0)]), 360)
+
+    def test_an_activity_overrunning_its_estimate_is_polled_again_soon(self):
+        estimate = self.estimate([activity("Launching", 600, progress=30)], {"Launching": 240.0})
+
+        self.assertEqual(estimate, MIN_POLL_SECONDS)
+
+    def test_the_estimate_is_bounded(self):
+        estimate = self.estimate([activity("Launching", 60, progress=30)], {"Launching": 3600.0})
+
+        self.assertEqual(estimate, 360)
+
+    def test_naive_start_times_are_compared_with_local_time(self):
+        in_progress = activity("Launching", 60, progress=30)
+        in_progress["StartTime"] = datetime.now() - timedelta(seconds=60)
+
+        self.assertAlmostEqual(self.estimate([in_progress], {"Launching": 240.0}), 180, delta=2)
@@ -0,0 +1,77 @@
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.autorecycle_common import queue_registry
+from src.autorecycle_common.queue_registry import UnknownQueue
+
+
+class CountingSqsClient:
+    meta = SimpleNamespace(region_name="eu-west-2")
+
+    def __init__(self, queue_names):
+        self.queue_names = queue_names
+        self.calls = Counter()
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "list_queues"
+        client = self
+
+        class Paginator:
+            def paginate(self, QueueNamePrefix, **kwargs):
+                client.calls["ListQueues"] += 1
+                yield {
+                    "QueueUrls": [
+                        f"https://sqs.eu-west-2.amazonaws.com/123456789012/{name}"
+                        for name in client.queue_names
+                        if name.startswith(QueueNamePrefix)
+                    ]
+                }
+
+        return Paginator()
+
+
+class TestFindUrl(unittest.TestCase):
+    def setUp(self):
+        self.client = CountingSqsClient(["recycle-sensu", "recycle-public_mongo", "other-queue"])
+
+    def test_queues_are_listed_once_across_lookups(self):
+        self.assertEqual(
+            queue_registry.find_url(self.client, "recycle-sensu"),
+            "https://sqs.eu-west-2.amazonaws.com/123456789012/recycle-sensu",
+        )
+        queue_registry.find_url(self.client, "recycle-public_mongo")
+
+        self.assertEqual(self.client.calls["ListQueues"], 1)
+
+    def test_unknown_queues_fail_without_listing_again_straight_away(self):
+        queue_registry.find_url(self.client, "recycle-sensu")
+
+        for queue_name in ["recycle-unknown", "other-queue", "recycle-unknown"]:
+            with self.assertRaises(UnknownQueue):
+                queue_registry.find_url(self.client, queue_name)
+
+        self.assertEqual(self.client.calls["ListQueues"], 1)
+
+    def test_unknown_queues_are_listed_again_once_the_listing_is_a_little_old(self):
+        with patch("time.monotonic", return_value=0):
+            queue_registry.find_url(self.client, "recycle-sensu")
+        self.client.queue_names.append("recycle-new")
+
+        with patch("time.monotonic", return_value=queue_registry.RELIST_AFTER_SECONDS + 1):
+            self.assertTrue(queue_registry.find_url(self.client, "recycle-new").endswith("/recycle-new"))
+            queue_registry.find_url(self.client, "recycle-sensu")
+
+        self.assertEqual(self.client.calls["ListQueues"], 2)
+
+    def test_queues_are_listed_again_once_the_registry_expires(self):
+        with patch("time.monotonic", return_value=0):
+            queue_registry.find_url(self.client, "recycle-sensu")
+        self.client.queue_names.remove("recycle-sensu")
+
+        with patch("time.monotonic", return_value=queue_registry.DEFAULT_TTL_SECONDS + 1):
+            with self.assertRaises(UnknownQueue):
+                queue_registry.find_url(self.client, "recycle-sensu")
+
+        self.assertEqual(self.client.calls["ListQueues"], 2)
@@ -33,7 +33,7 @@ class TestGetAutorecyclingTags(unittest.TestCase):
 
         get_autorecycling_tags(asg_name)
 
-        mock_client.assert_called_with("autoscaling", "eu-west-2")
+        mock_client.assert_called_with("autoscaling", region_name="eu-west-2", config=None)
         self.assertEqual(len(mock_client.mock_calls), 2)
         self.assertEqual(mock_client.mock_calls[1][0], "().describe_tags")
         self.assertEqual(mock_client.mock_calls[1][2], expected_filters)
@@ -198,6 +198,7 @@ class TestRecycling(unittest.TestCase):
                 text="*thecomponent*",
                 emoji=":robot_face:",
                 monitoring_slack_channel="monitoring_slack_channel",
+                next_poll_seconds=60,
                 notify_pager_duty=True,
                 team="telemetry",
             ),
@@ -255,6 +256,7 @@ class TestRecycling(unittest.TestCase):
                 },
                 text=f"*thecomponent*",
                 emoji=":robot_face:",
+                next_poll_seconds=60,
             ),
             output,
         )
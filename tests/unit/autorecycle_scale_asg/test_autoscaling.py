@@ -1,10 +1,16 @@
 import json
 import os
+import threading
+import time
 import unittest
 
 from unittest.mock import patch
 from src.autorecycle_scale_asg import autoscaling
-from src.autorecycle_scale_asg.autoscaling import describe_asg, describe_scaling_activities
+from src.autorecycle_scale_asg.autoscaling import (
+    describe_asg,
+    describe_latest_scaling_activities,
+    describe_scaling_activities,
+)
 
 
 def load_json(name):
@@ -149,3 +155,44 @@ class Test_AutoScaling(unittest.TestCase):
         mock_asg_client().describe_scaling_activities.return_value = response
         test_response = describe_scaling_activities(asg_name)
         self.assertEqual(test_response["Description"], "Terminating EC2 instance: i-0123456789")
+
+    @patch("boto3.client")
+    def test_describe_latest_scaling_activities_keeps_the_order_of_the_asgs(self, mock_asg_client):
+        asg_names = ["kubernetes-etcd_a-asg-1", "kubernetes-etcd_b-asg-1", "kubernetes-etcd_c-asg-1"]
+
+        def describe(AutoScalingGroupName, MaxRecords):
+            # Make the first ASG the slowest to answer
+            time.sleep(0.05 * (len(asg_names) - asg_names.index(AutoScalingGroupName)))
+            return {"Activities": [{"ActivityId": AutoScalingGroupName}]}
+
+        mock_asg_client().describe_scaling_activities.side_effect = describe
+        mock_asg_client.reset_mock()
+
+        result = describe_latest_scaling_activities(asg_names)
+
+        self.assertEqual(list(result), asg_names)
+        self.assertEqual([activity["ActivityId"] for activity in result.values()], asg_names)
+        mock_asg_client.assert_called_once_with("autoscaling", region_name="eu-west-2", config=None)
+
+    @patch("boto3.client")
+    def test_describe_latest_scaling_activities_bounds_concurrency(self, mock_asg_client):
+        asg_names = [f"component_{i}-asg-1" for i in range(8)]
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def describe(AutoScalingGroupName, MaxRecords):
+            with lock:
+                in_flight.append(AutoScalingGroupName)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(AutoScalingGroupName)
+            return {"Activities": [{"ActivityId": AutoScalingGroupName}]}
+
+        mock_asg_client().describe_scaling_activities.side_effect = describe
+
+        result = describe_latest_scaling_activities(asg_names)
+
+        self.assertEqual(list(result), asg_names)
+        self.assertEqual(max(peak), autoscaling.MAX_CONCURRENT_ACTIVITY_REQUESTS)
@@ -1,7 +1,9 @@
 import logging
 import unittest
+from datetime import datetime, timedelta, timezone
 
 from unittest.mock import patch, MagicMock
+from src.autorecycle_scale_asg.autorecycle import NextAsgAction
 from src.autorecycle_scale_asg.handler import lambda_handler
 from src.autorecycle_scale_asg.lambda_types import Event
 from tests.unit.autorecycle_scale_asg.fixtures import lambda_context
@@ -68,3 +70,57 @@ class TestMain(unittest.TestCase):
         self.assertEqual(result["pager_duty_event_type"], "trigger")
         self.assertEqual(result["exception"], "MockException()")
         self.assertEqual(result["status"], "fail")
+
+
+def scaling_activity(kind, started_seconds_ago, progress=100, took_seconds=None):
+    start_time = datetime.now(timezone.utc) - timedelta(seconds=started_seconds_ago)
+    activity = {
+        "Description": f"{kind} a new EC2 instance: i-abc",
+        "Progress": progress,
+        "StartTime": start_time,
+        "StatusCode": "Successful" if progress == 100 else "InProgress",
+    }
+    if took_seconds is not None:
+        activity["EndTime"] = start_time + timedelta(seconds=took_seconds)
+    return activity
+
+
+@patch("src.autorecycle_scale_asg.autoscaling.describe_asg", return_value=[{"AutoScalingGroupName": "sensu-asg"}])
+class NextPoll(unittest.TestCase):
+    def handle(self, latest_activity, activity_seconds=None):
+        event = Event(
+            component="sensu", counter=5, success_channel="telemetry_success", activity_seconds=activity_seconds
+        )
+        with patch(
+            "src.autorecycle_scale_asg.autoscaling.describe_latest_scaling_activities",
+            return_value={"sensu-asg": latest_activity},
+        ), patch(
+            "src.autorecycle_scale_asg.autorecycle.get_next_asg_action",
+            return_value=NextAsgAction(asg_name="sensu-asg", action="out"),
+        ), patch(
+            "src.autorecycle_scale_asg.autoscaling.execute_scaling_policy"
+        ):
+            return lambda_handler(event, lambda_context())
+
+    def test_waits_for_what_is_left_of_the_activity_in_progress(self, describe_asg):
+        result = self.handle(scaling_activity("Launching", 60, progress=30), {"Launching": 240.0})
+
+        self.assertAlmostEqual(result["next_poll_seconds"], 180, delta=2)
+        self.assertEqual(result["activity_seconds"], {"Launching": 240.0})
+
+    def test_waits_as_long_as_the_last_activity_the_policy_starts_took(self, describe_asg):
+        result = self.handle(scaling_activity("Terminating", 600, took_seconds=90), {"Launching": 240.0})
+
+        self.assertEqual(result["next_poll_seconds"], 240)
+        self.assertEqual(result["activity_seconds"], {"Launching": 240.0, "Terminating": 90.0})
+
+    def test_waits_no_less_than_the_fixed_wait_it_used_to_make(self, describe_asg):
+        result = self.handle(scaling_activity("Terminating", 600, took_seconds=90))
+
+        self.assertEqual(result["next_poll_seconds"], 60)
+
+    def test_the_last_poll_still_says_when_to_poll(self, describe_asg):
+        event = Event(component="sensu", counter=60, success_channel="event-test-recycle")
+        result = lambda_handler(event, lambda_context())
+
+        self.assertEqual(result["next_poll_seconds"], 60)
@@ -13,6 +13,7 @@ reservations = {
                     "ImageId": "ami-e6618481",
                     "InstanceId": "i-084d2313533e254c0",
                     "State": {"Name": "running"},
+                    "Placement": {"AvailabilityZone": "eu-west-2a"},
                     "NetworkInterfaces": [
                         {
                             "Attachment": {"DeleteOnTermination": False},
@@ -28,6 +29,7 @@ reservations = {
                     "ImageId": "ami-e6618482",
                     "InstanceId": "i-084d2313533e254c1",
                     "State": {"Name": "running"},
+                    "Placement": {"AvailabilityZone": "eu-west-2b"},
                     "NetworkInterfaces": [
                         {
                             "Attachment": {"DeleteOnTermination": False},
@@ -126,11 +128,13 @@ def test_describe_mongodb_instances():
             "InstanceId": "i-084d2313533e254c0",
             "ImageId": "ami-e6618481",
             "IpAddress": "172.26.24.21",
+            "AvailabilityZone": "eu-west-2a",
         },
         {
             "InstanceId": "i-084d2313533e254c1",
             "ImageId": "ami-e6618482",
             "IpAddress": "172.26.24.31",
+            "AvailabilityZone": "eu-west-2b",
         },
     ]
 
@@ -152,6 +156,7 @@ def test_describe_mongodb_instances_filters_out_non_running_instances():
             "InstanceId": "i-084d2313533e254c0",
             "ImageId": "ami-e6618481",
             "IpAddress": "172.26.24.21",
+            "AvailabilityZone": None,
         }
     ]
 
@@ -272,7 +277,7 @@ def test_get_mongodb_instances_returns_a_filtered_summary_of_mongodb_instances_z
 
     assert list(result) == list(expected_result)
 
-    mock_client.assert_called_with("ec2", region_name="eu-west-2")
+    mock_client.assert_called_with("ec2", region_name="eu-west-2", config=None)
     mock_client().describe_instances.assert_called_with(Filters=expected_filters)
 
 
@@ -298,7 +303,7 @@ def test_get_mongodb_instances_returns_a_filtered_summary_of_mongodb_instances_z
 
     assert list(result) == list(expected_result)
 
-    mock_client.assert_called_with("ec2", region_name="eu-west-2")
+    mock_client.assert_called_with("ec2", region_name="eu-west-2", config=None)
     mock_client().describe_instances.assert_called_with(Filters=expected_filters)
 
 
@@ -340,8 +345,8 @@ def test_get_launch_template_image_ids_with_found_templates_returns_list_of_imag
     }
 
     mock_describe_launch_template_versions = MagicMock()
-    mock_describe_launch_template_versions.return_value = {
-        "LaunchTemplateVersions": [{"LaunchTemplateData": {"ImageId": "ami-006b1a02425203dfe"}}]
+    mock_describe_launch_template_versions.side_effect = lambda LaunchTemplateId, Versions: {
+        "LaunchTemplateVersions": [latest_launch_template_version(LaunchTemplateId, 5, "ami-006b1a02425203dfe")]
     }
 
     mock_client().describe_launch_templates = mock_describe_launch_templates
@@ -356,20 +361,64 @@ def test_get_launch_template_image_ids_with_found_templates_returns_list_of_imag
         "ami-006b1a02425203dfe",
     ]
 
-    mock_client.assert_called_with("ec2", region_name="eu-west-2")
+    mock_client.assert_called_with("ec2", region_name="eu-west-2", config=None)
     mock_describe_launch_templates.assert_called_with(
         Filters=[{"Name": "launch-template-name", "Values": ["public_mongo*"]}]
     )
 
+    # Each template is described by its id, rather than listing the latest version of every template in the account
+    assert mock_describe_launch_template_versions.call_count == 3
     mock_describe_launch_template_versions.assert_has_calls(
         [
-            call(LaunchTemplateId="lt-0cf12daa1c8798ef7", Versions=["5"]),
-            call(LaunchTemplateId="lt-03c416e9d886757f9", Versions=["5"]),
-            call(LaunchTemplateId="lt-0176365d6f06cc351", Versions=["5"]),
-        ]
+            call(LaunchTemplateId="lt-0176365d6f06cc351", Versions=["$Latest"]),
+            call(LaunchTemplateId="lt-03c416e9d886757f9", Versions=["$Latest"]),
+            call(LaunchTemplateId="lt-0cf12daa1c8798ef7", Versions=["$Latest"]),
+        ],
+        any_order=True,
     )
 
 
+def latest_launch_template_version(launch_template_id, version, image_id):
+    return {
+        "LaunchTemplateId": launch_template_id,
+        "VersionNumber": version,
+        "LaunchTemplateData": {"ImageId": image_id},
+    }
+
+
+def launch_template(launch_template_id, latest_version):
+    return {"LaunchTemplateId": launch_template_id, "LatestVersionNumber": latest_version}
+
+
+@patch("boto3.client")
+def test_get_launch_template_image_ids_reuses_known_versions_and_looks_up_changed_ones(mock_client):
+    mock_client().describe_launch_templates.return_value = {
+        "LaunchTemplates": [launch_template("lt-a", 5), launch_template("lt-b", 6)]
+    }
+    mock_client().describe_launch_template_versions.return_value = {
+        "LaunchTemplateVersions": [latest_launch_template_version("lt-b", 6, "ami-2")]
+    }
+    known_image_ids = {"lt-a": {"version": 5, "image_id": "ami-1"}, "lt-b": {"version": 5, "image_id": "ami-1"}}
+
+    result = aws.AWS("public_mongo").get_launch_template_image_ids(known_image_ids)
+
+    assert result == ["ami-1", "ami-2"]
+    assert known_image_ids["lt-b"] == {"version": 6, "image_id": "ami-2"}
+    mock_client().describe_launch_template_versions.assert_called_once_with(
+        LaunchTemplateId="lt-b", Versions=["$Latest"]
+    )
+
+
+@patch("boto3.client")
+def test_get_launch_template_image_ids_skips_the_version_lookup_when_nothing_changed(mock_client):
+    mock_client().describe_launch_templates.return_value = {"LaunchTemplates": [launch_template("lt-a", 5)]}
+
+    result = aws.AWS("public_mongo").get_launch_template_image_ids({"lt-a": {"version": 5, "image_id": "ami-1"}})
+
+    assert result == ["ami-1"]
+    mock_client().describe_launch_template_versions.assert_not_called()
+
+
 @patch("boto3.client")
 def test_get_launch_template_image_ids_with_no_found_templates_returns_empty_list(
     mock_client,
@@ -395,25 +444,25 @@ class BotoError(ClientError):
 
 
 @patch("boto3.resource")
-def test_recycle_instance_throws_if_instance_cant_be_found(mock_resource):
+def test_terminate_instance_throws_if_instance_cant_be_found(mock_resource):
     client = aws.AWS("protected")
     mock_resource().instances.filter.side_effect = BotoError()
 
     with pytest.raises(aws.NoInstancesFound):
-        client.recycle_instance(create_primary_1("ami-123"))
+        client.terminate_instance(create_primary_1("ami-123"))
 
 
 @patch("boto3.resource")
-def test_recycle_instance_throws_if_more_than_one_instance_found(mock_resource):
+def test_terminate_instance_throws_if_more_than_one_instance_found(mock_resource):
     client = aws.AWS("protected")
     mock_resource().instances.filter().all.return_value = iter(["instance-1", "instance-2"])
 
     with pytest.raises(aws.TooManyInstancesFound):
-        client.recycle_instance(create_primary_1("ami-123"))
+        client.terminate_instance(create_primary_1("ami-123"))
 
 
 @patch("boto3.resource")
-def test_recycle_instance_throws_if_instance_cant_be_terminated_for_any_reason(
+def test_terminate_instance_throws_if_instance_cant_be_terminated_for_any_reason(
     mock_resource,
 ):
     client = aws.AWS("protected")
@@ -423,20 +472,99 @@ def test_recycle_instance_throws_if_instance_cant_be_terminated_for_any_reason(
     mock_instance.terminate.side_effect = Exception
 
     with pytest.raises(Exception):
-        client.recycle_instance(create_primary_1("ami-123"))
+        client.terminate_instance(create_primary_1("ami-123"))
 
 
-@patch("src.mongo_recycler.connectors.aws.poll")
 @patch("boto3.resource")
-def test_recycle_instance_terminates_instance_if_it_can_be_found_and_polls_until_dead(mock_resource, mock_poll):
+def test_terminate_instance_terminates_instance_if_it_can_be_found(mock_resource):
     client = aws.AWS("protected")
 
     mock_instance = Mock()
     mock_resource().instances.filter().all.return_value = iter([mock_instance])
     mock_instance.terminate.return_value = {}
 
-    client.recycle_instance(create_primary_1("ami-123"))
+    client.terminate_instance(create_primary_1("ami-123"))
 
-    mock_resource.assert_called_with("ec2", region_name="eu-west-2")
+    mock_resource.assert_called_with("ec2", region_name="eu-west-2", config=None)
     mock_resource().instances.filter.assert_called_with(InstanceIds=["i-084d2313533e254c0"])
+    mock_instance.terminate.assert_called_once_with()
+
+
+@patch("src.mongo_recycler.connectors.aws.poll")
+def test_wait_until_terminated_polls_until_dead(mock_poll):
+    client = aws.AWS("protected")
+
+    client.wait_until_terminated("i-084d2313533e254c0")
+
     assert mock_poll.call_count == 1
+    assert mock_poll.call_args.kwargs["deadline_seconds"] == aws.TERMINATION_DEADLINE_SECONDS
+
+
+@patch("boto3.client")
+def test_get_mongodb_instances_is_cached_until_invalidated(mock_client):
+    mock_client().describe_instances.return_value = reservations
+    client = aws.AWS("protected_rate_mongo")
+
+    first = client.get_mongo_db_instances()
+    second = client.get_mongo_db_instances()
+    client.invalidate_mongo_db_instances()
+    client.get_mongo_db_instances()
+
+    assert first == second == list(aws.describe_mongodb_instances(reservations))
+    assert mock_client().describe_instances.call_count == 2
+
+
+@patch("boto3.client")
+@patch("boto3.resource")
+def test_terminate_instance_invalidates_the_cached_instances(mock_resource, mock_client):
+    mock_client().describe_instances.return_value = reservations
+    mock_resource().instances.filter().all.return_value = iter([Mock()])
+    client = aws.AWS("protected_rate_mongo")
+
+    client.get_mongo_db_instances()
+    client.terminate_instance(create_primary_1("ami-123"))
+    client.get_mongo_db_instances()
+
+    assert mock_client().describe_instances.call_count == 2
+
+
+@patch.dict("os.environ", {"MONGO_SURGE_REPLACEMENT": "true"})
+@patch("boto3.client")
+@patch("boto3.resource")
+def test_surge_terminates_through_the_asg_keeping_its_desired_capacity(mock_resource, mock_client):
+    client = aws.AWS("protected")
+
+    client.terminate_instance(create_primary_1("ami-123"))
+
+    mock_client().terminate_instance_in_auto_scaling_group.assert_called_once_with(
+        InstanceId="i-084d2313533e254c0", ShouldDecrementDesiredCapacity=False
+    )
+    mock_resource().instances.filter.assert_not_called()
+
+
+@patch.dict("os.environ", {"MONGO_SURGE_REPLACEMENT": "true"})
+@patch("boto3.client")
+@patch("boto3.resource")
+def test_surge_terminates_through_ec2_when_the_instance_is_not_in_an_asg(mock_resource, mock_client):
+    mock_client().terminate_instance_in_auto_scaling_group.side_effect = ClientError(
+        {"Error": {"Code": "ValidationError", "Message": "Instance Id not found"}},
+        "TerminateInstanceInAutoScalingGroup",
+    )
+    mock_instance = Mock()
+    mock_resource().instances.filter().all.return_value = iter([mock_instance])
+    client = aws.AWS("protected")
+
+    client.terminate_instance(create_primary_1("ami-123"))
+
+    mock_instance.terminate.assert_called_once()
+
+
+@patch("boto3.client")
+@patch("boto3.resource")
+def test_terminate_instance_does_not_go_through_the_asg_by_default(mock_resource, mock_client):
+    mock_resource().instances.filter().all.return_value = iter([Mock()])
+    client = aws.AWS("protected")
+
+    client.terminate_instance(create_primary_1("ami-123"))
+
+    mock_client().terminate_instance_in_auto_scaling_group.assert_not_called()
@@ -1,10 +1,12 @@
+import copy
 import json
 import ssl
 from unittest.mock import Mock, patch
 
 import pytest
 import src.mongo_recycler.connectors.mongo as mongo
-from pymongo.errors import AutoReconnect
+from pymongo.errors import AutoReconnect, ConnectionFailure
+from src.mongo_recycler.models.topology import ChainingState, MemberSettings
 from tenacity.wait import wait_none
 
 
@@ -135,7 +137,9 @@ def test_connect_retries(mock_mongo_client):
 
 @patch("src.mongo_recycler.connectors.mongo.Mongo._connect")
 def test_if_settings_match_there_is_no_reconfig(mock_mongo_client):
-    mock_mongo_client().admin.command.return_value = {"config": {"version": 1, "settings": {"chainingAllowed": True}}}
+    mock_mongo_client().admin.command.return_value = {
+        "config": {"version": 1, "members": [{"host": "10.0.0.1:27017"}], "settings": {"chainingAllowed": True}}
+    }
     mongo_instance = mongo.Mongo("test_cluster_mongo_a")
     config = mongo_instance.set_chaining("foo_connection_string", True)
     mock_mongo_client().admin.command.assert_called_once_with("replSetGetConfig")
@@ -144,9 +148,197 @@ def test_if_settings_match_there_is_no_reconfig(mock_mongo_client):
 
 @patch("src.mongo_recycler.connectors.mongo.Mongo._connect")
 def test_when_settings_change_there_is_a_reconfig(mock_mongo_client):
-    mock_mongo_client().admin.command.return_value = {"config": {"version": 1, "settings": {"chainingAllowed": True}}}
+    mock_mongo_client().admin.command.return_value = {
+        "config": {"version": 1, "members": [{"host": "10.0.0.1:27017"}], "settings": {"chainingAllowed": True}}
+    }
     mongo_instance = mongo.Mongo("test_cluster_mongo_a")
     config = mongo_instance.set_chaining("foo_connection_string", False)
     mock_mongo_client().admin.command.assert_called_with({"replSetReconfig": config})
     assert config["settings"]["chainingAllowed"] is False
     assert config["version"] == 2
+
+
+@patch("pymongo.MongoClient")
+def test_connections_are_reused_for_the_same_connection_string(mock_mongo_client):
+    instance_status = {"myState": 2, "ok": 1.0, "set": "int-protected-1"}
+    mock_mongo_client.return_value.admin.command.return_value = instance_status
+
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    mongo_instance.replica_set_status("1.1.1.1,2.2.2.2")
+    mongo_instance.replica_set_status("1.1.1.1,2.2.2.2")
+    mongo_instance.get_node_details("1.1.1.1")
+    mongo_instance.get_node_details("1.1.1.1")
+
+    assert mock_mongo_client.call_count == 2
+    mock_mongo_client.return_value.admin.command.assert_any_call("ping")
+
+
+@patch("pymongo.MongoClient")
+def test_unusable_cached_connections_are_replaced(mock_mongo_client):
+    broken_client = Mock()
+    new_client = Mock()
+    mock_mongo_client.side_effect = [broken_client, new_client]
+    broken_client.admin.command.side_effect = [{"ok": 1.0}, ConnectionFailure("gone")]
+    new_client.admin.command.return_value = {"ok": 1.0, "members": []}
+
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    mongo_instance._client("1.1.1.1")
+
+    assert mongo_instance.replica_set_status("1.1.1.1") == {"ok": 1.0, "members": []}
+    broken_client.close.assert_called_once()
+    assert mock_mongo_client.call_count == 2
+
+
+@patch("pymongo.MongoClient")
+def test_close_closes_every_cached_connection(mock_mongo_client):
+    clients = [Mock(), Mock()]
+    mock_mongo_client.side_effect = clients
+
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    mongo_instance._client("1.1.1.1")
+    mongo_instance._client("2.2.2.2")
+    mongo_instance.close()
+
+    for client in clients:
+        client.close.assert_called_once()
+    assert mongo_instance._clients == {}
+
+
+@patch("pymongo.MongoClient")
+def test_connections_made_after_close_are_closed_rather_than_cached(mock_mongo_client):
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    late_client = Mock()
+
+    def connect_while_closing(*args, **kwargs):
+        mongo_instance.close()
+        return late_client
+
+    mock_mongo_client.side_effect = connect_while_closing
+
+    with pytest.raises(mongo.MongoConnectorClosed):
+        mongo_instance._client("1.1.1.1")
+
+    late_client.close.assert_called_once()
+    assert mongo_instance._clients == {}
+
+
+@patch("pymongo.MongoClient")
+def test_no_new_connections_are_made_once_closed(mock_mongo_client):
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    mongo_instance.close()
+
+    with pytest.raises(mongo.MongoConnectorClosed):
+        mongo_instance.replica_set_status("1.1.1.1")
+
+    mock_mongo_client.assert_not_called()
+
+
+class CountingAdmin:
+    """
+    Answers admin commands for a three member replica set whose config is at the given version, counting them.
+    """
+
+    def __init__(self, config_version, chaining_allowed):
+        self.config = {
+            "version": config_version,
+            "members": [{"host": "10.0.0.1:27017"}, {"host": "10.0.0.2:27017", "priority": 0, "hidden": True}],
+            "settings": {"chainingAllowed": chaining_allowed},
+        }
+        self.commands = []
+
+    def command(self, command, *args):
+        name = command if isinstance(command, str) else next(iter(command))
+        self.commands.append(name)
+        if name == "replSetGetStatus":
+            return {
+                "set": "int-protected-1",
+                "members": [
+                    {"name": "10.0.0.1:27017", "self": True, "configVersion": self.config["version"]},
+                    {"name": "10.0.0.2:27017", "configVersion": self.config["version"]},
+                ],
+            }
+        if name == "replSetGetConfig":
+            return {"config": copy.deepcopy(self.config)}
+        if name == "replSetReconfig":
+            self.config = command["replSetReconfig"]
+            return {"ok": 1}
+        if name == "hello":
+            return {"setVersion": self.config["version"]}
+
+
+def mongo_connected_to(admin):
+    mongo_instance = mongo.Mongo("test_cluster_mongo_a")
+    mongo_instance._client = Mock(return_value=Mock(admin=admin))
+    return mongo_instance
+
+
+def test_chaining_is_only_read_and_reconfigured_by_the_first_step_of_a_recycle():
+    admin = CountingAdmin(config_version=1, chaining_allowed=True)
+    chaining_state = None
+
+    commands_per_step = []
+    for _ in range(3):
+        mongo_instance = mongo_connected_to(admin)
+        mongo_instance.chaining_state = chaining_state
+        admin.commands = []
+
+        mongo_instance.replica_set_status("10.0.0.1,10.0.0.2")
+        mongo_instance.set_chaining("10.0.0.1,10.0.0.2", False)
+
+        commands_per_step.append(admin.commands)
+        chaining_state = mongo_instance.chaining_state
+
+    assert commands_per_step == [
+        ["replSetGetStatus", "replSetGetConfig", "replSetReconfig"],
+        ["replSetGetStatus"],
+        ["replSetGetStatus"],
+    ]
+    assert chaining_state == ChainingState(False, 2)
+
+
+def test_known_chaining_state_is_verified_with_hello_without_a_replica_set_status():
+    admin = CountingAdmin(config_version=2, chaining_allowed=False)
+    mongo_instance = mongo_connected_to(admin)
+    mongo_instance.chaining_state = ChainingState(False, 2)
+
+    assert mongo_instance.set_chaining("10.0.0.1,10.0.0.2", False) is None
+    assert admin.commands == ["hello"]
+
+
+def test_known_chaining_state_is_ignored_once_the_config_has_changed():
+    admin = CountingAdmin(config_version=3, chaining_allowed=True)
+    mongo_instance = mongo_connected_to(admin)
+    mongo_instance.chaining_state = ChainingState(False, 2)
+
+    mongo_instance.replica_set_status("10.0.0.1,10.0.0.2")
+    mongo_instance.set_chaining("10.0.0.1,10.0.0.2", False)
+
+    assert admin.commands == ["replSetGetStatus", "replSetGetConfig", "replSetReconfig"]
+    assert mongo_instance.chaining_state == ChainingState(False, 4)
+
+
+def test_member_settings_are_read_from_the_config_that_chaining_then_reuses():
+    admin = CountingAdmin(config_version=1, chaining_allowed=True)
+    mongo_instance = mongo_connected_to(admin)
+
+    mongo_instance.replica_set_status("10.0.0.1,10.0.0.2")
+    member_settings = mongo_instance.replica_set_member_settings("10.0.0.1,10.0.0.2")
+    mongo_instance.set_chaining("10.0.0.1,10.0.0.2", False)
+
+    assert member_settings == {
+        "10.0.0.1": {"priority": 1, "votes": 1, "hidden": False, "secondary_delay_seconds": 0.0},
+        "10.0.0.2": {"priority": 0, "votes": 1, "hidden": True, "secondary_delay_seconds": 0.0},
+    }
+    assert admin.commands == ["replSetGetStatus", "replSetGetConfig", "replSetReconfig"]
+    assert mongo_instance.member_settings == MemberSettings(member_settings, 2)
+
+
+def test_known_member_settings_are_not_read_again_while_the_config_is_unchanged():
+    admin = CountingAdmin(config_version=2, chaining_allowed=False)
+    mongo_instance = mongo_connected_to(admin)
+    mongo_instance.member_settings = MemberSettings({"10.0.0.1": {"priority": 1, "votes": 1, "hidden": False}}, 2)
+
+    mongo_instance.replica_set_status("10.0.0.1,10.0.0.2")
+    mongo_instance.replica_set_member_settings("10.0.0.1,10.0.0.2")
+
+    assert admin.commands == ["replSetGetStatus"]
@@ -0,0 +1,74 @@
+from src.mongo_recycler.models import topology
+from src.mongo_recycler.models.topology import MemberSettings, Topology
+
+instances = [{"InstanceId": "i-1", "ImageId": "ami-1", "IpAddress": "10.0.0.1"}]
+
+
+def create_topology(**overrides):
+    return Topology(
+        **{
+            "target_ami": "ami-1",
+            "launch_template_images": {"lt-a": {"version": 5, "image_id": "ami-1"}},
+            "instances": instances,
+            "replica_set_name": "int-protected-1",
+            "chaining_allowed": False,
+            "config_version": 7,
+            **overrides,
+        }
+    )
+
+
+def test_topology_round_trips_through_the_event():
+    assert topology.from_event(topology.to_event(create_topology())) == create_topology()
+
+
+def test_from_event_ignores_an_incomplete_topology():
+    assert topology.from_event({}) is None
+    assert topology.from_event({"target_ami": "ami-1"}) is None
+
+
+def test_from_event_only_keeps_instances_with_a_config_version_to_check_them_against():
+    assert topology.from_event(topology.to_event(create_topology(config_version=None))).instances is None
+    assert topology.from_event(topology.to_event(create_topology(replica_set_name=None))).instances is None
+    assert topology.from_event(topology.to_event(create_topology(instances=[{"InstanceId": "i-1"}]))).instances is None
+    assert topology.from_event(topology.to_event(create_topology(instances=[]))).instances is None
+
+
+def test_config_version_is_read_from_the_member_answering():
+    replica_set_status = {
+        "members": [
+            {"name": "10.0.0.1:27017", "configVersion": 6},
+            {"name": "10.0.0.2:27017", "configVersion": 7, "self": True},
+        ]
+    }
+
+    assert topology.config_version(replica_set_status) == 7
+    assert topology.config_version({"members": []}) is None
+
+
+def test_member_settings_are_read_from_the_replica_set_config():
+    config = {
+        "version": 4,
+        "members": [
+            {"host": "10.0.0.1:27017", "priority": 2},
+            {"host": "10.0.0.2:27017", "priority": 0, "votes": 0, "hidden": True, "secondaryDelaySecs": 3600},
+            {"host": "10.0.0.3:27017", "priority": 0, "hidden": True, "slaveDelay": 1800},
+        ],
+    }
+
+    assert topology.member_settings_from_config(config) == MemberSettings(
+        {
+            "10.0.0.1": {"priority": 2, "votes": 1, "hidden": False, "secondary_delay_seconds": 0.0},
+            "10.0.0.2": {"priority": 0, "votes": 0, "hidden": True, "secondary_delay_seconds": 3600.0},
+            "10.0.0.3": {"priority": 0, "votes": 1, "hidden": True, "secondary_delay_seconds": 1800.0},
+        },
+        4,
+    )
+
+
+def test_member_settings_are_only_restored_with_a_config_version():
+    members = {"10.0.0.1": {"priority": 1, "votes": 1, "hidden": False}}
+
+    assert topology.member_settings(create_topology(member_settings=members)) == MemberSettings(members, 7)
+    assert topology.member_settings(create_topology(member_settings=members, config_version=None)) is None
+    assert topology.member_settings(create_topology()) is None
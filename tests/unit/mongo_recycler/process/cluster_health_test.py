@@ -1,12 +1,17 @@
-from unittest.mock import Mock
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
 
 import pytest
+from src.mongo_recycler.connectors.aws import AWS
 from src.mongo_recycler.process.replica_set_health import (
     NodeNotHealthy,
     PrimaryError,
     ReplicaSetHealth,
+    ReplicationLagging,
     SecondaryNotHealthy,
     assert_replica_set_healthy,
+    assert_replication_lag_within,
+    replication_lag_seconds,
 )
 
 
@@ -119,3 +124,175 @@ def test_assert_healthy():
         cluster_health.assert_healthy()
 
     mock_mongo().replica_set_status.assert_called_with("172.26.24.21,172.26.24.22")
+
+
+def running_instances(ip_addresses):
+    return [{"InstanceId": f"i-{index}", "ImageId": "ami-1", "IpAddress": ip} for index, ip in enumerate(ip_addresses)]
+
+
+def healthy_replica_set_status(ip_addresses):
+    states = ["PRIMARY"] + ["SECONDARY"] * (len(ip_addresses) - 1)
+    return create_replica_set_status(
+        [(f"{ip_address}:27017", state, "foo") for ip_address, state in zip(ip_addresses, states)]
+    )
+
+
+def test_assert_healthy_keeps_the_instances_while_they_match_the_members():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1", "10.0.0.2"])
+    mock_mongo.replica_set_status.return_value = healthy_replica_set_status(["10.0.0.1", "10.0.0.2"])
+
+    ReplicaSetHealth(mock_aws, mock_mongo).assert_healthy()
+
+    mock_aws.invalidate_mongo_db_instances.assert_not_called()
+
+
+def test_assert_healthy_discovers_the_instances_again_when_membership_changes():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1"])
+    mock_mongo.replica_set_status.return_value = healthy_replica_set_status(["10.0.0.1", "10.0.0.2"])
+
+    ReplicaSetHealth(mock_aws, mock_mongo).assert_healthy()
+
+    mock_aws.invalidate_mongo_db_instances.assert_called_once()
+
+
+def test_assert_healthy_discovers_the_instances_again_when_the_seed_list_fails():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1"])
+    mock_mongo.replica_set_status.side_effect = Exception("No servers found")
+
+    with pytest.raises(Exception):
+        ReplicaSetHealth(mock_aws, mock_mongo).assert_healthy()
+
+    mock_aws.invalidate_mongo_db_instances.assert_called_once()
+
+
+@patch("time.sleep")
+@patch("boto3.client")
+def test_waiting_for_health_only_describes_the_instances_once(mock_client, _):
+    mock_client().describe_instances.return_value = {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "InstanceId": f"i-{index}",
+                        "ImageId": "ami-1",
+                        "State": {"Name": "running"},
+                        "NetworkInterfaces": [
+                            {"PrivateIpAddress": ip_address, "Attachment": {"DeleteOnTermination": False}}
+                        ],
+                    }
+                    for index, ip_address in enumerate(["10.0.0.1", "10.0.0.2"])
+                ]
+            }
+        ]
+    }
+    mock_mongo = Mock()
+    unhealthy = create_replica_set_status([("10.0.0.1:27017", "PRIMARY", ""), ("10.0.0.2:27017", "STARTUP2", "")])
+    mock_mongo.replica_set_status.side_effect = [unhealthy] * 9 + [healthy_replica_set_status(["10.0.0.1", "10.0.0.2"])]
+
+    ReplicaSetHealth(AWS("protected_mongo"), mock_mongo).wait_until_cluster_healthy()
+
+    assert mock_mongo.replica_set_status.call_count == 10
+    assert mock_client().describe_instances.call_count == 1
+
+
+def members_with_lag(lags):
+    primary_optime = datetime(2024, 1, 1, 12, 0, 0)
+    members = [{"name": "10.0.0.1:27017", "stateStr": "PRIMARY", "optimeDate": primary_optime}]
+    members += [
+        {
+            "name": f"10.0.0.{index}:27017",
+            "stateStr": "SECONDARY",
+            "syncSourceHost": "10.0.0.1:27017",
+            "optimeDate": primary_optime - timedelta(seconds=lag),
+        }
+        for index, lag in enumerate(lags, start=2)
+    ]
+    return members + [{"name": "10.0.0.9:27017", "stateStr": "ARBITER"}]
+
+
+def test_replication_lag_is_measured_against_the_primary():
+    assert replication_lag_seconds(members_with_lag([0, 42.5])) == {"10.0.0.2:27017": 0, "10.0.0.3:27017": 42.5}
+
+
+def test_replication_lag_is_unknown_without_optimes():
+    assert replication_lag_seconds(create_replica_set_status(names_and_statuses)["members"]) == {}
+
+
+def test_assert_replication_lag_within_fails_for_a_lagging_secondary():
+    with pytest.raises(ReplicationLagging) as e_info:
+        assert_replication_lag_within(members_with_lag([1, 45]), max_lag_seconds=30)
+
+    assert str(e_info.value) == "10.0.0.3:27017 is 45s behind the primary, more than 30s"
+
+
+def test_assert_replication_lag_within_passes_under_the_threshold():
+    assert_replication_lag_within(members_with_lag([1, 29]), max_lag_seconds=30)
+
+
+def test_replication_lag_of_a_delayed_member_is_beyond_its_delay():
+    lag = replication_lag_seconds(members_with_lag([0, 3605]), secondary_delays={"10.0.0.3": 3600.0})
+
+    assert lag == {"10.0.0.2:27017": 0, "10.0.0.3:27017": 5}
+
+
+def test_assert_healthy_passes_with_a_delayed_member_behind_by_its_delay():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.9"])
+    mock_mongo.replica_set_status.return_value = {"members": members_with_lag([0, 3600])}
+    mock_mongo.replica_set_member_settings.return_value = {
+        "10.0.0.3": {"priority": 0, "votes": 0, "hidden": True, "secondary_delay_seconds": 3600.0}
+    }
+    cluster_health = ReplicaSetHealth(mock_aws, mock_mongo, max_replication_lag_seconds=30)
+
+    cluster_health.assert_healthy()
+    cluster_health.assert_healthy()
+
+    # The delays are kept once read, so later checks don't need the config
+    mock_mongo.replica_set_member_settings.assert_called_once()
+
+
+def test_assert_healthy_fails_with_a_delayed_member_lagging_beyond_its_delay():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.9"])
+    mock_mongo.replica_set_status.return_value = {"members": members_with_lag([0, 3700])}
+    mock_mongo.replica_set_member_settings.return_value = {"10.0.0.3": {"secondary_delay_seconds": 3600.0}}
+
+    with pytest.raises(ReplicationLagging) as e_info:
+        ReplicaSetHealth(mock_aws, mock_mongo, max_replication_lag_seconds=30).assert_healthy()
+
+    assert str(e_info.value) == "10.0.0.3:27017 is 100s behind the primary, more than 30s"
+
+
+@patch("time.sleep")
+def test_wait_until_cluster_healthy_waits_for_a_new_secondary_to_catch_up(_):
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.9"])
+    mock_mongo.replica_set_member_settings.return_value = {}
+    mock_mongo.replica_set_status.side_effect = [
+        {"members": members_with_lag([0, 600])},
+        {"members": members_with_lag([0, 120])},
+        {"members": members_with_lag([0, 2])},
+    ]
+
+    ReplicaSetHealth(mock_aws, mock_mongo, max_replication_lag_seconds=10).wait_until_cluster_healthy()
+
+    assert mock_mongo.replica_set_status.call_count == 3
+
+
+@patch.dict("os.environ", {"MONGO_MAX_REPLICATION_LAG_SECONDS": "-1"})
+def test_the_replication_lag_check_can_be_turned_off():
+    mock_aws = Mock()
+    mock_mongo = Mock()
+    mock_aws.get_mongo_db_instances.return_value = running_instances(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.9"])
+    mock_mongo.replica_set_status.return_value = {"members": members_with_lag([0, 600])}
+
+    ReplicaSetHealth(mock_aws, mock_mongo).assert_healthy()
@@ -25,7 +25,7 @@ def test_decision_if_there_are_no_out_of_date_nodes():
     assert action == done()
 
 
-def test_decision_only_arbiter_is_out_of_date():
+def test_decision_recycles_an_arbiter_that_is_the_only_member_out_of_date():
     target_ami_id = "ami-1"
     old_ami_id = "ami-2"
 
@@ -38,7 +38,7 @@ def test_decision_only_arbiter_is_out_of_date():
 
     action = decision.decide_on_action(replica_set_status, target_ami_id)
 
-    assert action == done()
+    assert action == recycle_secondary(arbiter_1)
 
 
 def test_decide_on_action_if_there_are_out_of_date_secondaries():
@@ -64,7 +64,7 @@ def test_decide_on_action_if_there_is_only_a_primary_left():
     primary_1 = create_primary_1(old_ami_id)
     secondary_1 = create_secondary_1(target_ami_id)
     secondary_2 = create_secondary_2(target_ami_id)
-    arbiter_1 = create_arbiter_1(old_ami_id)
+    arbiter_1 = create_arbiter_1(target_ami_id)
 
     replica_set_status = [primary_1, secondary_1, secondary_2, arbiter_1]
 
@@ -73,36 +73,36 @@ def test_decide_on_action_if_there_is_only_a_primary_left():
     assert action == step_down_and_recycle_primary(primary_1)
 
 
-def test_find_candidates():
+def test_decide_on_action_recycles_an_out_of_date_arbiter_but_ignores_nodes_in_awkward_states():
     target_ami = "ami-1"
     old_ami = "ami-2"
 
     instances = [
-        create_primary_1(old_ami),
+        create_primary_1(target_ami),
         create_secondary_1(target_ami),
-        create_secondary_2(old_ami),
+        create_arbiter_1(old_ami),
+        create_recovering_1(old_ami),
     ]
 
-    result = decision.find_candidates(instances, target_ami)
+    action = decision.decide_on_action(instances, target_ami)
 
-    assert result == [create_primary_1(old_ami), create_secondary_2(old_ami)]
+    assert action == recycle_secondary(create_arbiter_1(old_ami))
 
 
-def test_find_candidates_ignores_nodes_in_awkward_states():
+def test_decide_on_action_is_done_when_only_nodes_in_awkward_states_are_out_of_date():
     target_ami = "ami-1"
     old_ami = "ami-2"
 
     instances = [
-        create_primary_1(old_ami),
+        create_primary_1(target_ami),
         create_secondary_1(target_ami),
-        create_secondary_2(old_ami),
-        create_arbiter_1(old_ami),
+        create_arbiter_1(target_ami),
         create_recovering_1(old_ami),
     ]
 
-    result = decision.find_candidates(instances, target_ami)
+    action = decision.decide_on_action(instances, target_ami)
 
-    assert result == [create_primary_1(old_ami), create_secondary_2(old_ami)]
+    assert action == done()
 
 
 target_ami = "ami-1"
@@ -123,7 +123,7 @@ def test_report_cluster_status_shows_red_if_on_old_ami_primary_and_secondary():
     )
 
 
-def test_report_cluster_status_shows_yellow_for_non_candidates_no_matter_the_state():
+def test_report_cluster_status_shows_faint_for_non_candidates_no_matter_the_state_and_red_for_an_old_arbiter():
     arbiter_1 = create_arbiter_1(old_ami)
     recovering_1 = create_recovering_1(target_ami)
 
@@ -131,7 +131,7 @@ def test_report_cluster_status_shows_yellow_for_non_candidates_no_matter_the_sta
 
     assert decision.report_cluster_status(instances, target_ami) == "\n".join(
         [
-            faint("i-096c79792758d031f | ARBITER | 172.26.88.22 | ami-2"),
+            red("i-096c79792758d031f | ARBITER | 172.26.88.22 | ami-2"),
             faint("i-096c79792758d0345f | RECOVERING | 172.26.88.25 | ami-1"),
         ]
     )
@@ -167,3 +167,41 @@ def test_report_decision_done():
     expected_result = bold(green("DONE"))
     result = decision.report_outcome(done())
     assert expected_result == result
+
+
+def test_decide_on_action_recycles_non_voting_and_hidden_secondaries_first():
+    voting = create_secondary_1(old_ami)
+    hidden = create_secondary_2(old_ami)._replace(hidden=True, priority=0)
+    non_voting = create_recovering_1(old_ami)._replace(mongo_state="SECONDARY", votes=0, priority=0)
+
+    replica_set_status = [create_primary_1(old_ami), voting, hidden, non_voting]
+
+    assert decision.decide_on_action(replica_set_status, target_ami) == recycle_secondary(non_voting)
+    assert decision.decide_on_action(replica_set_status[:3], target_ami) == recycle_secondary(hidden)
+
+
+def test_decide_on_action_recycles_arbiters_after_every_secondary_but_before_the_primary():
+    voting = create_secondary_1(old_ami)
+    arbiter = create_arbiter_1(old_ami)._replace(priority=0)
+    primary = create_primary_1(old_ami)
+
+    assert decision.decide_on_action([primary, arbiter, voting], target_ami) == recycle_secondary(voting)
+    assert decision.decide_on_action([primary, arbiter], target_ami) == recycle_secondary(arbiter)
+
+
+def test_decide_on_action_prefers_the_least_electable_then_least_lagging_secondary():
+    electable = create_secondary_1(old_ami)._replace(priority=2)
+    lagging = create_secondary_2(old_ami)._replace(replication_lag_seconds=12.0)
+    caught_up = create_recovering_1(old_ami)._replace(mongo_state="SECONDARY", replication_lag_seconds=1.0)
+
+    replica_set_status = [create_primary_1(old_ami), electable, lagging, caught_up]
+
+    assert decision.decide_on_action(replica_set_status, target_ami) == recycle_secondary(caught_up)
+
+
+def test_decide_on_action_prefers_a_secondary_from_the_most_crowded_availability_zone():
+    alone = create_secondary_1(old_ami)._replace(availability_zone="eu-west-2a")
+    crowded = create_secondary_2(old_ami)._replace(availability_zone="eu-west-2b")
+    primary = create_primary_1(target_ami)._replace(availability_zone="eu-west-2b")
+
+    assert decision.decide_on_action([primary, alone, crowded], target_ami) == recycle_secondary(crowded)
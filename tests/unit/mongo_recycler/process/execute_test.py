@@ -1,4 +1,6 @@
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+
+import pytest
 
 import src.mongo_recycler.process.execute as execute
 from src.mongo_recycler.models.decision import done, recycle_secondary, step_down_and_recycle_primary
@@ -14,7 +16,8 @@ def test_execute_action_should_step_down_secondary(mock_replica_set_health, mock
 
     execute.execute_action(action, mock_aws(), mock_mongo(), mock_replica_set_health())
 
-    mock_aws().recycle_instance.assert_called_with(secondary_1)
+    mock_aws().terminate_instance.assert_called_with(secondary_1)
+    mock_aws().wait_until_terminated.assert_called_once()
     mock_replica_set_health().wait_until_cluster_healthy.assert_called_once()
 
 
@@ -30,7 +33,7 @@ def test_execute_action_should_step_down_primary_then_recycle(mock_replica_set_h
     mock_mongo().step_down.assert_called_with(primary_1.ip_address)
     mock_replica_set_health().wait_until_cluster_healthy.assert_called()
     assert mock_replica_set_health().wait_until_cluster_healthy.call_count == 2
-    mock_aws().recycle_instance.assert_called_with(primary_1)
+    mock_aws().terminate_instance.assert_called_with(primary_1)
 
 
 @patch("src.mongo_recycler.connectors.aws.AWS")
@@ -43,7 +46,7 @@ def test_execute_action_should_exit_immediately_if_done(mock_replica_set_health,
 
     mock_mongo().step_down.assert_not_called()
     mock_replica_set_health().wait_until_cluster_healthy.assert_not_called()
-    mock_aws().recycle_instance.assert_not_called()
+    mock_aws().terminate_instance.assert_not_called()
 
 
 @patch("src.mongo_recycler.connectors.aws.AWS")
@@ -97,3 +100,90 @@ def test_done_action_enables_chaining(mock_replica_set_health, mock_mongo, mock_
     ]
     execute.execute_action(action, mock_aws(), mock_mongo(), mock_replica_set_health())
     mock_mongo().set_chaining.assert_called_with("1,2,3", True)
+
+
+def budget_of(seconds):
+    budget = Mock()
+    budget.available_seconds.return_value = seconds
+    return budget
+
+
+@patch("src.mongo_recycler.connectors.aws.AWS")
+@patch("src.mongo_recycler.connectors.mongo.Mongo")
+@patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
+def test_execute_action_checkpoints_when_the_budget_runs_out_waiting_for_termination(
+    mock_replica_set_health, mock_mongo, mock_aws
+):
+    secondary_1 = create_secondary_1("ami-1")
+    mock_aws().wait_until_terminated.side_effect = AssertionError("instance is in state shutting-down")
+
+    with patch("time.time", return_value=1000), pytest.raises(execute.OutOfTime) as e_info:
+        execute.execute_action(
+            recycle_secondary(secondary_1), mock_aws(), mock_mongo(), mock_replica_set_health(), budget_of(30)
+        )
+
+    mock_aws().wait_until_terminated.assert_called_with(secondary_1.instance_id, 30)
+    mock_replica_set_health().wait_until_cluster_healthy.assert_not_called()
+    assert e_info.value.checkpoint() == {
+        "action": "RECYCLE_SECONDARY",
+        "instance": secondary_1._asdict(),
+        "phase": execute.TERMINATING,
+        "deadline_at": 1000 + execute.TERMINATION_DEADLINE_SECONDS,
+    }
+
+
+@patch("src.mongo_recycler.connectors.aws.AWS")
+@patch("src.mongo_recycler.connectors.mongo.Mongo")
+@patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
+def test_execute_action_raises_the_wait_error_once_the_deadline_passes(mock_replica_set_health, mock_mongo, mock_aws):
+    error = AssertionError("instance is in state shutting-down")
+    mock_aws().wait_until_terminated.side_effect = error
+
+    with pytest.raises(AssertionError) as e_info:
+        execute.execute_action(
+            recycle_secondary(create_secondary_1("ami-1")),
+            mock_aws(),
+            mock_mongo(),
+            mock_replica_set_health(),
+            budget_of(10000),
+        )
+
+    assert e_info.value == error
+
+
+@patch("src.mongo_recycler.connectors.aws.AWS")
+@patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
+def test_resume_action_from_termination_does_not_terminate_again(mock_replica_set_health, mock_aws):
+    primary_1 = create_primary_1("ami-1")
+    checkpoint = {
+        "action": "STEP_DOWN_AND_RECYCLE_PRIMARY",
+        "instance": primary_1._asdict(),
+        "phase": execute.TERMINATING,
+        "deadline_at": 1200,
+    }
+
+    with patch("time.time", return_value=1000):
+        decision = execute.resume_action(checkpoint, mock_aws(), mock_replica_set_health(), budget_of(None))
+
+    assert decision == step_down_and_recycle_primary(primary_1)
+    mock_aws().terminate_instance.assert_not_called()
+    mock_aws().wait_until_terminated.assert_called_with(primary_1.instance_id, 200)
+    mock_replica_set_health().wait_until_cluster_healthy.assert_called_once_with(execute.HEALTHY_DEADLINE_SECONDS)
+
+
+@patch("src.mongo_recycler.connectors.aws.AWS")
+@patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
+def test_resume_action_after_step_down_recycles_the_instance(mock_replica_set_health, mock_aws):
+    primary_1 = create_primary_1("ami-1")
+    checkpoint = {
+        "action": "STEP_DOWN_AND_RECYCLE_PRIMARY",
+        "instance": primary_1._asdict(),
+        "phase": execute.STEPPED_DOWN,
+        "deadline_at": 1200,
+    }
+
+    with patch("time.time", return_value=1000):
+        execute.resume_action(checkpoint, mock_aws(), mock_replica_set_health())
+
+    mock_aws().terminate_instance.assert_called_once_with(primary_1)
+    assert mock_replica_set_health().wait_until_cluster_healthy.call_count == 2
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from src.mongo_recycler.process.fleet import lambda_handler, plan, summarise
+
+
+def test_plan_keeps_one_component_per_replica_set_in_order():
+    components = ["public_mongo_b", "protected_mongo", "public_mongo_a", "protected_rate_mongo_c", "public_mongo_c"]
+
+    assert plan(components) == ["public_mongo_b", "protected_mongo", "protected_rate_mongo_c"]
+
+
+def test_summarise_counts_succeeded_and_failed_replica_sets():
+    results = [
+        {"component": "public_mongo", "execution": {"status": "SUCCEEDED"}},
+        {"component": "protected_mongo", "execution": {"status": "FAILED"}},
+        {"component": "protected_rate_mongo"},
+    ]
+
+    assert summarise(results) == {
+        "total": 3,
+        "succeeded": 1,
+        "failed": 2,
+        "failed_components": ["protected_mongo", "protected_rate_mongo"],
+    }
+
+
+@patch("src.mongo_recycler.process.fleet.json_logger_config")
+def test_lambda_handler_plans_the_replica_sets_to_recycle(_):
+    result = lambda_handler({"components": ["public_mongo_a", "public_mongo_b", "protected_mongo"]}, "_")
+
+    assert result == {
+        "replica_sets": [
+            {"component": "public_mongo_a", "strategy": "mongo"},
+            {"component": "protected_mongo", "strategy": "mongo"},
+        ]
+    }
+
+
+@patch("src.mongo_recycler.process.fleet.json_logger_config")
+def test_lambda_handler_summarises_the_results(_):
+    event = {
+        "replica_sets": [{"component": "public_mongo", "strategy": "mongo"}],
+        "results": [{"component": "public_mongo", "strategy": "mongo", "execution": {"status": "SUCCEEDED"}}],
+    }
+
+    result = lambda_handler(event, "_")
+
+    assert result["status"] == "success"
+    assert result["message_content"]["text"] == "Recycled 1 of 1 mongo replica sets."
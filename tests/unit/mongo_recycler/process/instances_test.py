@@ -1,8 +1,18 @@
+from datetime import datetime
+import threading
+import time
 from unittest.mock import Mock
 
+import pytest
 from src.mongo_recycler.connectors import mongo
 from src.mongo_recycler.models.instances import Instance
-from src.mongo_recycler.process.instances import fetch_replica_set_status
+from src.mongo_recycler.models.topology import Topology
+from src.mongo_recycler.process.instances import (
+    NODE_STATUS_DEADLINE_SECONDS,
+    NodeStatusTimeout,
+    fetch_replica_set_status_from_seed_list,
+    fetch_status_from_each_node,
+)
 
 
 def preprogrammed_get_node_details(ip_address):
@@ -15,13 +25,12 @@ def preprogrammed_get_node_details(ip_address):
     return mongo.NodeDetails(state, "int-protected-1")
 
 
-def test_fetch_replica_set_status():
+def test_fetch_status_from_each_node():
     mock_mongo = Mock()
-    mock_aws = Mock()
 
     mock_mongo.get_node_details = preprogrammed_get_node_details
 
-    mock_aws.get_mongo_db_instances.return_value = [
+    instances = [
         {
             "ImageId": "ami-e6618481",
             "InstanceId": "i-084d2313533e254c0",
@@ -44,7 +53,7 @@ def test_fetch_replica_set_status():
         },
     ]
 
-    replica_set_status = fetch_replica_set_status(mock_aws, mock_mongo)
+    replica_set_status = fetch_status_from_each_node(instances, mock_mongo, NODE_STATUS_DEADLINE_SECONDS)
 
     expected_status = [
         Instance(
@@ -78,3 +87,177 @@ def test_fetch_replica_set_status():
     ]
 
     assert list(replica_set_status) == expected_status
+
+
+def mongo_db_instances(ip_addresses):
+    return [
+        {"ImageId": "ami-e6618481", "InstanceId": f"i-{index}", "IpAddress": ip_address}
+        for index, ip_address in enumerate(ip_addresses)
+    ]
+
+
+def test_fetch_status_from_each_node_queries_nodes_concurrently_and_keeps_their_order():
+    ip_addresses = ["172.26.24.22", "172.26.24.21", "172.26.88.21"]
+    all_nodes_asked = threading.Barrier(len(ip_addresses), timeout=5)
+
+    def get_node_details(ip_address):
+        # Only returns once every node has been asked, and the first node answers last
+        all_nodes_asked.wait()
+        time.sleep(0.05 * (len(ip_addresses) - ip_addresses.index(ip_address)))
+        return preprogrammed_get_node_details(ip_address)
+
+    mock_mongo = Mock()
+    mock_mongo.get_node_details = get_node_details
+
+    replica_set_status = fetch_status_from_each_node(
+        mongo_db_instances(ip_addresses), mock_mongo, NODE_STATUS_DEADLINE_SECONDS
+    )
+
+    assert [instance.ip_address for instance in replica_set_status] == ip_addresses
+    assert [instance.mongo_state for instance in replica_set_status] == ["PRIMARY", "SECONDARY", "SECONDARY"]
+
+
+def test_fetch_status_from_each_node_gives_up_on_a_node_after_the_deadline():
+    unreachable = threading.Event()
+
+    def get_node_details(ip_address):
+        if ip_address == "172.26.88.21":
+            unreachable.wait(timeout=5)
+        return preprogrammed_get_node_details(ip_address)
+
+    mock_mongo = Mock()
+    mock_mongo.get_node_details = get_node_details
+
+    try:
+        with pytest.raises(NodeStatusTimeout) as e_info:
+            fetch_status_from_each_node(mongo_db_instances(["172.26.24.22", "172.26.88.21"]), mock_mongo, 0.1)
+    finally:
+        unreachable.set()
+
+    assert str(e_info.value) == "No status from 172.26.88.21 within 0.1 seconds"
+
+
+def test_fetch_status_from_each_node_raises_node_errors():
+    mock_mongo = Mock()
+    mock_mongo.get_node_details.side_effect = mongo.MongoRequestFailed
+
+    with pytest.raises(mongo.MongoRequestFailed):
+        fetch_status_from_each_node(mongo_db_instances(["172.26.24.22"]), mock_mongo, NODE_STATUS_DEADLINE_SECONDS)
+
+
+def seed_list_mongo(member_settings=None):
+    mock_mongo = Mock()
+    mock_mongo.replica_set_member_settings.return_value = member_settings or {}
+    return mock_mongo
+
+
+def replica_set_members(states, health=None):
+    health = health or {}
+    return {
+        "set": "int-protected-1",
+        "members": [
+            {"name": f"{ip_address}:27017", "stateStr": state, "health": health.get(ip_address, 1)}
+            for ip_address, state in states.items()
+        ],
+    }
+
+
+def test_fetch_replica_set_status_from_seed_list_uses_a_single_replica_set_status():
+    mock_mongo = seed_list_mongo()
+    mock_aws = Mock()
+    mock_aws.get_mongo_db_instances.return_value = mongo_db_instances(["172.26.24.22", "172.26.24.21", "172.26.88.22"])
+    mock_mongo.replica_set_status.return_value = replica_set_members(
+        {"172.26.88.22": "ARBITER", "172.26.24.21": "SECONDARY", "172.26.24.22": "PRIMARY"}
+    )
+
+    replica_set_status = fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo)
+
+    mock_mongo.replica_set_status.assert_called_once_with("172.26.24.22,172.26.24.21,172.26.88.22")
+    mock_mongo.get_node_details.assert_not_called()
+    assert replica_set_status == [
+        Instance("i-0", "ami-e6618481", "172.26.24.22", "PRIMARY", "int-protected-1"),
+        Instance("i-1", "ami-e6618481", "172.26.24.21", "SECONDARY", "int-protected-1"),
+        Instance("i-2", "ami-e6618481", "172.26.88.22", "ARBITER", "int-protected-1"),
+    ]
+
+
+def test_fetch_replica_set_status_from_seed_list_asks_each_node_when_an_instance_is_not_a_member():
+    mock_mongo = seed_list_mongo()
+    mock_aws = Mock()
+    mock_mongo.get_node_details = preprogrammed_get_node_details
+    mock_aws.get_mongo_db_instances.return_value = mongo_db_instances(["172.26.24.22", "172.26.24.21"])
+    mock_mongo.replica_set_status.return_value = replica_set_members({"172.26.24.22": "PRIMARY"})
+
+    replica_set_status = fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo)
+
+    assert [instance.mongo_state for instance in replica_set_status] == ["PRIMARY", "SECONDARY"]
+    # The mismatch may mean the instances are out of date, so they're discovered again before asking each node
+    mock_aws.invalidate_mongo_db_instances.assert_called_once()
+
+
+def test_fetch_replica_set_status_from_seed_list_asks_each_node_when_a_member_is_unreachable():
+    mock_mongo = seed_list_mongo()
+    mock_aws = Mock()
+    mock_mongo.get_node_details = preprogrammed_get_node_details
+    mock_aws.get_mongo_db_instances.return_value = mongo_db_instances(["172.26.24.22", "172.26.24.21"])
+    mock_mongo.replica_set_status.return_value = replica_set_members(
+        {"172.26.24.22": "PRIMARY", "172.26.24.21": "(not reachable/healthy)"}, health={"172.26.24.21": 0}
+    )
+
+    replica_set_status = fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo)
+
+    assert [instance.mongo_state for instance in replica_set_status] == ["PRIMARY", "SECONDARY"]
+
+
+def restored_topology(config_version):
+    return Topology("ami-e6618481", {}, mongo_db_instances(["172.26.24.22"]), "int-protected-1", False, config_version)
+
+
+def test_fetch_replica_set_status_from_seed_list_trusts_restored_instances_while_the_config_is_unchanged():
+    mock_mongo = seed_list_mongo()
+    mock_aws = Mock()
+    mock_aws.get_mongo_db_instances.return_value = mongo_db_instances(["172.26.24.22"])
+    replica_set_status = replica_set_members({"172.26.24.22": "PRIMARY"})
+    replica_set_status["members"][0].update({"self": True, "configVersion": 3})
+    mock_mongo.replica_set_status.return_value = replica_set_status
+
+    fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo, topology=restored_topology(3))
+
+    mock_aws.invalidate_mongo_db_instances.assert_not_called()
+
+
+def test_fetch_replica_set_status_from_seed_list_discovers_restored_instances_again_when_the_config_changed():
+    mock_mongo = seed_list_mongo()
+    mock_aws = Mock()
+    mock_aws.get_mongo_db_instances.side_effect = [
+        mongo_db_instances(["172.26.24.22"]),
+        [{"ImageId": "ami-new", "InstanceId": "i-new", "IpAddress": "172.26.24.22"}],
+    ]
+    replica_set_status = replica_set_members({"172.26.24.22": "PRIMARY"})
+    replica_set_status["members"][0].update({"self": True, "configVersion": 4})
+    mock_mongo.replica_set_status.return_value = replica_set_status
+
+    result = fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo, topology=restored_topology(3))
+
+    mock_aws.invalidate_mongo_db_instances.assert_called_once()
+    assert result == [Instance("i-new", "ami-new", "172.26.24.22", "PRIMARY", "int-protected-1")]
+
+
+def test_fetch_replica_set_status_from_seed_list_fills_in_member_settings_lag_and_availability_zone():
+    mock_aws = Mock()
+    mock_aws.get_mongo_db_instances.return_value = [
+        {**instance, "AvailabilityZone": "eu-west-2a"}
+        for instance in mongo_db_instances(["172.26.24.22", "172.26.24.21"])
+    ]
+    mock_mongo = seed_list_mongo({"172.26.24.21": {"priority": 0, "votes": 0, "hidden": True}})
+    replica_set_status = replica_set_members({"172.26.24.22": "PRIMARY", "172.26.24.21": "SECONDARY"})
+    replica_set_status["members"][0]["optimeDate"] = datetime(2024, 1, 1, 12, 0, 10)
+    replica_set_status["members"][1]["optimeDate"] = datetime(2024, 1, 1, 12, 0, 0)
+    mock_mongo.replica_set_status.return_value = replica_set_status
+
+    primary, secondary = fetch_replica_set_status_from_seed_list(mock_aws, mock_mongo)
+
+    assert primary == Instance("i-0", "ami-e6618481", "172.26.24.22", "PRIMARY", "int-protected-1", "eu-west-2a")
+    assert secondary == Instance(
+        "i-1", "ami-e6618481", "172.26.24.21", "SECONDARY", "int-protected-1", "eu-west-2a", 0, 0, True, 10.0
+    )
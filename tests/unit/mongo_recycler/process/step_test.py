@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import boto3
 import pytest
@@ -10,6 +10,8 @@ from src.mongo_recycler.models.decision import (
     step_down_and_recycle_primary,
 )
 from src.mongo_recycler.models.instances import Instance
+from src.mongo_recycler.models.topology import ChainingState, MemberSettings
+from src.mongo_recycler.process.execute import TERMINATING, OutOfTime
 from src.mongo_recycler.process.pre_step_checks import MongoReplicaSetMismatch
 from src.mongo_recycler.process.step import (
     increment_counter,
@@ -40,7 +42,7 @@ def test_step_function_exits_if_launch_config_ami_doesnt_match(mock_execute, moc
 @patch("src.mongo_recycler.connectors.mongo.Mongo")
 @patch("src.mongo_recycler.connectors.aws.AWS")
 @patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
-@patch("src.mongo_recycler.process.instances.fetch_replica_set_status")
+@patch("src.mongo_recycler.process.instances.fetch_replica_set_status_from_seed_list")
 @patch("src.mongo_recycler.process.pre_step_checks.get_ami_and_check_all_amis_match")
 @patch("src.mongo_recycler.process.pre_step_checks.assert_all_nodes_in_same_replica_set")
 @patch("src.mongo_recycler.process.execute.execute_action")
@@ -58,7 +60,7 @@ def test_step_function_exits_if_replica_sets_dont_match(mock_execute, mock_asser
 @patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
 @patch("src.mongo_recycler.process.execute.execute_action")
 @patch("src.mongo_recycler.process.decision.decide_on_action")
-@patch("src.mongo_recycler.process.instances.fetch_replica_set_status")
+@patch("src.mongo_recycler.process.instances.fetch_replica_set_status_from_seed_list")
 @patch("src.mongo_recycler.process.pre_step_checks.assert_amis_match_and_get_ami")
 @patch("src.mongo_recycler.process.pre_step_checks.assert_all_nodes_in_same_replica_set")
 def test_step_function_normal_execution(
@@ -84,9 +86,10 @@ def test_step_function_normal_execution(
     mock_replica_set_health.assert_called_with(mock_aws(), mock_mongo())
 
     mock_assert_node_check.assert_called_with(replica_set_status)
-    mock_fetch_replica.assert_called_with(mock_aws(), mock_mongo())
+    mock_fetch_replica.assert_called_with(mock_aws(), mock_mongo(), topology=None)
     mock_decide.assert_called_with(replica_set_status, mock_assert_ami_match.return_value)
-    mock_execute.assert_called_with(decision, mock_aws(), mock_mongo(), mock_replica_set_health())
+    mock_execute.assert_called_with(decision, mock_aws(), mock_mongo(), mock_replica_set_health(), None)
+    mock_mongo().close.assert_called_once()
 
     assert result == decision
 
@@ -143,7 +146,7 @@ def test_lambda_handler_runs(mock_boto3, mock_logger, mock_run, mock_requests_po
     }
     test_lambda_handler_result = lambda_handler(event, "_")
     mock_logger.assert_called_with(event, "_")
-    mock_run.assert_called_with("test-component")
+    mock_run.assert_called_with("test-component", ANY, {})
 
     assert test_lambda_handler_result
 
@@ -165,7 +168,7 @@ def test_lambda_handler_runs_successfully(mock_logger, mock_run, mock_requests_p
     mock_run.return_value = done()
     test_lambda_handler_result = lambda_handler(event, "_")
     mock_logger.assert_called_with(event, "_")
-    mock_run.assert_called_with("test-component")
+    mock_run.assert_called_with("test-component", ANY, {})
 
     assert (
         event["message_content"]["text"] == "Autorecycling has successfully completed. " "Recycled 3 mongo instances."
@@ -191,8 +194,97 @@ def test_lambda_handler_returns_no_instance_recycled(mock_boto3, mock_logger, mo
     mock_run.return_value = done()
     test_lambda_handler_result = lambda_handler(event, "_")
     mock_logger.assert_called_with(event, "_")
-    mock_run.assert_called_with("test-component")
+    mock_run.assert_called_with("test-component", ANY, {})
 
     assert event["message_content"]["text"] == "No instances were recycled, because there was nothing to do"
 
     assert test_lambda_handler_result
+
+
+class FakeLambdaContext:
+    def get_remaining_time_in_millis(self):
+        return 120000
+
+
+@patch("src.mongo_recycler.process.step.record_recycle_starting")
+@patch("src.mongo_recycler.process.step.step")
+@patch("src.mongo_recycler.process.step.json_logger_config")
+def test_lambda_handler_checkpoints_when_out_of_time(mock_logger, mock_run, mock_record):
+    primary_1 = Instance("i-1", "ami-1", "10.0.0.1", "PRIMARY", "rs")
+    mock_run.side_effect = OutOfTime(step_down_and_recycle_primary(primary_1), TERMINATING, 1500)
+    event = {"component": "test-component", "message_content": {"text": "Autorecycling has successfully initiated"}}
+
+    result = lambda_handler(event, FakeLambdaContext())
+
+    assert mock_run.call_args.args[1].available_seconds() == 60
+    assert result["decision"] == {"action": "RESUME", "instance": primary_1}
+    assert result["checkpoint"]["phase"] == TERMINATING
+    assert "counter" not in result
+
+
+@patch("src.mongo_recycler.process.step.record_recycle_starting")
+@patch("src.mongo_recycler.process.step.resume")
+@patch("src.mongo_recycler.process.step.step")
+@patch("src.mongo_recycler.process.step.json_logger_config")
+def test_lambda_handler_resumes_from_a_checkpoint(mock_logger, mock_run, mock_resume, mock_record):
+    primary_1 = Instance("i-1", "ami-1", "10.0.0.1", "PRIMARY", "rs")
+    checkpoint = {"action": "STEP_DOWN_AND_RECYCLE_PRIMARY", "instance": primary_1._asdict(), "phase": TERMINATING}
+    mock_resume.return_value = step_down_and_recycle_primary(primary_1)
+    event = {"component": "test-component", "checkpoint": checkpoint}
+
+    result = lambda_handler(event, FakeLambdaContext())
+
+    mock_run.assert_not_called()
+    mock_record.assert_not_called()
+    mock_resume.assert_called_with("test-component", checkpoint, ANY)
+    assert result["decision"]["action"] == "STEP_DOWN_AND_RECYCLE_PRIMARY"
+    assert "checkpoint" not in result
+    assert result["counter"] == 1
+
+
+@patch("src.mongo_recycler.process.step.Mongo")
+@patch("src.mongo_recycler.process.step.AWS")
+@patch("src.mongo_recycler.process.replica_set_health.ReplicaSetHealth")
+@patch("src.mongo_recycler.process.execute.execute_action")
+@patch("src.mongo_recycler.process.decision.decide_on_action")
+@patch("src.mongo_recycler.process.instances.fetch_replica_set_status_from_seed_list")
+@patch("src.mongo_recycler.process.pre_step_checks.get_ami_and_check_all_amis_match")
+def test_step_reuses_and_updates_the_topology_in_the_event(
+    mock_get_ami, mock_fetch_replica, mock_decide, mock_execute, mock_replica_set_health, mock_aws, mock_mongo
+):
+    previous_instances = [{"InstanceId": "i-1", "ImageId": "ami-old", "IpAddress": "10.0.0.1"}]
+    current_instances = [{"InstanceId": "i-2", "ImageId": "ami-new", "IpAddress": "10.0.0.1"}]
+    launch_template_images = {"lt-a": {"version": 5, "image_id": "ami-new"}}
+    member_settings = {"10.0.0.1": {"priority": 1, "votes": 1, "hidden": False}}
+    topology_state = {
+        "target_ami": "ami-new",
+        "launch_template_images": launch_template_images,
+        "instances": previous_instances,
+        "replica_set_name": "rs",
+        "chaining_allowed": False,
+        "config_version": 3,
+        "member_settings": member_settings,
+    }
+    primary = Instance("i-1", "ami-old", "10.0.0.1", "PRIMARY", "rs")
+    mock_get_ami.return_value = "ami-new"
+    mock_fetch_replica.return_value = [primary]
+    mock_decide.return_value = step_down_and_recycle_primary(primary)
+    mock_aws().get_mongo_db_instances.return_value = current_instances
+    mock_replica_set_health().last_replica_set_status = {"members": [{"self": True, "configVersion": 3}]}
+
+    step("protected_mongo_a", None, topology_state)
+
+    mock_get_ami.assert_called_with("protected_mongo_a", mock_aws(), launch_template_images)
+    mock_aws().restore_mongo_db_instances.assert_called_with(previous_instances)
+    assert mock_mongo().chaining_state == ChainingState(False, 3)
+    assert mock_mongo().member_settings == MemberSettings(member_settings, 3)
+    assert mock_fetch_replica.call_args.kwargs["topology"].instances == previous_instances
+    assert topology_state == {
+        "target_ami": "ami-new",
+        "launch_template_images": launch_template_images,
+        "instances": current_instances,
+        "replica_set_name": "rs",
+        "chaining_allowed": False,
+        "config_version": 3,
+        "member_settings": member_settings,
+    }
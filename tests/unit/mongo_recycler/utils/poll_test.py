@@ -1,7 +1,8 @@
-from unittest.mock import Mock
+import itertools
+from unittest.mock import Mock, patch
 
 import pytest
-from src.mongo_recycler.utils.poll import poll
+from src.mongo_recycler.utils.poll import DecorrelatedJitter, Exponential, Fixed, poll
 
 
 def test_poll_exits_after_max_failures():
@@ -33,3 +34,87 @@ def test_poll_iters_depends_on_max_iters():
 
     assert e_info.value == error
     assert always_fails.call_count == 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def take(schedule, count):
+    return list(itertools.islice(schedule.sleeps(), count))
+
+
+def test_fixed_schedule():
+    assert take(Fixed(10), 3) == [10, 10, 10]
+
+
+def test_exponential_schedule_backs_off_up_to_the_max():
+    assert take(Exponential(initial_seconds=2, max_seconds=10, jitter=False), 5) == [2, 4, 8, 10, 10]
+
+
+def test_exponential_schedule_jitters_each_sleep():
+    sleeps = take(Exponential(initial_seconds=4, max_seconds=4), 100)
+
+    assert all(2 <= seconds <= 4 for seconds in sleeps)
+    assert len(set(sleeps)) > 1
+
+
+def test_decorrelated_jitter_schedule_stays_between_base_and_max():
+    sleeps = take(DecorrelatedJitter(base_seconds=1, max_seconds=20), 100)
+
+    assert all(1 <= seconds <= 20 for seconds in sleeps)
+
+
+def test_poll_sleeps_according_to_the_schedule():
+    clock = FakeClock()
+    succeeds_on_sixth_attempt = Mock(side_effect=[Exception("whoops")] * 5 + [None])
+
+    with patch("time.monotonic", clock.monotonic), patch("time.sleep", clock.sleep):
+        poll(succeeds_on_sixth_attempt, schedule=Exponential(initial_seconds=2, max_seconds=10, jitter=False))
+
+    assert succeeds_on_sixth_attempt.call_count == 6
+    assert clock.sleeps == [2, 4, 8, 10, 10]
+
+
+def test_poll_raises_the_last_error_at_the_deadline():
+    clock = FakeClock()
+    error = Exception("whoops")
+    always_fails = Mock(side_effect=error)
+
+    with patch("time.monotonic", clock.monotonic), patch("time.sleep", clock.sleep):
+        with pytest.raises(Exception) as e_info:
+            poll(always_fails, max_iters=None, sleep_for_seconds=7, deadline_seconds=30)
+
+    assert e_info.value == error
+    # The last sleep is cut short so the final attempt lands on the deadline
+    assert clock.sleeps == [7, 7, 7, 7, 2]
+    assert always_fails.call_count == 6
+
+
+def test_poll_stops_at_max_iters_before_the_deadline():
+    always_fails = Mock(side_effect=Exception("whoops"))
+
+    with pytest.raises(Exception):
+        poll(always_fails, max_iters=3, deadline_seconds=30)
+
+    assert always_fails.call_count == 3
+
+
+def test_poll_reports_every_attempt():
+    attempts = []
+    succeeds_on_third_attempt = Mock(side_effect=[Exception("whoops"), Exception("whoops"), None])
+
+    poll(succeeds_on_third_attempt, on_attempt=attempts.append)
+
+    assert [attempt.attempt for attempt in attempts] == [1, 2, 3]
+    assert [attempt.error is None for attempt in attempts] == [False, False, True]
+    assert all(attempt.latency_seconds >= 0 for attempt in attempts)
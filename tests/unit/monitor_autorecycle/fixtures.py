@@ -0,0 +1,66 @@
+from collections import Counter
+from types import SimpleNamespace
+
+
+def synthetic_asgs(count, instances=None):
+    return [
+        {
+            "AutoScalingGroupName": f"component_{i}-asg-{i:06d}",
+            "MaxSize": 2,
+            "Instances": instances if instances is not None else [],
+            "Tags": [{"Key": "Name", "Value": f"component_{i}"}],
+        }
+        for i in range(count)
+    ]
+
+
+class CountingAutoScalingClient:
+    """
+    An in-memory autoscaling client which counts the API calls made against it, so tests can assert on the
+    number of requests a single monitor check costs.
+    """
+
+    meta = SimpleNamespace(region_name="eu-west-2")
+
+    def __init__(self, groups, activities=None, page_size=100):
+        self.groups = groups
+        self.activities = activities or []
+        self.page_size = page_size
+        self.calls = Counter()
+
+    def describe_auto_scaling_groups(self, AutoScalingGroupNames=None, Filters=None, **kwargs):
+        self.calls["DescribeAutoScalingGroups"] += 1
+        groups = self.groups
+        if AutoScalingGroupNames is not None:
+            groups = [group for group in groups if group["AutoScalingGroupName"] in AutoScalingGroupNames]
+        for group_filter in Filters or []:
+            tag_key = group_filter["Name"][len("tag:") :]
+            groups = [
+                group
+                for group in groups
+                if any(tag["Key"] == tag_key and tag["Value"] in group_filter["Values"] for tag in group["Tags"])
+            ]
+        return {"AutoScalingGroups": groups}
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "describe_auto_scaling_groups"
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                for start in range(0, len(client.groups), client.page_size):
+                    client.calls["DescribeAutoScalingGroups"] += 1
+                    yield {"AutoScalingGroups": client.groups[start : start + client.page_size]}
+
+        return Paginator()
+
+    def describe_scaling_activities(self, AutoScalingGroupName, MaxRecords=100, NextToken=None, **kwargs):
+        self.calls["DescribeScalingActivities"] += 1
+        start = int(NextToken or 0)
+        response = {"Activities": self.activities[start : start + MaxRecords]}
+        if start + MaxRecords < len(self.activities):
+            response["NextToken"] = str(start + MaxRecords)
+        return response
+
+    def total_calls(self):
+        return sum(self.calls.values())
@@ -1,14 +1,21 @@
+import itertools
+import json
+import random
 import unittest
-from datetime import datetime, timedelta
-from unittest.mock import MagicMock, call, patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
 
 from src.monitor_autorecycle.main import (
+    MAX_POLL_SECONDS,
+    MAX_RECYCLE_DURATION,
+    RECYCLE_START_SLACK,
     ScaledDownASGException,
     _compare_start_times,
     _describe_asg,
     _describe_scaling_activities,
     _get_launching_activities,
-    _last_instance_activity_time,
+    _last_launch_times_by_instance,
+    _monitor_autorecycle,
     check,
     check_instances,
     config,
@@ -16,6 +23,7 @@ from src.monitor_autorecycle.main import (
 )
 from tests.test_data.monitor_autorecycle.describe_asg_lc import launch_configuration_asgs
 from tests.test_data.monitor_autorecycle.describe_asg_lt import launch_template_asgs
+from tests.unit.monitor_autorecycle.fixtures import CountingAutoScalingClient, synthetic_asgs
 
 CONTEXT = MagicMock(aws_request_id="test-request-id", function_name="test-function")
 
@@ -495,8 +503,8 @@ class Check(unittest.TestCase):
         mock_launching_activities.return_value = []
         component = "doesnt_matter"
         check(component)
-        mock_describe_asg.assert_called_with(component)
-        mock_scaling_activities.assert_called_with("public_routing_proxy_healthy-asg-123")
+        mock_describe_asg.assert_called_with(component, None)
+        mock_scaling_activities.assert_called_with("public_routing_proxy_healthy-asg-123", None, [])
         mock_check_instances.assert_not_called()
 
     def test_check_returns_check_instances_when_scaling_activities(
@@ -507,52 +515,44 @@ class Check(unittest.TestCase):
         mock_check_instances,
     ):
         component = "public_routing_proxy_healthy"
-        mock_describe_asg.return_value = {"AutoScalingGroupName": "test_asg_name"}
+        mock_describe_asg.return_value = {"AutoScalingGroupName": "test_asg_name", "Instances": []}
         mock_launching_activities.return_value = [
             {
-                "Description": "test_id launch_activity",
+                "Description": "Launching a new EC2 instance: i-1",
+                "StartTime": datetime(2022, 4, 19, 15, 19),
             }
         ]
         self.assertEqual(check(component), mock_check_instances.return_value)
-        mock_describe_asg.assert_called_with(component)
-        mock_scaling_activities.assert_called_with("test_asg_name")
+        mock_describe_asg.assert_called_with(component, None)
+        mock_scaling_activities.assert_called_with("test_asg_name", None, [])
         mock_launching_activities.assert_called_with(mock_scaling_activities.return_value)
+        mock_check_instances.assert_called_with(
+            mock_describe_asg.return_value, {"i-1": datetime(2022, 4, 19, 15, 19)}, 2
+        )
 
 
 class CheckInstances(unittest.TestCase):
     @patch("src.monitor_autorecycle.main._compare_start_times")
-    @patch("src.monitor_autorecycle.main._last_instance_activity_time")
-    def test_check_instances_with_healthy_instances(self, mock_last_instance_activity_time, mock_compare_start_times):
+    def test_check_instances_with_healthy_instances(self, mock_compare_start_times):
         asg = launch_configuration_asgs()["AutoScalingGroups"][0]
-        launching_activities = "doesnt_matter"
-        mock_last_instance_activity_time.side_effect = [1, 2]
-        last_activity_calls = [
-            call(launching_activities, "i-1"),
-            call(launching_activities, "i-2"),
-        ]
 
-        check_instances(asg, launching_activities)
+        check_instances(asg, {"i-2": 2, "i-1": 1})
 
-        mock_last_instance_activity_time.assert_has_calls(last_activity_calls)
-        self.assertEqual(len(mock_last_instance_activity_time.mock_calls), 2)
         mock_compare_start_times.assert_called_with([1, 2], 2)
 
     def test_check_instances_with_unhealthy_instances(self):
         asg = launch_template_asgs()["AutoScalingGroups"][2]
-        launching_activities = "doesnt_matter"
-        self.assertFalse(check_instances(asg, launching_activities))
+        self.assertFalse(check_instances(asg, "doesnt_matter"))
 
     def test_check_instances_with_instances_not_in_service(self):
         asg = launch_template_asgs()["AutoScalingGroups"][4]
-        launching_activities = "doesnt_matter"
-        self.assertFalse(check_instances(asg, launching_activities))
+        self.assertFalse(check_instances(asg, "doesnt_matter"))
 
-    def test_check_instances_with_no_activities(self):
+    def test_check_instances_with_no_launch_times(self):
         asg = launch_configuration_asgs()["AutoScalingGroups"][0]
-        launching_activities = []
 
         self.assertEqual(
-            check_instances(asg, launching_activities),
+            check_instances(asg, {}),
             False,
         )
 
@@ -638,10 +638,10 @@ class DescribeScalingActivities(unittest.TestCase):
 
         mock_boto_client().describe_scaling_activities.return_value = response
         self.assertEqual(_describe_scaling_activities("test_asg"), response["Activities"])
-        mock_boto_client.assert_called_with("autoscaling", "eu-west-2", config=config)
+        mock_boto_client.assert_called_with("autoscaling", region_name="eu-west-2", config=config)
         mock_boto_client().describe_scaling_activities.assert_called_with(
             AutoScalingGroupName="test_asg",
-            MaxRecords=20,
+            MaxRecords=100,
         )
 
 
@@ -670,53 +670,51 @@ class GetLaunchingActivities(unittest.TestCase):
         self.assertEqual(_get_launching_activities(scaling_activities), expected_result)
 
 
-class LastScalingActivityTime(unittest.TestCase):
-    def test_last_instance_activity_time_returns_last_activity_start_time(self):
+class LastLaunchTimesByInstance(unittest.TestCase):
+    def test_last_launch_times_are_the_latest_start_time_of_each_instance(self):
         scaling_activities = [
             {
-                "Description": "test_id last_activity",
+                "Description": "Launching a new EC2 instance: i-0a1b last_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 28),
                 "EndTime": datetime(2022, 4, 19, 15, 29),
             },
             {
-                "Description": "test_id first_activity",
+                "Description": "Launching a new EC2 instance: i-0a1b first_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 19),
                 "EndTime": datetime(2022, 4, 19, 15, 32),
             },
             {
-                "Description": "test_id middle_activity",
+                "Description": "Launching a new EC2 instance: i-0a1b middle_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 24),
                 "EndTime": datetime(2022, 4, 19, 15, 33),
             },
         ]
         self.assertEqual(
-            _last_instance_activity_time(scaling_activities, "test_id"),
-            datetime(2022, 4, 19, 15, 28),
+            _last_launch_times_by_instance(scaling_activities),
+            {"i-0a1b": datetime(2022, 4, 19, 15, 28)},
         )
 
-    def test_last_instance_activity_time_returns_last_activity_start_time_excluding_other_instance_ids(
-        self,
-    ):
+    def test_last_launch_times_are_kept_apart_for_each_instance(self):
         scaling_activities = [
             {
-                "Description": "wrong_id last_activity",
+                "Description": "Launching a new EC2 instance: i-0a1bc last_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 28),
                 "EndTime": datetime(2022, 4, 19, 15, 29),
             },
             {
-                "Description": "test_id first_activity",
+                "Description": "Launching a new EC2 instance: i-0a1b first_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 19),
                 "EndTime": datetime(2022, 4, 19, 15, 32),
             },
             {
-                "Description": "test_id middle_activity",
+                "Description": "Launching a new EC2 instance: i-0a1b middle_activity",
                 "StartTime": datetime(2022, 4, 19, 15, 24),
                 "EndTime": datetime(2022, 4, 19, 15, 33),
             },
         ]
         self.assertEqual(
-            _last_instance_activity_time(scaling_activities, "test_id"),
-            datetime(2022, 4, 19, 15, 24),
+            _last_launch_times_by_instance(scaling_activities),
+            {"i-0a1bc": datetime(2022, 4, 19, 15, 28), "i-0a1b": datetime(2022, 4, 19, 15, 24)},
         )
 
     def test_no_instance_activities(
@@ -724,7 +722,69 @@ class LastScalingActivityTime(unittest.TestCase):
     ):
         scaling_activities = []
 
-        self.assertEqual(_last_instance_activity_time(scaling_activities, "test_id"), None)
+        self.assertEqual(_last_launch_times_by_instance(scaling_activities), {})
+
+
+def healthy_instances():
+    return [
+        {"InstanceId": instance_id, "HealthStatus": "Healthy", "LifecycleState": "InService"}
+        for instance_id in ["i-1", "i-2"]
+    ]
+
+
+def launching_activities():
+    return [
+        {"Description": f"Launching a new EC2 instance: {instance_id}", "StartTime": datetime(2022, 4, 19, 15, 19)}
+        for instance_id in ["i-1", "i-2"]
+    ]
+
+
+class ApiCallsPerCheck(unittest.TestCase):
+    def setUp(self):
+        self.groups = synthetic_asgs(1500)
+        self.target = self.groups[1234]
+        self.target["Instances"] = healthy_instances()
+        self.client = CountingAutoScalingClient(self.groups, launching_activities())
+
+    def check(self, component, asg_name=None):
+        with patch("boto3.client", return_value=self.client):
+            return check(component, asg_name)
+
+    def test_check_with_asg_name_from_event_describes_only_that_asg(self):
+        self.assertTrue(self.check("component_1234", "component_1234-asg-001234"))
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1)
+        self.assertEqual(self.client.total_calls(), 2)
+
+    def test_check_without_asg_name_filters_on_name_tag(self):
+        self.assertTrue(self.check("component_1234"))
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1)
+        self.assertEqual(self.client.total_calls(), 2)
+
+    def test_check_with_stale_asg_name_falls_back_to_name_tag(self):
+        self.assertTrue(self.check("component_1234", "component_1234-asg-replaced"))
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 2)
+
+    def test_check_with_untagged_asg_falls_back_to_listing_every_asg(self):
+        self.target["Tags"] = []
+        self.assertTrue(self.check("component_1234"))
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1 + 15)
+
+    def test_repeated_checks_of_an_untagged_asg_use_the_cached_inventory(self):
+        self.target["Tags"] = []
+        self.check("component_1234")
+        self.client.calls.clear()
+
+        self.assertTrue(self.check("component_1234"))
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1 + 1)
+
+    def test_asg_name_from_event_is_used_by_the_lambda(self):
+        event = get_test_event()
+        event["component"] = "component_1234"
+        event["auto_scaling_group_name"] = "component_1234-asg-001234"
+        with patch("boto3.client", return_value=self.client):
+            result = lambda_handler(event, CONTEXT)
+        self.assertTrue(result["recycle_success"])
+        self.assertEqual(self.client.calls["DescribeAutoScalingGroups"], 1)
 
 
 @patch("src.monitor_autorecycle.main._monitor_autorecycle")
@@ -743,3 +803,314 @@ class TestLambdaHandler(unittest.TestCase):
         with patch("src.monitor_autorecycle.main.aws_lambda_logging"):
             with self.assertRaises(Exception):
                 lambda_handler(event, CONTEXT),
+
+
+class CheckInstancesLaunchTimes(unittest.TestCase):
+    def test_instance_ids_that_prefix_one_another_are_not_confused(self):
+        asg = {"Instances": healthy_instances()}
+        activities = [
+            {"Description": "Launching a new EC2 instance: i-1", "StartTime": datetime(2022, 4, 19, 15, 19)},
+            {"Description": "Launching a new EC2 instance: i-2", "StartTime": datetime(2022, 4, 19, 15, 20)},
+            {"Description": "Launching a new EC2 instance: i-20", "StartTime": datetime(2022, 4, 19, 16, 0)},
+        ]
+
+        self.assertTrue(check_instances(asg, _last_launch_times_by_instance(activities)))
+
+
+def pairwise_within(start_times, delta):
+    # The pairwise comparison the window check replaced, kept as the reference it must agree with
+    diff = timedelta(minutes=delta)
+    return all(abs(a - b) <= diff for a, b in itertools.combinations(start_times, 2))
+
+
+class CompareStartTimesMatchesPairwise(unittest.TestCase):
+    def test_random_launch_times_agree_with_the_pairwise_comparison(self):
+        rng = random.Random(42)
+        start = datetime(2022, 4, 19, 15, 28)
+        for _ in range(2000):
+            start_times = [
+                start + timedelta(seconds=rng.choice([rng.randint(0, 300), 120, 0]))
+                for _ in range(rng.randint(0, 12))
+            ]
+            delta = rng.choice([0, 1, 2, 2.5, 5])
+
+            self.assertEqual(
+                _compare_start_times(start_times, delta), pairwise_within(start_times, delta), (start_times, delta)
+            )
+
+
+class LaunchWindow(unittest.TestCase):
+    def asg(self, launch_window_tag=None):
+        tags = [{"Key": "autorecycle_launch_window_minutes", "Value": launch_window_tag}] if launch_window_tag else []
+        return {
+            "AutoScalingGroupName": "component-asg-123",
+            "Instances": healthy_instances(),
+            "Tags": [{"Key": "Name", "Value": "component"}] + tags,
+        }
+
+    def activities(self, minutes_apart):
+        return [
+            {"Description": "Launching a new EC2 instance: i-1", "StartTime": datetime(2022, 4, 19, 15, 0)},
+            {
+                "Description": "Launching a new EC2 instance: i-2",
+                "StartTime": datetime(2022, 4, 19, 15, 0) + timedelta(minutes=minutes_apart),
+            },
+        ]
+
+    @patch("src.monitor_autorecycle.main._describe_scaling_activities")
+    @patch("src.monitor_autorecycle.main._describe_asg")
+    def check(self, asg, minutes_apart, mock_describe_asg, mock_describe_scaling_activities, **kwargs):
+        mock_describe_asg.return_value = asg
+        mock_describe_scaling_activities.return_value = self.activities(minutes_apart)
+        return check("component", **kwargs)
+
+    def test_the_default_window_is_two_minutes(self):
+        self.assertTrue(self.check(self.asg(), 2))
+        self.assertFalse(self.check(self.asg(), 3))
+
+    def test_the_window_can_be_set_by_the_asg_tag(self):
+        self.assertTrue(self.check(self.asg("5"), 5))
+        self.assertFalse(self.check(self.asg("5"), 6))
+
+    def test_the_window_from_the_event_takes_precedence_over_the_tag(self):
+        self.assertFalse(self.check(self.asg("5"), 3, launch_window_minutes=1))
+
+    def test_an_invalid_window_falls_back_to_the_default(self):
+        for launch_window in ["soon", "-1", "nan", "inf"]:
+            self.assertFalse(self.check(self.asg(launch_window), 3))
+            self.assertTrue(self.check(self.asg(launch_window), 2))
+
+
+class ScalingActivityHistory(unittest.TestCase):
+    def setUp(self):
+        # 250 activities a minute apart, newest first, as DescribeScalingActivities lists them
+        self.newest = datetime(2022, 4, 19, 15, 0, tzinfo=timezone.utc)
+        self.activities = [
+            {
+                "Description": f"Launching a new EC2 instance: i-{index:x}",
+                "StartTime": self.newest - timedelta(minutes=index),
+            }
+            for index in range(250)
+        ]
+        self.client = CountingAutoScalingClient([], self.activities)
+
+    def describe(self, since=None):
+        with patch("boto3.client", return_value=self.client):
+            return _describe_scaling_activities("test_asg", since)
+
+    def test_activities_are_listed_back_to_the_start_of_the_recycle(self):
+        activities = self.describe(since=self.newest - timedelta(minutes=149))
+
+        self.assertEqual(activities, self.activities[:150])
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 2)
+
+    def test_listing_stops_at_the_first_page_with_an_older_activity(self):
+        self.assertEqual(len(self.describe(since=self.newest - timedelta(minutes=10))), 11)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+
+    def test_every_page_is_listed_when_the_recycle_started_before_them_all(self):
+        self.assertEqual(len(self.describe(since=self.newest - timedelta(days=1))), 250)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 3)
+
+    def test_only_the_latest_page_is_listed_without_a_start_time(self):
+        self.assertEqual(self.describe(), self.activities[:100])
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+
+    def test_the_start_time_from_the_event_is_passed_on_with_some_slack(self):
+        event = {**get_test_event(), "recycle_started_at": "2022-04-19T15:00:00+00:00"}
+
+        with patch("src.monitor_autorecycle.main.check", return_value=False) as mock_check, patch(
+            "src.monitor_autorecycle.main._taking_too_long", return_value=False
+        ):
+            _monitor_autorecycle(event)
+
+        self.assertEqual(mock_check.call_args.args[3], self.newest - RECYCLE_START_SLACK)
+
+    def test_an_invalid_start_time_is_ignored(self):
+        event = {**get_test_event(), "recycle_started_at": "yesterday"}
+
+        with patch("src.monitor_autorecycle.main.check", return_value=False) as mock_check:
+            _monitor_autorecycle(event)
+
+        self.assertIsNone(mock_check.call_args.args[3])
+
+
+class MonitorStateBetweenPolls(unittest.TestCase):
+    def setUp(self):
+        self.newest = datetime(2022, 4, 19, 15, 0, tzinfo=timezone.utc)
+        # The ASG's instances were launched long enough ago that their launches are on the third page
+        self.activities = [
+            {
+                "Description": f"Launching a new EC2 instance: i-{index}",
+                "StartTime": self.newest - timedelta(minutes=index),
+                "StatusCode": "Successful",
+            }
+            for index in range(250)
+        ]
+        self.groups = synthetic_asgs(1)
+        self.groups[0]["Instances"] = [
+            {"InstanceId": instance_id, "HealthStatus": "Healthy", "LifecycleState": "InService"}
+            for instance_id in ["i-200", "i-201"]
+        ]
+        self.client = CountingAutoScalingClient(self.groups, self.activities)
+
+    def check(self, monitor_state, recycle_started_at=None):
+        with patch("boto3.client", return_value=self.client):
+            return check("component_0", "component_0-asg-000000", None, recycle_started_at, monitor_state)
+
+    def test_the_next_poll_only_lists_activities_since_the_last(self):
+        monitor_state = {}
+        self.assertTrue(self.check(monitor_state, self.newest - timedelta(days=1)))
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 3)
+        self.client.calls.clear()
+
+        self.activities.insert(
+            0,
+            {
+                "Description": "Launching a new EC2 instance: i-abc",
+                "StartTime": self.newest + timedelta(minutes=5),
+                "StatusCode": "Successful",
+            },
+        )
+        self.groups[0]["Instances"].append(
+            {"InstanceId": "i-abc", "HealthStatus": "Healthy", "LifecycleState": "Pending"}
+        )
+
+        self.assertFalse(self.check(monitor_state, self.newest - timedelta(days=1)))
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+        self.assertEqual(monitor_state["watermark"], (self.newest + timedelta(minutes=5)).isoformat())
+        self.assertEqual(set(monitor_state["launch_times"]), {"i-200", "i-201", "i-abc"})
+
+    def test_the_state_survives_being_passed_through_the_step_function_as_json(self):
+        monitor_state = {}
+        self.check(monitor_state, self.newest - timedelta(days=1))
+
+        restored_state = json.loads(json.dumps(monitor_state))
+        self.client.calls.clear()
+
+        self.assertTrue(self.check(restored_state))
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+
+    def test_activities_still_in_progress_are_listed_again_until_they_finish(self):
+        # On the second page, well before the watermark
+        slow_activity = self.activities[150]
+        slow_activity["StatusCode"] = "InProgress"
+        monitor_state = {}
+        self.check(monitor_state, self.newest - timedelta(days=1))
+        self.assertEqual(monitor_state["in_progress_since"], slow_activity["StartTime"].isoformat())
+        self.client.calls.clear()
+
+        self.check(monitor_state)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 2)
+        self.client.calls.clear()
+
+        slow_activity["StatusCode"] = "Successful"
+        self.check(monitor_state)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 2)
+        self.assertIsNone(monitor_state["in_progress_since"])
+        self.client.calls.clear()
+
+        self.check(monitor_state)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+
+    def test_state_for_another_asg_is_ignored(self):
+        monitor_state = {
+            "auto_scaling_group_name": "component_0-asg-replaced",
+            "watermark": self.newest.isoformat(),
+            "launch_times": {},
+        }
+
+        self.assertTrue(self.check(monitor_state, self.newest - timedelta(days=1)))
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 3)
+        self.assertEqual(monitor_state["auto_scaling_group_name"], "component_0-asg-000000")
+
+    def test_unreadable_state_is_ignored(self):
+        monitor_state = {
+            "auto_scaling_group_name": "component_0-asg-000000",
+            "watermark": "not a time",
+            "launch_times": {},
+        }
+
+        self.assertTrue(self.check(monitor_state, self.newest - timedelta(days=1)))
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 3)
+
+
+class NextPoll(unittest.TestCase):
+    def setUp(self):
+        now = datetime.now(timezone.utc)
+        self.groups = synthetic_asgs(1)
+        self.groups[0]["Instances"] = healthy_instances()
+        self.activities = [
+            {
+                "Description": "Launching a new EC2 instance: i-2",
+                "Progress": 30,
+                "StartTime": now - timedelta(seconds=60),
+                "StatusCode": "InProgress",
+            },
+            {
+                "Description": "Launching a new EC2 instance: i-1",
+                "EndTime": now - timedelta(seconds=60),
+                "Progress": 100,
+                "StartTime": now - timedelta(seconds=300),
+                "StatusCode": "Successful",
+            },
+        ]
+        self.client = CountingAutoScalingClient(self.groups, self.activities)
+        self.event = {
+            **get_test_event(),
+            "component": "component_0",
+            "auto_scaling_group_name": "component_0-asg-000000",
+            "recycle_started_at": (now - timedelta(minutes=10)).isoformat(),
+        }
+
+    def monitor(self, event):
+        with patch("boto3.client", return_value=self.client):
+            return _monitor_autorecycle(event)
+
+    def test_the_next_poll_is_when_the_launch_in_progress_should_be_done(self):
+        result = self.monitor(self.event)
+
+        self.assertAlmostEqual(result["next_poll_seconds"], 180, delta=2)
+        self.assertEqual(result["monitor_state"]["activity_seconds"], {"Launching": 240.0})
+        self.assertNotIn("next_poll_seconds", result["monitor_state"])
+
+    def test_the_first_poll_learns_durations_from_activities_before_the_recycle(self):
+        before_recycle = datetime.now(timezone.utc) - timedelta(minutes=30)
+        self.activities[1]["StartTime"] = before_recycle
+        self.activities[1]["EndTime"] = before_recycle + timedelta(seconds=240)
+
+        result = self.monitor(self.event)
+
+        self.assertAlmostEqual(result["next_poll_seconds"], 180, delta=2)
+        self.assertEqual(self.client.calls["DescribeScalingActivities"], 1)
+        self.assertEqual(set(result["monitor_state"]["launch_times"]), {"i-2"})
+
+    def test_the_durations_learnt_are_used_by_later_polls(self):
+        result = self.monitor(self.event)
+        del self.activities[1]
+
+        self.assertAlmostEqual(self.monitor(json.loads(json.dumps(result)))["next_poll_seconds"], 180, delta=2)
+
+    def test_the_next_poll_is_the_longest_wait_when_the_asg_is_scaled_down(self):
+        self.groups[0]["MaxSize"] = 0
+
+        self.assertEqual(self.monitor(self.event)["next_poll_seconds"], MAX_POLL_SECONDS)
+
+    def test_many_quick_polls_are_not_taking_too_long(self):
+        result = self.monitor({**self.event, "counter": 50})
+
+        self.assertNotEqual(result.get("status"), "fail")
+
+    def test_a_recycle_started_too_long_ago_is_taking_too_long(self):
+        started_at = datetime.now(timezone.utc) - MAX_RECYCLE_DURATION - timedelta(minutes=5)
+
+        result = self.monitor({**self.event, "recycle_started_at": started_at.isoformat()})
+
+        self.assertEqual(result["status"], "fail")
+        self.assertFalse(result["recycle_success"])
+
+    def test_without_a_start_time_the_polls_are_counted(self):
+        event = {**self.event, "counter": 20}
+        del event["recycle_started_at"]
+
+        self.assertEqual(self.monitor(event)["status"], "fail")